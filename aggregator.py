@@ -0,0 +1,216 @@
+import asyncio
+import json
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from get_data import FlightData
+from config import FLIGHT_DATA_TIMEOUT, AGGREGATOR_MAX_STALENESS
+
+
+class ReceiverSource:
+    """Latest snapshot and health of one receiver"""
+
+    def __init__(self, url):
+        self.url = url
+        self.aircraft = []
+        self.fetched_at = None
+        self.latency = None
+        self.errors = 0
+        self.last_error = None
+        self.etag = None
+        self.last_modified = None
+        self.session = None
+        self.reset()
+
+    def staleness(self, now):
+        return None if self.fetched_at is None else now - self.fetched_at
+
+    def reset(self):
+        """Drop the pooled connection and the validators, so the next poll starts afresh"""
+        self.close()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=1)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.etag = self.last_modified = None
+
+    def get(self, timeout):
+        """
+        Conditional GET on this source's own session, blocking.
+        Returns the body, or None on 304 Not Modified.
+        """
+        headers = {'Accept': 'application/json'}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        r = self.session.get(self.url, headers=headers, timeout=timeout)
+        if r.status_code == 304:
+            return None
+        r.raise_for_status()
+        self.etag = r.headers.get('ETag')
+        self.last_modified = r.headers.get('Last-Modified')
+        return r.content
+
+    def close(self):
+        if self.session is not None:
+            self.session.close()
+
+
+class MultiReceiverFlightData(FlightData):
+    """
+    Polls several receivers' aircraft.json concurrently on one asyncio loop.
+    Each source has its own poll task, requests session and timeout (the
+    blocking GET runs in a worker thread), so a slow or dead receiver never
+    holds up the others. Every update_interval the latest snapshots are
+    merged by ICAO hex, keeping whichever receiver heard the freshest position,
+    and the merged list goes to subscribers like a single-receiver snapshot.
+    Receivers that haven't answered for max_staleness seconds drop out of the
+    merge until they recover.
+    """
+
+    def __init__(self, urls, update_interval=1.0, timeout=FLIGHT_DATA_TIMEOUT,
+                 max_staleness=AGGREGATOR_MAX_STALENESS, autostart=True):
+        super().__init__(update_interval=update_interval, autostart=False)
+        self.sources = [ReceiverSource(url) for url in urls]
+        self.timeout = timeout
+        self.max_staleness = max_staleness
+        self.loop = None
+        self.async_stop = None
+        self.new_data = False
+        if autostart:
+            self.start()
+
+    def _run(self):
+        asyncio.run(self._main())
+
+    async def _main(self):
+        self.loop = asyncio.get_running_loop()
+        self.async_stop = asyncio.Event()
+        if not self.running:
+            return
+        tasks = [asyncio.create_task(self._poll_source(source)) for source in self.sources]
+        tasks.append(asyncio.create_task(self._merge_loop()))
+        await self.async_stop.wait()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for source in self.sources:
+            source.close()
+
+    async def _sleep(self, delay):
+        try:
+            await asyncio.wait_for(self.async_stop.wait(), delay)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _poll_source(self, source):
+        failures = 0
+        while self.running:
+            start = time.perf_counter()
+            try:
+                body = await asyncio.wait_for(asyncio.to_thread(source.get, self.timeout), self.timeout)
+                aircraft = None if body is None else json.loads(body).get('aircraft', [])
+            except Exception as e:
+                # anything one receiver sends (or fails to) only ever backs off that receiver
+                source.reset()
+                source.errors += 1
+                self.stats['errors'] += 1
+                source.last_error = str(e) or type(e).__name__
+                if failures == 0:
+                    print(f"[FlightData ERROR] {source.url}: {source.last_error} (backing off)")
+                failures += 1
+                await self._sleep(min(30, self.update_interval * 2 ** failures))
+                continue
+
+            failures = 0
+            source.latency = time.perf_counter() - start
+            source.fetched_at = time.time()
+            self.stats['fetches'] += 1
+            if body is None:
+                self.stats['not_modified'] += 1
+            else:
+                self.stats['bytes_fetched'] += len(body)
+                source.aircraft = aircraft
+                self.new_data = True
+            await self._sleep(self.update_interval)
+
+    async def _merge_loop(self):
+        while self.running:
+            if self.new_data:
+                self.new_data = False
+                now = time.time()
+                live = [source for source in self.sources
+                        if source.fetched_at is not None and now - source.fetched_at <= self.max_staleness]
+                try:
+                    merged = self.merge(live, now)
+                    with self.lock:
+                        self.data = merged
+                    self._publish(list(merged))
+                except Exception as e:
+                    self.stats['errors'] += 1
+                    print(f"[FlightData ERROR] merge/publish failed: {e!r}")
+            await self._sleep(self.update_interval)
+
+    @staticmethod
+    def merge(sources, now):
+        """
+        Merge the sources' latest snapshots by hex, keeping the record whose
+        position (or, without one, whose last message) is most recent.
+        Ages are measured against our own fetch times to avoid trusting each
+        receiver's clock, and seen/seen_pos are rebased to now.
+        """
+        best = {}
+        for source in sources:
+            if source.fetched_at is None:
+                continue
+            for ac in source.aircraft:
+                icao = ac.get('hex')
+                if not icao:
+                    continue
+                seen_pos = ac.get('seen_pos')
+                pos_time = source.fetched_at - seen_pos if seen_pos is not None and ac.get('lat') is not None else None
+                seen_time = source.fetched_at - ac.get('seen', 0)
+                rank = (pos_time is not None, pos_time or seen_time)
+                current = best.get(icao)
+                if current is None or rank > current[0]:
+                    best[icao] = (rank, ac, pos_time, seen_time)
+
+        merged = []
+        for _, ac, pos_time, seen_time in best.values():
+            ac = dict(ac)
+            ac['seen'] = now - seen_time
+            if pos_time is not None:
+                ac['seen_pos'] = now - pos_time
+            merged.append(ac)
+        return merged
+
+    def gauges(self):
+        """Per-receiver latency and staleness gauges, labelled by url"""
+        gauges = {}
+        for source in self.source_stats():
+            url = source['url'].replace('"', '%22')
+            for name in ('aircraft', 'latency', 'staleness', 'errors'):
+                if source[name] is not None:
+                    gauges[f'source_{name}{{source="{url}"}}'] = source[name]
+        return gauges
+
+    def source_stats(self):
+        """Per-receiver latency, staleness and error counts"""
+        now = time.time()
+        return [{
+            'url': source.url,
+            'aircraft': len(source.aircraft),
+            'latency': source.latency,
+            'staleness': source.staleness(now),
+            'errors': source.errors,
+            'last_error': source.last_error,
+        } for source in self.sources]
+
+    def stop(self):
+        self.running = False
+        self.stop_event.set()
+        if self.loop is not None and self.async_stop is not None:
+            self.loop.call_soon_threadsafe(self.async_stop.set)
+        if self.thread is not None:
+            self.thread.join()
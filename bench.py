@@ -0,0 +1,419 @@
+"""
+Headless performance benchmarks. Rendering runs under SDL's dummy video
+driver with FlightData fed by synthetic.SyntheticFeed, and results are
+written as JSON so runs can be compared for regressions.
+
+    python bench.py                       # everything
+    python bench.py frames --quick        # fewer sizes
+    python bench.py --output before.json
+    python bench.py frames ingest --replay capture.rlog   # recorded traffic
+"""
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import argparse
+import json
+import math
+import platform
+import random
+import statistics
+import time
+from sweep_index import SweepIndex
+from synthetic import SyntheticFeed, SyntheticFlightData
+from recording import ReplayFlightData
+from get_data import Calculations
+from config import SWEEP_SPEED, SWEEP_INDEX_BUCKET_DEGREES, MAX_RANGE_KM
+
+COUNTS = (10, 100, 1000, 10000)
+QUICK_COUNTS = (10, 1000)
+ZOOMS = (0.5, 1.0, 4.0)
+CENTER = (37.4866, -122.16382)
+
+
+def random_targets(count, seed=0):
+    rng = random.Random(seed)
+    return [(f"{i:06x}", rng.uniform(-300, 300), rng.uniform(-300, 300)) for i in range(count)]
+
+
+def timing_stats(samples):
+    samples = sorted(samples)
+    n = len(samples)
+    return {
+        'mean_ms': statistics.fmean(samples) * 1000,
+        'p50_ms': samples[n // 2] * 1000,
+        'p95_ms': samples[min(n - 1, int(n * 0.95))] * 1000,
+        'max_ms': samples[-1] * 1000,
+    }
+
+
+def sources(counts, replay=None):
+    """(aircraft count, center, FlightData) per run: synthetic feeds, or one recording"""
+    if replay:
+        flight_data = ReplayFlightData(replay, speed=0, loop=True, autostart=False)
+        yield max(flight_data.log.counts, default=0), flight_data.log.center or CENTER, flight_data
+        return
+    for count in counts:
+        yield count, CENTER, SyntheticFlightData(SyntheticFeed(count, CENTER))
+
+
+def bench_frames(counts=COUNTS, zooms=ZOOMS, frames=120, replay=None):
+    """Per-frame RadarDisplay.step() time in modern and WWII modes at several zoom levels"""
+    from radar import RadarDisplay
+
+    results = []
+    for count, center, flight_data in sources(counts, replay):
+        radar = RadarDisplay(flight_data=flight_data)
+        radar.verbose = False
+        radar.radar_center = center
+        flight_data.update_data()
+
+        for wwii in (False, True):
+            radar.wwii_mode = wwii
+            radar.blips.clear()
+            for zoom in zooms:
+                radar.zoom_level = zoom
+                for _ in range(10):
+                    radar.step()
+                samples = []
+                for _ in range(frames):
+                    start = time.perf_counter()
+                    radar.step()
+                    samples.append(time.perf_counter() - start)
+                results.append({'aircraft': count, 'mode': 'wwii' if wwii else 'modern',
+                                'zoom': zoom, **timing_stats(samples)})
+        radar.close()
+    return results
+
+
+def bench_projection(counts=COUNTS, repeats=20):
+    """Aircraft per second through Calculations.process_aircraft (batch and scalar paths)"""
+    results = []
+    for count in counts:
+        snapshot = SyntheticFeed(count, CENTER).snapshot()
+        for name, fn in (('batch', Calculations.process_aircraft),
+                         ('scalar', Calculations.process_aircraft_scalar)):
+            start = time.perf_counter()
+            for _ in range(repeats):
+                fn(snapshot, CENTER, MAX_RANGE_KM)
+            elapsed = (time.perf_counter() - start) / repeats
+            results.append({'aircraft': count, 'path': name, 'ms_per_snapshot': elapsed * 1000,
+                            'aircraft_per_second': count / elapsed if elapsed else None})
+    return results
+
+
+def bench_ingest(counts=COUNTS, polls=20, replay=None):
+    """
+    FlightData.update_data throughput (decode, snapshot publish, state store
+    deltas) with payloads generated ahead of time
+    """
+    if replay:
+        return [bench_replay_ingest(replay)]
+    results = []
+    for count in counts:
+        feed = SyntheticFeed(count, CENTER)
+        payloads = []
+        for _ in range(polls):
+            feed.advance(1.0)
+            payloads.append(feed.payload())
+        flight_data = SyntheticFlightData(feed, payloads=payloads)
+        deltas = []
+        flight_data.subscribe_deltas(deltas.append)
+
+        start = time.perf_counter()
+        for _ in range(polls):
+            flight_data.update_data()
+        elapsed = (time.perf_counter() - start) / polls
+        results.append({
+            'aircraft': count,
+            'payload_bytes': len(payloads[0]),
+            'ms_per_update': elapsed * 1000,
+            'updates_per_second': 1 / elapsed if elapsed else None,
+            'aircraft_per_second': count / elapsed if elapsed else None,
+        })
+    return results
+
+
+def bench_replay_ingest(path):
+    """update_data throughput playing a recording back as fast as possible"""
+    flight_data = ReplayFlightData(path, speed=0, autostart=False)
+    deltas = []
+    flight_data.subscribe_deltas(deltas.append)
+    frames = len(flight_data.log)
+    start = time.perf_counter()
+    while flight_data.update_data():
+        pass
+    elapsed = time.perf_counter() - start
+    records = sum(flight_data.log.counts)
+    flight_data.stop()
+    return {
+        'recording': path,
+        'frames': frames,
+        'aircraft': records / frames if frames else 0,
+        'ms_per_update': elapsed * 1000 / frames if frames else None,
+        'updates_per_second': frames / elapsed if elapsed else None,
+        'aircraft_per_second': records / elapsed if elapsed else None,
+    }
+
+
+def bench_decode(counts=(1000, 10000), frames=240, polls=8):
+    """
+    Frame times while a background thread ingests a poll every frames/polls
+    frames, decoding in this process versus in decoder.DecodeWorker. The
+    worker keeps JSON decoding and the state diff off this process's GIL,
+    which shows up in the p95 and max frame times.
+    """
+    from threading import Thread, Event
+    from radar import RadarDisplay
+    from decoder import DecodeWorker
+
+    results = []
+    for count in counts:
+        feed = SyntheticFeed(count, CENTER)
+        payloads = []
+        for _ in range(polls + 1):
+            feed.advance(1.0)
+            payloads.append(feed.payload())
+        for path in ('inline', 'process'):
+            decoder = DecodeWorker(CENTER, MAX_RANGE_KM) if path == 'process' else None
+            flight_data = SyntheticFlightData(feed, payloads=payloads, decoder=decoder)
+            radar = RadarDisplay(flight_data=flight_data)
+            radar.verbose = False
+            radar.radar_center = CENTER
+            flight_data.update_data()
+            for _ in range(10):
+                radar.step()
+
+            poll = Event()
+            done = Event()
+
+            def ingest():
+                while not done.is_set():
+                    if poll.wait(0.1):
+                        poll.clear()
+                        flight_data.update_data()
+
+            thread = Thread(target=ingest, daemon=True)
+            thread.start()
+            samples = []
+            for i in range(frames):
+                if i % (frames // polls) == 0:
+                    poll.set()
+                start = time.perf_counter()
+                radar.step()
+                samples.append(time.perf_counter() - start)
+            done.set()
+            thread.join()
+            radar.close()
+            if decoder:
+                decoder.close()
+            results.append({'aircraft': count, 'decode': path, 'payload_bytes': len(payloads[0]),
+                            **timing_stats(samples)})
+    return results
+
+
+def bench_contention(counts=(1000, 5000), frames=240, seconds_per_ingest=0.0):
+    """
+    Stress test for snapshot publication: a background thread ingests
+    pre-generated polls back to back while the render loop draws frames.
+    Reports frame times next to ingest throughput, and checks every frame's
+    snapshot is internally consistent (one motion entry per aircraft).
+    """
+    from threading import Thread, Event
+    from radar import RadarDisplay
+
+    results = []
+    for count in counts:
+        feed = SyntheticFeed(count, CENTER)
+        payloads = []
+        for _ in range(20):
+            feed.advance(1.0)
+            payloads.append(feed.payload())
+        flight_data = SyntheticFlightData(feed, payloads=payloads)
+        radar = RadarDisplay(flight_data=flight_data)
+        radar.verbose = False
+        radar.radar_center = CENTER
+        radar.show_trails = True
+        flight_data.update_data()
+
+        done = Event()
+        ingests = [0]
+
+        def ingest():
+            while not done.is_set():
+                flight_data.update_data()
+                ingests[0] += 1
+                if seconds_per_ingest:
+                    time.sleep(seconds_per_ingest)
+
+        for wwii in (False, True):
+            radar.wwii_mode = wwii
+            thread = Thread(target=ingest, daemon=True)
+            done.clear()
+            ingests[0] = 0
+            samples = []
+            generations = set()
+            torn = 0
+            start_all = time.perf_counter()
+            thread.start()
+            for _ in range(frames):
+                start = time.perf_counter()
+                radar.step()
+                samples.append(time.perf_counter() - start)
+                snapshot = radar.frame_snapshot
+                generations.add(snapshot.generation)
+                if len(snapshot.motion) != len(snapshot.aircraft):
+                    torn += 1
+            done.set()
+            thread.join()
+            elapsed = time.perf_counter() - start_all
+            results.append({'aircraft': count, 'mode': 'wwii' if wwii else 'modern',
+                            'ingests_per_second': ingests[0] / elapsed,
+                            'generations_drawn': len(generations), 'torn_snapshots': torn,
+                            **timing_stats(samples)})
+        radar.close()
+    return results
+
+
+def bench_sweep(counts=(1000, 5000, 10000), frames=360):
+    """
+    Per-frame cost of finding blip candidates: scanning every target with
+    atan2 (the old update_wwii_blips loop) versus querying the SweepIndex
+    for the wedge swept since the last frame.
+    """
+    results = []
+    for count in counts:
+        targets = random_targets(count)
+
+        start = time.perf_counter()
+        angle = 0
+        for _ in range(frames):
+            last, angle = angle, (angle + SWEEP_SPEED) % 360
+            for icao, dx, dy in targets:
+                math.degrees(math.atan2(-dy, dx)) % 360
+        scan = (time.perf_counter() - start) / frames
+
+        index = SweepIndex(SWEEP_INDEX_BUCKET_DEGREES)
+        start = time.perf_counter()
+        index.rebuild((math.degrees(math.atan2(-dy, dx)) % 360, icao) for icao, dx, dy in targets)
+        rebuild = time.perf_counter() - start
+
+        hits = 0
+        start = time.perf_counter()
+        angle = 0
+        for _ in range(frames):
+            last, angle = angle, (angle + SWEEP_SPEED) % 360
+            hits += len(index.query(last, angle))
+        indexed = (time.perf_counter() - start) / frames
+
+        results.append({
+            'targets': count,
+            'full_scan_ms_per_frame': scan * 1000,
+            'index_ms_per_frame': indexed * 1000,
+            'index_rebuild_ms': rebuild * 1000,
+            'hits_per_revolution': hits * 360 / (frames * SWEEP_SPEED),
+            'speedup': scan / indexed if indexed else None,
+        })
+    return results
+
+
+def bench_views(counts=(1000, 10000), polls=10):
+    """
+    Ingest cost per poll for three views (250 km and 40 km around one
+    center, 60 km around another): one RadarDisplay with its own feed per
+    view, versus one MultiViewDisplay whose views share a single feed and
+    one projection per center.
+    """
+    from radar import RadarDisplay, MultiViewDisplay
+    from views import ViewSpec
+
+    specs = [ViewSpec('overview', 250, CENTER), ViewSpec('approach', 40, CENTER),
+             ViewSpec('other', 60, (CENTER[0] + 0.2, CENTER[1] - 0.2))]
+    results = []
+    for count in counts:
+        feed = SyntheticFeed(count, CENTER)
+        payloads = []
+        for _ in range(polls):
+            feed.advance(1.0)
+            payloads.append(feed.payload())
+
+        feeds = [SyntheticFlightData(feed, payloads=list(payloads)) for _ in specs]
+        displays = [RadarDisplay(flight_data=flight_data, headless=False, radar_center=spec.center,
+                                 max_range_km=spec.max_range_km, metrics=False)
+                    for spec, flight_data in zip(specs, feeds)]
+        for display in displays:
+            display.verbose = False
+        start = time.perf_counter()
+        for _ in range(polls):
+            for flight_data in feeds:
+                flight_data.update_data()
+        separate = (time.perf_counter() - start) / polls
+        for display in displays:
+            display.close()
+
+        flight_data = SyntheticFlightData(feed, payloads=list(payloads))
+        multi = MultiViewDisplay(specs, flight_data=flight_data, headless=False)
+        for view in multi.views:
+            view.verbose = False
+        start = time.perf_counter()
+        for _ in range(polls):
+            flight_data.update_data()
+        shared = (time.perf_counter() - start) / polls
+        gauges = multi.ingest.gauges()
+        multi.close()
+
+        results.append({
+            'aircraft': count,
+            'views': len(specs),
+            'separate_ms_per_poll': separate * 1000,
+            'shared_ms_per_poll': shared * 1000,
+            'projections_per_poll': gauges['ingest_projections'] / polls,
+            'speedup': separate / shared if shared else None,
+        })
+    return results
+
+
+BENCHMARKS = {
+    'frames': bench_frames,
+    'projection': bench_projection,
+    'ingest': bench_ingest,
+    'decode': bench_decode,
+    'contention': bench_contention,
+    'sweep': bench_sweep,
+    'views': bench_views,
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run radar display benchmarks")
+    parser.add_argument('benchmarks', nargs='*', help=f"any of {', '.join(sorted(BENCHMARKS))} (default: all)")
+    parser.add_argument('--quick', action='store_true', help=f"only {QUICK_COUNTS} aircraft")
+    parser.add_argument('--output', help="also write the JSON results to this file")
+    parser.add_argument('--replay', help="run frames/ingest against this recording instead of synthetic traffic")
+    args = parser.parse_args()
+    for name in args.benchmarks:
+        if name not in BENCHMARKS:
+            parser.error(f"unknown benchmark: {name}")
+
+    results = {
+        'meta': {
+            'timestamp': time.time(),
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'platform': platform.platform(),
+        },
+    }
+    for name in args.benchmarks or sorted(BENCHMARKS):
+        fn = BENCHMARKS[name]
+        kwargs = {}
+        if args.quick and name not in ('sweep', 'decode', 'contention', 'views'):
+            kwargs['counts'] = QUICK_COUNTS
+        if args.replay and name in ('frames', 'ingest'):
+            kwargs['replay'] = args.replay
+        results[name] = fn(**kwargs)
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + "\n")
+    print(text)
@@ -0,0 +1,94 @@
+import numpy as np
+from config import BLIP_CAPACITY, BLIP_EVICTION, BLIP_DECAY
+
+
+class BlipBuffer:
+    """
+    Fixed-capacity struct-of-arrays store for WWII blips. Live blips occupy
+    the first `count` slots of each array; age() decays them all in one
+    vectorized step and compacts the survivors in place, so no per-blip
+    objects are allocated per frame.
+
+    When full, eviction decides what happens to new blips: 'oldest' replaces
+    the oldest live blips, 'drop_new' discards the new ones.
+    """
+
+    def __init__(self, capacity=BLIP_CAPACITY, eviction=BLIP_EVICTION, decay=BLIP_DECAY):
+        if eviction not in ('oldest', 'drop_new'):
+            raise ValueError(f"Unknown blip eviction policy: {eviction}")
+        self.capacity = capacity
+        self.eviction = eviction
+        self.decay = decay
+        self.x = np.zeros(capacity, dtype=np.int32)
+        self.y = np.zeros(capacity, dtype=np.int32)
+        self.age = np.zeros(capacity, dtype=np.int32)
+        self.intensity = np.zeros(capacity, dtype=np.int16)
+        self.labels = np.empty(capacity, dtype=object)
+        self.count = 0
+        self.evicted = 0
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.labels[:self.count] = None
+        self.count = 0
+
+    def add(self, blips):
+        """blips: list of (x, y, label) entering at age 0 and full intensity"""
+        if not blips:
+            return
+        n = len(blips)
+        free = self.capacity - self.count
+
+        if n > free:
+            if self.eviction == 'drop_new':
+                self.evicted += n - free
+                blips = blips[:free]
+                n = free
+            else:
+                # reuse the slots of the oldest live blips for the overflow
+                overflow = min(n - free, self.count)
+                victims = np.argpartition(self.age[:self.count], self.count - overflow)[self.count - overflow:]
+                self.evicted += overflow
+                self._fill(victims, blips[:overflow])
+                blips = blips[overflow:]
+                n = min(len(blips), free)
+                blips = blips[:n]
+
+        if n:
+            slots = np.arange(self.count, self.count + n)
+            self._fill(slots, blips)
+            self.count += n
+
+    def _fill(self, slots, blips):
+        xs, ys, labels = zip(*blips)
+        self.x[slots] = xs
+        self.y[slots] = ys
+        self.age[slots] = 0
+        self.intensity[slots] = 255
+        self.labels[slots] = labels
+
+    def age_all(self, frames=1):
+        """Advance every blip by frames frames and drop the ones that faded out"""
+        n = self.count
+        if not n:
+            return
+        self.age[:n] += frames
+        np.subtract(self.intensity[:n], self.decay * frames, out=self.intensity[:n])
+
+        alive = self.intensity[:n] > 0
+        keep = np.flatnonzero(alive)
+        k = len(keep)
+        if k == n:
+            return
+        for arr in (self.x, self.y, self.age, self.intensity, self.labels):
+            arr[:k] = arr[keep]
+        self.labels[k:n] = None
+        self.count = k
+
+    def items(self):
+        """(x, y, age, intensity, label) for every live blip"""
+        n = self.count
+        return zip(self.x[:n].tolist(), self.y[:n].tolist(), self.age[:n].tolist(),
+                   self.intensity[:n].tolist(), self.labels[:n].tolist())
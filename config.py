@@ -5,15 +5,52 @@ RADAR_CENTER = (os.environ.get("LAT"), os.environ.get("LONG"))
 
 FLIGHT_DATA_URL = os.environ.get("PIAWARE")
 
+# Several receivers merged into one picture, e.g. PIAWARE_URLS=http://pi1/...,http://pi2/...
+FLIGHT_DATA_URLS = [url for url in os.environ.get("PIAWARE_URLS", "").split(",") if url]
+
+# Optional push feed instead of polling, e.g. PIAWARE_STREAM=piaware.local:30003
+FLIGHT_DATA_STREAM = os.environ.get("PIAWARE_STREAM")
+FLIGHT_DATA_STREAM_FORMAT = os.environ.get("PIAWARE_STREAM_FORMAT", "sbs")
+
+# Record every snapshot to a log (RADAR_RECORD=capture.rlog), or replay one instead
+# of polling the receiver (PIAWARE_REPLAY=capture.rlog, speed 0 = as fast as possible)
+RECORD_PATH = os.environ.get("RADAR_RECORD")
+REPLAY_PATH = os.environ.get("PIAWARE_REPLAY")
+REPLAY_SPEED = float(os.environ.get("PIAWARE_REPLAY_SPEED", "1"))
+
 
 DISPLAY_WIDTH = 800
 DISPLAY_HEIGHT = 800
+# Several views over one feed, e.g. RADAR_VIEWS="overview:250;approach:40@37.6189,-122.375"
+# (name:range_km, optionally @lat,lon; RADAR_CENTER otherwise), tiled left to
+# right at VIEW_WIDTH x VIEW_HEIGHT each. Unset runs the single display.
+RADAR_VIEWS = [view for view in os.environ.get("RADAR_VIEWS", "").split(";") if view.strip()]
+VIEW_WIDTH = 640
+VIEW_HEIGHT = 640
 FPS = 60
+# Frame rate once nothing has changed (no input, no aircraft appearing or
+# leaving) for IDLE_AFTER seconds; rendering stops while the window is hidden
+IDLE_FPS = 15
+IDLE_AFTER = 10
+PAUSE_WHEN_UNFOCUSED = True
+PAUSED_EVENT_RATE = 4
 
 
 SWEEP_SPEED = 3 
+SWEEP_DEGREES_PER_SECOND = SWEEP_SPEED * FPS
+# Modern mode draws the sweep from pre-rendered wedge sprites, one per
+# SWEEP_SPRITE_STEP degrees per zoom level, kept within SWEEP_SPRITE_CACHE_MB.
+# WWII mode paints it into a phosphor layer that fades to 1/e in PHOSPHOR_DECAY seconds
+SWEEP_SPRITE_STEP = 3.0
+SWEEP_TRAIL_DEGREES = 30
+SWEEP_SPRITE_CACHE_MB = 32
+PHOSPHOR_DECAY = 0.35
 RANGE_RINGS = 5 
 MAX_RANGE_KM = 250 
+SWEEP_INDEX_BUCKET_DEGREES = 1.0
+BLIP_CAPACITY = 4096
+BLIP_EVICTION = 'oldest'
+BLIP_DECAY = 12
 
 
 COLORS = {
@@ -25,5 +62,66 @@ COLORS = {
     'YELLOW': (255, 255, 0)
 }
 
-FLIGHT_DATA_UPDATE_INTERVAL = 0.3 
+TEXT_CACHE_SIZE = 512
+TEXT_CACHE_INTENSITY_LEVELS = 16
+
+PRINT_AIRCRAFT_UPDATES = True
+
+FLIGHT_DATA_UPDATE_INTERVAL = 1.0 
+FLIGHT_DATA_TIMEOUT = 2
+FLIGHT_DATA_BACKOFF_MAX = 30
+# Poll less often while the feed isn't changing: after FLIGHT_DATA_IDLE_AFTER
+# unchanged polls the interval doubles per poll up to FLIGHT_DATA_IDLE_INTERVAL
+FLIGHT_DATA_IDLE_AFTER = 3
+FLIGHT_DATA_IDLE_INTERVAL = 8
+STREAM_PUBLISH_INTERVAL = 0.5
+STREAM_MAX_AGE = 60
+STREAM_CPR_MAX_GAP = 10
+AGGREGATOR_MAX_STALENESS = 10
+STATE_MAX_AGE = 60
+# Decode, diff and project polled payloads in a worker process (RADAR_DECODE_PROCESS=1);
+# changed rows come back through shared memory, DECODE_WORKER_CAPACITY rows per slot
+DECODE_IN_PROCESS = os.environ.get("RADAR_DECODE_PROCESS") == "1"
+DECODE_WORKER_SLOTS = 2
+DECODE_WORKER_CAPACITY = 16384
+
+# Rewind: the last HISTORY_MINUTES of projected traffic kept within HISTORY_MEMORY_MB,
+# a keyframe every HISTORY_CHUNK_FRAMES updates; arrow keys scrub HISTORY_SCRUB_SECONDS
+HISTORY_MINUTES = 60
+HISTORY_MEMORY_MB = 32
+HISTORY_CHUNK_FRAMES = 64
+HISTORY_SCRUB_SECONDS = 10
+
+# Dead reckoning between fixes (seconds, meters)
+MOTION_MAX_EXTRAPOLATION = 15
+MOTION_RECONCILE_TIME = 0.75
+MOTION_SNAP_DISTANCE = 5000
 RADAR_UPDATE_INTERVAL = 1.0 / FPS 
+
+# Instrumentation (I toggles the on-screen profiler at runtime)
+PROFILER_ENABLED = os.environ.get("RADAR_PROFILE") == "1"
+PROFILER_WINDOW = 600
+METRICS_PORT = int(os.environ["RADAR_METRICS_PORT"]) if os.environ.get("RADAR_METRICS_PORT") else None
+METRICS_CSV = os.environ.get("RADAR_METRICS_CSV")
+METRICS_CSV_INTERVAL = 10
+
+# Headless mode: render offscreen and serve frames over HTTP (MJPEG, JPEG/PNG snapshots)
+HEADLESS = os.environ.get("RADAR_HEADLESS") == "1"
+FRAME_SERVER_HOST = os.environ.get("RADAR_SERVE_HOST", "127.0.0.1")
+FRAME_SERVER_PORT = int(os.environ.get("RADAR_SERVE_PORT", "8000"))
+FRAME_SERVER_FPS = 15
+FRAME_SERVER_CLIENT_FPS = 15
+FRAME_SERVER_CLIENT_QUEUE = 2
+FRAME_SERVER_WORKERS = 2
+
+LABEL_GRID_CELL = 8
+LABEL_CULL_MARGIN = 16
+LABEL_BUCKET_SIZE = (48, 16)
+
+# Aircraft trails: points per trail, seconds between points, total memory for all trails
+TRAILS_ENABLED = True
+TRAIL_LENGTH = 32
+TRAIL_POINT_INTERVAL = 2.0
+TRAIL_MAX_AGE = 120
+TRAIL_MEMORY_MB = 4
+TRAIL_FADE_LEVELS = 4
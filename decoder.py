@@ -0,0 +1,229 @@
+import math
+import multiprocessing
+import time
+from multiprocessing import shared_memory
+from threading import Lock
+import numpy as np
+from config import DECODE_WORKER_SLOTS, DECODE_WORKER_CAPACITY
+
+# One changed aircraft as written by the worker. Unknown track, speed and
+# position time are NaN; visible is False when the aircraft has no position
+# or is out of range.
+ROW = np.dtype([
+    ('hex', 'S16'),
+    ('label', 'S12'),
+    ('x', 'f8'),
+    ('y', 'f8'),
+    ('position_time', 'f8'),
+    ('track', 'f4'),
+    ('gs', 'f4'),
+    ('visible', '?'),
+])
+
+
+def _nan_if_none(value):
+    return math.nan if value is None else value
+
+
+def _worker_main(conn, shm_name, slots, capacity, radar_center, max_range_km, verbose, scale_factor,
+                 record_path=None):
+    """
+    Worker process loop: payload bytes in, (slot, n, n_added, removed, timestamp,
+    inline, seconds) out. Rows go into the next shared memory slot, or inline
+    as bytes when more than capacity aircraft changed at once. With
+    record_path, every decoded snapshot is also appended to that log.
+    """
+    from get_data import Calculations, json_loads, print_aircraft_updates
+    from recording import Recorder
+    from state import AircraftStore
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    buffers = np.ndarray((slots, capacity), dtype=ROW, buffer=shm.buf)
+    store = AircraftStore()
+    recorder = Recorder(record_path, radar_center) if record_path else None
+    slot = 0
+    try:
+        while True:
+            try:
+                payload = conn.recv_bytes()
+            except EOFError:
+                break
+            if not payload:
+                break
+            start = time.perf_counter()
+            try:
+                aircraft = json_loads(payload).get('aircraft', [])
+            except ValueError as e:
+                conn.send(('error', str(e)))
+                continue
+
+            if recorder is not None:
+                recorder.record(aircraft)
+            delta = store.update(aircraft)
+            changed = delta.added + delta.updated
+            coords = Calculations.project_records(changed, radar_center, max_range_km)
+            n = len(changed)
+            inline = n > capacity
+            rows = np.zeros(n, dtype=ROW) if inline else buffers[slot, :n]
+            rows['hex'] = [r.hex.encode('ascii', 'replace') for r in changed]
+            rows['label'] = [r.label.encode('ascii', 'replace') for r in changed]
+            rows['visible'] = [xy is not None for xy in coords]
+            rows['x'] = [xy[0] if xy else 0.0 for xy in coords]
+            rows['y'] = [xy[1] if xy else 0.0 for xy in coords]
+            rows['position_time'] = [_nan_if_none(r.position_time) for r in changed]
+            rows['track'] = [_nan_if_none(r.track) for r in changed]
+            rows['gs'] = [_nan_if_none(r.gs) for r in changed]
+
+            conn.send((None if inline else slot, n, len(delta.added), [r.hex for r in delta.removed],
+                       delta.timestamp, rows.tobytes() if inline else None, time.perf_counter() - start))
+            if not inline:
+                slot = (slot + 1) % slots
+            if verbose:
+                print_aircraft_updates(delta, changed, coords, scale_factor, len(store))
+    finally:
+        if recorder is not None:
+            recorder.close()
+        del buffers
+        shm.close()
+        conn.close()
+
+
+class ProjectedDelta:
+    """
+    One update from DecodeWorker: the changed aircraft as ROW records, the
+    first n_added of them new, plus the hex codes of removed aircraft. rows
+    is a view of shared memory and stays valid until the worker has
+    answered `slots` more payloads.
+    """
+
+    __slots__ = ('rows', 'n_added', 'removed', 'timestamp')
+
+    def __init__(self, rows, n_added, removed, timestamp):
+        self.rows = rows
+        self.n_added = n_added
+        self.removed = removed
+        self.timestamp = timestamp
+
+    def __bool__(self):
+        return bool(len(self.rows) or self.removed)
+
+    def __repr__(self):
+        n = len(self.rows)
+        return f"ProjectedDelta(+{self.n_added} ~{n - self.n_added} -{len(self.removed)})"
+
+    def changes(self):
+        """(hex, label, (x, y) or None, position_time, track, gs) per changed aircraft, None for unknowns"""
+        rows = self.rows
+        out = []
+        for icao, label, x, y, position_time, track, gs, visible in zip(
+                rows['hex'].tolist(), rows['label'].tolist(), rows['x'].tolist(), rows['y'].tolist(),
+                rows['position_time'].tolist(), rows['track'].tolist(), rows['gs'].tolist(),
+                rows['visible'].tolist()):
+            out.append((icao.decode(), label.decode(), (x, y) if visible else None,
+                        None if position_time != position_time else position_time,
+                        None if track != track else track,
+                        None if gs != gs else gs))
+        return out
+
+
+class DecodeWorker:
+    """
+    Decodes, diffs and projects aircraft.json payloads in a separate
+    process, so JSON parsing and the per-aircraft state update never hold
+    this process's GIL while the display is rendering. The worker owns its
+    own AircraftStore and writes only the changed aircraft into a shared
+    memory slot; decode() blocks the calling (ingest) thread without the
+    GIL until the rows are ready and returns a ProjectedDelta over them.
+
+    Only deltas come back. Recording therefore happens in the worker
+    (record_path), since a recording.Recorder subscribed here would need
+    every payload decoded again in this process.
+
+    If the worker dies, restart() starts a fresh one with an empty
+    AircraftStore. Its recording goes to a new file (capture.1.rlog, ...)
+    rather than overwriting the one the dead worker left behind.
+    """
+
+    def __init__(self, radar_center, max_range_km=None, verbose=False, scale_factor=1.0,
+                 slots=DECODE_WORKER_SLOTS, capacity=DECODE_WORKER_CAPACITY, record_path=None):
+        self.lock = Lock()
+        self.shm = shared_memory.SharedMemory(create=True, size=slots * capacity * ROW.itemsize)
+        self.buffers = np.ndarray((slots, capacity), dtype=ROW, buffer=self.shm.buf)
+        self.args = (self.shm.name, slots, capacity, radar_center, max_range_km, verbose, scale_factor)
+        self.record_path = record_path
+        self.stats = {
+            'payloads': 0,
+            'rows': 0,
+            'inline': 0,
+            'seconds': 0.0,
+            'restarts': 0,
+        }
+        self._spawn(record_path)
+
+    def _spawn(self, record_path):
+        context = multiprocessing.get_context('spawn')
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, name='radar-decode', daemon=True,
+                                       args=(child_conn,) + self.args + (record_path,))
+        self.process.start()
+        child_conn.close()
+
+    def restart(self):
+        """Replace a dead (or wedged) worker process with a fresh one"""
+        with self.lock:
+            self.conn.close()
+            if self.process.is_alive():
+                self.process.terminate()
+            self.process.join()
+            self.stats['restarts'] += 1
+            record_path = self.record_path
+            if record_path:
+                stem, dot, ext = record_path.rpartition('.')
+                suffix = f"{self.stats['restarts']}"
+                record_path = f"{stem}.{suffix}.{ext}" if dot else f"{record_path}.{suffix}"
+            self._spawn(record_path)
+
+    def decode(self, payload):
+        """ProjectedDelta for payload; raises ValueError on malformed JSON or a dead worker"""
+        with self.lock:
+            try:
+                self.conn.send_bytes(payload)
+                reply = self.conn.recv()
+            except (EOFError, OSError) as e:
+                raise ValueError(f"decode worker unavailable: {e}") from e
+        if reply[0] == 'error':
+            raise ValueError(reply[1])
+        slot, n, n_added, removed, timestamp, inline, seconds = reply
+        if inline is not None:
+            rows = np.frombuffer(inline, dtype=ROW)
+            self.stats['inline'] += 1
+        else:
+            rows = self.buffers[slot, :n]
+        self.stats['payloads'] += 1
+        self.stats['rows'] += n
+        self.stats['seconds'] += seconds
+        return ProjectedDelta(rows, n_added, removed, timestamp)
+
+    def gauges(self):
+        """Counters for the metrics endpoint"""
+        gauges = {f'decode_worker_{name}': value for name, value in self.stats.items()}
+        gauges['decode_worker_alive'] = int(self.process.is_alive())
+        return gauges
+
+    def close(self):
+        with self.lock:
+            try:
+                self.conn.send_bytes(b'')
+            except OSError:
+                pass
+            self.process.join(timeout=2)
+            if self.process.is_alive():
+                self.process.terminate()
+                self.process.join()
+            self.conn.close()
+        del self.buffers
+        try:
+            self.shm.close()
+        except BufferError:
+            pass  # a ProjectedDelta still holds a view; the mapping goes when it does
+        self.shm.unlink()
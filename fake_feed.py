@@ -0,0 +1,104 @@
+"""
+Local stand-in for dump1090's SBS (30003) and Beast (30005) TCP outputs.
+Replays canned messages to every client so the stream parsers and the
+reconnect logic in StreamingFlightData can be exercised without a receiver.
+
+    python fake_feed.py --format beast --port 30005
+"""
+import argparse
+import socket
+import time
+from threading import Thread, Event
+from stream import beast_frame
+
+SAMPLE_SBS = [
+    b"MSG,1,1,1,A1B2C3,1,2024/01/01,12:00:00.000,2024/01/01,12:00:00.000,UAL123,,,,,,,,,,,0\r\n",
+    b"MSG,3,1,1,A1B2C3,1,2024/01/01,12:00:00.100,2024/01/01,12:00:00.100,,35000,,,37.6213,-122.3790,,,0,0,0,0\r\n",
+    b"MSG,4,1,1,A1B2C3,1,2024/01/01,12:00:00.200,2024/01/01,12:00:00.200,,,450,275.0,,,-64,,,,,0\r\n",
+    b"MSG,1,1,1,C0FFEE,1,2024/01/01,12:00:00.300,2024/01/01,12:00:00.300,SWA456,,,,,,,,,,,0\r\n",
+    b"MSG,3,1,1,C0FFEE,1,2024/01/01,12:00:00.400,2024/01/01,12:00:00.400,,12000,,,37.3639,-121.9289,,,0,0,0,0\r\n",
+    b"MSG,4,1,1,C0FFEE,1,2024/01/01,12:00:00.500,2024/01/01,12:00:00.500,,,280,140.0,,,1200,,,,,0\r\n",
+    b"MSG,8,1,1,ABCDEF,1,2024/01/01,12:00:00.600,2024/01/01,12:00:00.600,,,,,,,,,,,,0\r\n",
+]
+
+# DF17 identification, even/odd airborne position and velocity messages
+SAMPLE_BEAST = [beast_frame(bytes.fromhex(msg), timestamp=i) for i, msg in enumerate([
+    "8D4840D6202CC371C32CE0576098",
+    "8D40621D58C382D690C8AC2863A7",
+    "8D40621D58C386435CC412692AD6",
+    "8D485020994409940838175B284F",
+])]
+
+
+class FakeFeedServer:
+    """
+    Serves messages to each connecting client, message_interval seconds apart.
+    With close_after set, the connection is dropped after that many messages
+    so clients have to reconnect; with loop set, the messages repeat forever.
+    """
+
+    def __init__(self, messages, host='127.0.0.1', port=0, message_interval=0.0,
+                 loop=False, close_after=None):
+        self.messages = list(messages)
+        self.message_interval = message_interval
+        self.loop = loop
+        self.close_after = close_after
+        self.connections = 0
+        self.stop_event = Event()
+
+        self.sock = socket.create_server((host, port))
+        self.sock.settimeout(0.2)
+        self.host, self.port = self.sock.getsockname()[:2]
+        self.thread = Thread(target=self._serve, daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def _serve(self):
+        while not self.stop_event.is_set():
+            try:
+                conn, _ = self.sock.accept()
+            except socket.timeout:
+                continue
+            self.connections += 1
+            Thread(target=self._replay, args=(conn,), daemon=True).start()
+
+    def _replay(self, conn):
+        sent = 0
+        with conn:
+            try:
+                while not self.stop_event.is_set():
+                    for message in self.messages:
+                        conn.sendall(message)
+                        sent += 1
+                        if self.close_after is not None and sent >= self.close_after:
+                            return
+                        if self.message_interval:
+                            time.sleep(self.message_interval)
+                    if not self.loop:
+                        # keep the connection open like a quiet receiver would
+                        self.stop_event.wait()
+            except OSError:
+                pass
+
+    def stop(self):
+        self.stop_event.set()
+        self.thread.join()
+        self.sock.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay canned dump1090 messages over TCP")
+    parser.add_argument('--format', choices=['sbs', 'beast'], default='sbs')
+    parser.add_argument('--port', type=int, default=30003)
+    parser.add_argument('--interval', type=float, default=0.2, help="seconds between messages")
+    args = parser.parse_args()
+
+    messages = SAMPLE_BEAST if args.format == 'beast' else SAMPLE_SBS
+    server = FakeFeedServer(messages, port=args.port, message_interval=args.interval, loop=True).start()
+    print(f"Serving {args.format} feed on {server.host}:{server.port}")
+    try:
+        server.thread.join()
+    except KeyboardInterrupt:
+        server.stop()
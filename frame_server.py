@@ -0,0 +1,292 @@
+import io
+import math
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread, Lock, Condition
+from urllib.parse import urlsplit, parse_qs
+import pygame
+from metrics import PROFILER
+from config import (FRAME_SERVER_FPS, FRAME_SERVER_CLIENT_FPS, FRAME_SERVER_CLIENT_QUEUE,
+                    FRAME_SERVER_WORKERS)
+
+BOUNDARY = 'radarframe'
+
+INDEX_PAGE = b"""<!doctype html>
+<html><head><title>Radar</title>
+<style>body{margin:0;background:#000}img{display:block;margin:auto;max-width:100vw;max-height:100vh}</style>
+</head><body><img src="/stream.mjpg"></body></html>
+"""
+
+
+def encode_surface(surface, fmt):
+    """Encode a pygame surface as 'jpg' or 'png' bytes"""
+    buf = io.BytesIO()
+    pygame.image.save(surface, buf, f"frame.{fmt}")
+    return buf.getvalue()
+
+
+class Frame:
+    __slots__ = ('seq', 'timestamp', 'jpeg')
+
+    def __init__(self, seq, timestamp, jpeg):
+        self.seq = seq
+        self.timestamp = timestamp
+        self.jpeg = jpeg
+
+
+class FrameClient:
+    """
+    One MJPEG viewer. Encoded frames are queued by reference; when the
+    viewer can't keep up the queue drops its oldest frame, and the viewer
+    never gets more than max_fps frames per second.
+    """
+
+    def __init__(self, address, max_fps, queue_size):
+        self.address = address
+        self.max_fps = max_fps
+        self.queue = deque(maxlen=queue_size)
+        self.ready = Condition()
+        self.sent = 0
+        self.dropped = 0
+        self.closed = False
+
+    def offer(self, frame):
+        with self.ready:
+            if len(self.queue) == self.queue.maxlen:
+                self.dropped += 1
+            self.queue.append(frame)
+            self.ready.notify()
+
+    def next_frame(self, timeout=1.0):
+        with self.ready:
+            if not self.queue and not self.closed:
+                self.ready.wait(timeout)
+            return self.queue.popleft() if self.queue else None
+
+    def close(self):
+        with self.ready:
+            self.closed = True
+            self.ready.notify()
+
+
+class FrameServer:
+    """
+    Serves rendered frames over HTTP for remote viewers:
+
+        /              page showing the stream
+        /stream.mjpg   MJPEG stream (?fps=N caps this viewer below the default)
+        /frame.jpg     latest frame (the streamed JPEG, or encoded on request)
+        /frame.png     latest frame as PNG, encoded on request
+
+    publish() is called from the render loop with the screen surface, at
+    most fps times a second. It copies the surface and, while an MJPEG
+    viewer is connected, hands the copy to a worker pool for JPEG encoding
+    if a worker is free, so rendering never waits on encoding. Every viewer
+    gets a reference to the same encoded frame. With no viewers nothing is
+    encoded until a still frame is requested.
+    """
+
+    def __init__(self, port, host='127.0.0.1', fps=FRAME_SERVER_FPS, client_fps=FRAME_SERVER_CLIENT_FPS,
+                 client_queue=FRAME_SERVER_CLIENT_QUEUE, workers=FRAME_SERVER_WORKERS):
+        self.fps = fps
+        self.client_fps = client_fps
+        self.client_queue = client_queue
+        self.workers = workers
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='frame-encode')
+        self.lock = Lock()
+        self.clients = []
+        self.in_flight = 0
+        self.seq = 0
+        self.last_publish = 0.0
+        self.latest = None
+        self.latest_surface = None
+        self.on_demand = {'png': (None, None), 'jpg': (None, None)}
+        self.stats = {
+            'frames_encoded': 0,
+            'frames_skipped': 0,
+            'png_encoded': 0,
+            'jpeg_on_demand': 0,
+            'bytes_encoded': 0,
+        }
+
+        outer = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlsplit(self.path)
+                if url.path == '/':
+                    self.send_body(INDEX_PAGE, 'text/html')
+                elif url.path == '/stream.mjpg':
+                    try:
+                        fps = outer.client_rate(parse_qs(url.query).get('fps', [None])[0])
+                    except ValueError:
+                        self.send_error(400, "fps must be a positive number")
+                        return
+                    outer.stream(self, fps)
+                elif url.path in ('/frame.jpg', '/frame.png'):
+                    body = outer.latest_png() if url.path.endswith('png') else outer.latest_jpeg()
+                    if body is None:
+                        self.send_error(503, "No frame rendered yet")
+                    else:
+                        self.send_body(body, 'image/png' if url.path.endswith('png') else 'image/jpeg')
+                else:
+                    self.send_error(404)
+
+            def send_body(self, body, content_type):
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.send_header('Cache-Control', 'no-store')
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        self.thread = Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        print(f"[FrameServer] Serving radar frames on http://{host}:{self.port}/")
+
+    def publish(self, surface, now=None):
+        """
+        Keep a copy of surface if a frame is due, and queue it for encoding
+        when someone is streaming and a worker is free. Never blocks.
+        """
+        now = time.perf_counter() if now is None else now
+        if now - self.last_publish < 1.0 / self.fps:
+            return False
+        with self.lock:
+            streaming = bool(self.clients)
+            if streaming and self.in_flight >= self.workers:
+                self.stats['frames_skipped'] += 1
+                return False
+            if streaming:
+                self.in_flight += 1
+            self.seq += 1
+            seq = self.seq
+        self.last_publish = now
+        copy = surface.copy()
+        self.latest_surface = (seq, copy)
+        if streaming:
+            self.pool.submit(self._encode, seq, copy, time.time())
+        return True
+
+    def _encode(self, seq, surface, timestamp):
+        try:
+            with PROFILER.timer('encode_jpeg'):
+                jpeg = encode_surface(surface, 'jpg')
+        except Exception as e:
+            print(f"[FrameServer ERROR] {e}")
+            return
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+        frame = Frame(seq, timestamp, jpeg)
+        with self.lock:
+            # encodes can finish out of order; never replace a newer frame
+            if self.latest is not None and self.latest.seq > seq:
+                return
+            self.latest = frame
+            self.stats['frames_encoded'] += 1
+            self.stats['bytes_encoded'] += len(jpeg)
+            clients = list(self.clients)
+        for client in clients:
+            client.offer(frame)
+
+    def latest_jpeg(self):
+        """The streamed JPEG while viewers keep it current, otherwise the latest frame encoded on request"""
+        frame = self.latest
+        if frame is not None and self.clients:
+            return frame.jpeg
+        return self._encode_latest('jpg', 'jpeg_on_demand')
+
+    def latest_png(self):
+        return self._encode_latest('png', 'png_encoded')
+
+    def _encode_latest(self, fmt, counter):
+        """The most recent frame as fmt; concurrent requests for the same frame share one encode"""
+        latest = self.latest_surface
+        if latest is None:
+            return None
+        seq, surface = latest
+        with self.lock:
+            cached_seq, future = self.on_demand[fmt]
+            if cached_seq != seq:
+                future = self.pool.submit(encode_surface, surface, fmt)
+                self.on_demand[fmt] = (seq, future)
+                self.stats[counter] += 1
+        return future.result()
+
+    def client_rate(self, text):
+        """
+        Frame rate for a viewer asking for ?fps=text, at most client_fps.
+        Raises ValueError unless text is empty or a positive number.
+        """
+        if not text:
+            return self.client_fps
+        fps = float(text)
+        if not 0 < fps < math.inf:
+            raise ValueError(f"bad fps {text!r}")
+        return min(fps, self.client_fps)
+
+    def stream(self, handler, fps=None):
+        """Write multipart JPEG frames to one viewer until it disconnects"""
+        max_fps = min(fps, self.client_fps) if fps and fps > 0 else self.client_fps
+        client = FrameClient(handler.client_address[0], max_fps, self.client_queue)
+        with self.lock:
+            self.clients.append(client)
+            if self.latest is not None:
+                client.offer(self.latest)
+
+        handler.send_response(200)
+        handler.send_header('Content-Type', f'multipart/x-mixed-replace; boundary={BOUNDARY}')
+        handler.send_header('Cache-Control', 'no-store')
+        handler.end_headers()
+        next_due = 0.0
+        try:
+            while not client.closed:
+                delay = next_due - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                frame = client.next_frame()
+                if frame is None:
+                    continue
+                handler.wfile.write(f"--{BOUNDARY}\r\nContent-Type: image/jpeg\r\n"
+                                    f"Content-Length: {len(frame.jpeg)}\r\n\r\n".encode())
+                handler.wfile.write(frame.jpeg)
+                handler.wfile.write(b"\r\n")
+                client.sent += 1
+                next_due = time.perf_counter() + 1.0 / client.max_fps
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            with self.lock:
+                self.clients.remove(client)
+
+    def client_stats(self):
+        with self.lock:
+            return [{'address': c.address, 'max_fps': c.max_fps, 'sent': c.sent, 'dropped': c.dropped}
+                    for c in self.clients]
+
+    def gauges(self):
+        """Counters for the metrics endpoint"""
+        with self.lock:
+            gauges = {f'frame_server_{name}': value for name, value in self.stats.items()}
+            gauges['frame_server_clients'] = len(self.clients)
+            gauges['frame_server_client_drops'] = sum(c.dropped for c in self.clients)
+        return gauges
+
+    def stop(self):
+        with self.lock:
+            clients = list(self.clients)
+        for client in clients:
+            client.close()
+        self.server.shutdown()
+        self.server.server_close()
+        self.pool.shutdown(wait=True)
@@ -1,46 +1,245 @@
+import json
+import random
+import re
 import requests
 import time
-from threading import Thread, Lock
-from config import FLIGHT_DATA_URL
+from requests.adapters import HTTPAdapter
+from threading import Thread, Lock, Event
+from config import (FLIGHT_DATA_URL, FLIGHT_DATA_TIMEOUT, FLIGHT_DATA_BACKOFF_MAX,
+                    FLIGHT_DATA_IDLE_AFTER, FLIGHT_DATA_IDLE_INTERVAL)
+from state import AircraftStore
+from metrics import PROFILER
+
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:  # the standard library decoder works, just slower on big payloads
+    json_loads = json.loads
 
 URL = FLIGHT_DATA_URL
 
+# dump1090 writes "now" as the first key of aircraft.json, so it can be read
+# from the head of the payload without decoding the whole document
+NOW_PATTERN = re.compile(rb'"now"\s*:\s*([0-9.]+)')
+
 class FlightData:
-    def __init__(self, update_interval=1.0):
+    def __init__(self, update_interval=1.0, url=None, autostart=True, decoder=None):
         self.data = []
         self.lock = Lock()
         self.subscribers = []          
+        self.delta_subscribers = []
+        self.store = AircraftStore()
         self.update_interval = update_interval
+        self.url = url or URL
+        self.decoder = decoder
+        
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=2)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.etag = None
+        self.last_modified = None
+        self.last_now = None
+        self.failures = 0
+        self.unchanged_polls = 0
+        self.stats = {
+            'fetches': 0,
+            'bytes_fetched': 0,
+            'not_modified': 0,
+            'skipped_parses': 0,
+            'errors': 0,
+            'last_latency': 0.0,
+            'total_latency': 0.0,
+        }
+        
+        self.running = False
+        self.stop_event = Event()
+        self.poll_event = Event()
+        self.thread = None
+        if autostart:
+            self.start()
+
+    def start(self):
         self.running = True
+        self.stop_event.clear()
+        self.poll_event.clear()
         self.thread = Thread(target=self._run, daemon=True)
         self.thread.start()
 
     def _run(self):
         while self.running:
-            self.update_data()
-            time.sleep(self.update_interval)
+            started = time.monotonic()
+            ok = self.update_data()
+            self.poll_event.wait(self._next_delay(ok))
+            self.poll_event.clear()
+            # woken early by poll_now: still never poll more often than update_interval
+            rest = started + self.update_interval - time.monotonic()
+            if rest > 0:
+                self.stop_event.wait(rest)
+
+    def _next_delay(self, ok):
+        """
+        Normal poll interval on success, stretched while nothing changes;
+        exponential backoff with jitter on errors
+        """
+        if ok:
+            self.failures = 0
+            return self.poll_interval()
+        self.failures += 1
+        delay = min(FLIGHT_DATA_BACKOFF_MAX, self.update_interval * 2 ** self.failures)
+        return delay * random.uniform(0.5, 1.0)
 
     def update_data(self):
+        """
+        Fetch and publish one snapshot. Returns False if the fetch failed, or
+        the payload couldn't be decoded, or a subscriber raised.
+        """
         try:
-            r = requests.get(URL, timeout=2)
-            r.raise_for_status()
-            with self.lock:
-                self.data = r.json().get('aircraft', [])
-                snapshot = list(self.data) 
+            payload = self._fetch()
+            if payload is not None:
+                self._ingest(payload)
+        except Exception as e:
+            self.stats['errors'] += 1
+            # forget the validators so the next poll fetches and decodes a fresh copy
+            self.etag = self.last_modified = self.last_now = None
+            if self.failures == 0:
+                print(f"[FlightData ERROR] {e!r} (backing off)")
+            return False
+        
+        if self.failures:
+            print(f"[FlightData] Recovered after {self.failures} failed polls")
+        if payload is None:
+            self.unchanged_polls += 1
+        return True
+
+    def poll_interval(self):
+        """Seconds until the next poll after a successful one"""
+        idle_polls = self.unchanged_polls - FLIGHT_DATA_IDLE_AFTER
+        if idle_polls < 0:
+            return self.update_interval
+        return min(FLIGHT_DATA_IDLE_INTERVAL, self.update_interval * 2 ** (idle_polls + 1))
+
+    def poll_now(self):
+        """
+        User input: end an idle stretch and go back to the normal poll
+        interval. A backoff after errors is left alone, and the poll thread
+        still waits update_interval between polls, so bursts of input never
+        poll the receiver faster than usual.
+        """
+        self.unchanged_polls = 0
+        if not self.failures:
+            self.poll_event.set()
+
+    def _fetch(self):
+        """
+        Conditional GET on the pooled session.
+        Returns the raw payload, or None if the receiver hasn't written a new file.
+        """
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        
+        start = time.perf_counter()
+        with PROFILER.timer('fetch'):
+            r = self.session.get(self.url, headers=headers, timeout=FLIGHT_DATA_TIMEOUT)
+        latency = time.perf_counter() - start
+        self.stats['fetches'] += 1
+        self.stats['last_latency'] = latency
+        self.stats['total_latency'] += latency
+        
+        if r.status_code == 304:
+            self.stats['not_modified'] += 1
+            return None
+        r.raise_for_status()
+        
+        payload = r.content
+        self.stats['bytes_fetched'] += len(payload)
+        self.etag = r.headers.get('ETag')
+        self.last_modified = r.headers.get('Last-Modified')
+        
+        match = NOW_PATTERN.search(payload, 0, 256)
+        if match:
+            now = match.group(1)
+            if now == self.last_now:
+                self.stats['skipped_parses'] += 1
+                return None
+            self.last_now = now
+        return payload
 
+    def _ingest(self, payload):
+        if self.decoder is not None:
+            self._ingest_projected(payload)
+            return
+        with PROFILER.timer('decode'):
+            aircraft = json_loads(payload).get('aircraft', [])
+        with self.lock:
+            self.data = aircraft
+            snapshot = list(self.data) 
+        self._publish(snapshot)
 
+    def _ingest_projected(self, payload):
+        """
+        Hand the payload to the decoder process, which decodes, diffs and
+        projects it and returns a decoder.ProjectedDelta for delta subscribers.
+        Plain snapshot subscribers still get dicts, but that means decoding
+        the payload again here, on this process's GIL; the payload is only
+        decoded when one is attached. Record through the worker
+        (DecodeWorker record_path) instead of subscribing a Recorder.
+        Decode errors reach update_data like any other failed poll.
+        """
+        if not self.decoder.process.is_alive():
+            print(f"[FlightData ERROR] decode worker exited with code {self.decoder.process.exitcode}, restarting it")
+            self.decoder.restart()
+        with PROFILER.timer('decode_worker'):
+            delta = self.decoder.decode(payload)
+        self.unchanged_polls = 0 if delta else self.unchanged_polls + 1
+        if self.subscribers:
+            aircraft = json_loads(payload).get('aircraft', [])
+            with self.lock:
+                self.data = aircraft
             for callback in self.subscribers:
-                callback(snapshot)
-        except Exception as e:
-            print(f"[FlightData ERROR] {e}")
+                callback(list(aircraft))
+        for callback in self.delta_subscribers:
+            callback(delta)
+
+    def _publish(self, snapshot):
+        for callback in self.subscribers:
+            callback(snapshot)
+        if self.delta_subscribers:
+            with PROFILER.timer('state_update'):
+                delta = self.store.update(snapshot)
+            self.unchanged_polls = 0 if delta else self.unchanged_polls + 1
+            for callback in self.delta_subscribers:
+                callback(delta)
+        else:
+            self.unchanged_polls = 0
+
+    def fetch_stats(self):
+        """Copy of the fetch counters with the mean fetch latency added"""
+        stats = dict(self.stats)
+        stats['avg_latency'] = stats['total_latency'] / stats['fetches'] if stats['fetches'] else 0.0
+        return stats
+
+    def gauges(self):
+        """Extra per-feed gauges for the metrics endpoint; a single receiver has none beyond fetch_stats()"""
+        return {}
 
     def subscribe(self, callback):
         """Add a callable that will be called with the latest snapshot"""
         self.subscribers.append(callback)
 
+    def subscribe_deltas(self, callback):
+        """Add a callable that will be called with a state.Delta after every snapshot"""
+        self.delta_subscribers.append(callback)
+
     def stop(self):
         self.running = False
-        self.thread.join()
+        self.stop_event.set()
+        self.poll_event.set()
+        if self.thread is not None:
+            self.thread.join()
 
     def print_data(self):
         with self.lock:
@@ -53,6 +252,13 @@ class FlightData:
 
 import math
 
+try:
+    import numpy as np
+except ImportError:  # scalar fallback below still works without numpy
+    np = None
+
+EARTH_RADIUS_M = 6371000
+
 class Calculations:
     @staticmethod
     def to_radar_coords(aircraft, radar_center=(37.4866, -122.16382)):
@@ -75,7 +281,7 @@ class Calculations:
              math.cos(lat1_rad) * math.cos(lat2_rad) * 
              math.sin(delta_lon / 2) ** 2)
         c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-        distance = 6371000 * c  
+        distance = EARTH_RADIUS_M * c  
         
         # Calculate bearing
         y = math.sin(delta_lon) * math.cos(lat2_rad)
@@ -90,14 +296,144 @@ class Calculations:
         return (radar_x, radar_y)
 
     @staticmethod
-    def process_aircraft(snapshot, radar_center=(37.4866, -122.16382)):
+    def project_batch(snapshot, radar_center=(37.4866, -122.16382), max_range_km=None):
+        """
+        Project a whole snapshot in one vectorized pass.
+        Returns a dict of arrays: x, y, range (meters), bearing (degrees from north),
+        plus 'mask' marking aircraft that have a position and are within max_range_km.
+        Center constants are computed once per call instead of once per aircraft.
+        """
+        n = len(snapshot)
+        lat = np.fromiter((ac.get('lat') for ac in snapshot), dtype=float, count=n)
+        lon = np.fromiter((ac.get('lon') for ac in snapshot), dtype=float, count=n)
+        return Calculations.project_arrays(lat, lon, radar_center, max_range_km)
+
+    @staticmethod
+    def project_arrays(lat, lon, radar_center=(37.4866, -122.16382), max_range_km=None):
+        """
+        Core of project_batch for callers that already hold lat/lon arrays
+        (NaN where the position is unknown)
+        """
+        center_lat = float(radar_center[0])
+        center_lon = float(radar_center[1])
+        lat1_rad = math.radians(center_lat)
+        sin_lat1 = math.sin(lat1_rad)
+        cos_lat1 = math.cos(lat1_rad)
+
+        lat2_rad = np.radians(lat)
+        delta_lat = np.radians(lat - center_lat)
+        delta_lon = np.radians(lon - center_lon)
+        cos_lat2 = np.cos(lat2_rad)
+
+        with np.errstate(invalid='ignore'):
+            a = np.sin(delta_lat / 2) ** 2 + cos_lat1 * cos_lat2 * np.sin(delta_lon / 2) ** 2
+            c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+            distance = EARTH_RADIUS_M * c
+
+            by = np.sin(delta_lon) * cos_lat2
+            bx = cos_lat1 * np.sin(lat2_rad) - sin_lat1 * cos_lat2 * np.cos(delta_lon)
+            bearing = np.arctan2(by, bx)
+
+            mask = ~np.isnan(distance)
+            if max_range_km is not None:
+                mask &= distance <= max_range_km * 1000
+
+        return {
+            'x': distance * np.sin(bearing),
+            'y': -distance * np.cos(bearing),
+            'range': distance,
+            'bearing': np.degrees(bearing) % 360,
+            'mask': mask,
+        }
+
+    @staticmethod
+    def process_aircraft(snapshot, radar_center=(37.4866, -122.16382), max_range_km=None):
         """
         Convert snapshot list to list of tuples (callsign, x, y)
+        Aircraft without a position, or beyond max_range_km when given, are dropped.
+        """
+        if np is None:
+            return Calculations.process_aircraft_scalar(snapshot, radar_center, max_range_km)
+
+        projected = Calculations.project_batch(snapshot, radar_center, max_range_km)
+        xs = projected['x'].tolist()
+        ys = projected['y'].tolist()
+        processed = []
+        for i in np.flatnonzero(projected['mask']).tolist():
+            callsign = snapshot[i].get('flight', 'UNKNOWN').strip()
+            processed.append((callsign, xs[i], ys[i]))
+        return processed
+
+    @staticmethod
+    def project_records(records, radar_center=(37.4866, -122.16382), max_range_km=None):
+        """
+        Project state.AircraftRecord objects. Returns a list aligned with
+        records holding (x, y), or None where the aircraft has no position or
+        is out of range.
+        """
+        if np is None:
+            max_range_m = max_range_km * 1000 if max_range_km is not None else None
+            coords = []
+            for record in records:
+                xy = Calculations.to_radar_coords({'lat': record.lat, 'lon': record.lon}, radar_center)
+                if xy and max_range_m is not None and math.hypot(*xy) > max_range_m:
+                    xy = None
+                coords.append(xy)
+            return coords
+
+        n = len(records)
+        lat = np.fromiter((r.lat for r in records), dtype=float, count=n)
+        lon = np.fromiter((r.lon for r in records), dtype=float, count=n)
+        projected = Calculations.project_arrays(lat, lon, radar_center, max_range_km)
+        mask = projected['mask'].tolist()
+        return [xy if ok else None
+                for xy, ok in zip(zip(projected['x'].tolist(), projected['y'].tolist()), mask)]
+
+    @staticmethod
+    def process_aircraft_scalar(snapshot, radar_center=(37.4866, -122.16382), max_range_km=None):
+        """
+        Pure Python version of process_aircraft, used when numpy is unavailable
         """
         processed = []
+        max_range_m = max_range_km * 1000 if max_range_km is not None else None
         for ac in snapshot:
             coords = Calculations.to_radar_coords(ac, radar_center)
             if coords:
+                if max_range_m is not None and math.hypot(*coords) > max_range_m:
+                    continue
                 callsign = ac.get('flight', 'UNKNOWN').strip()
                 processed.append((callsign, *coords))
         return processed
+
+
+def print_aircraft_updates(delta, changed, coords, scale_factor, total):
+    """
+    Console listing of one state.Delta: changed records with their
+    projected coordinates (None if out of range), then removed ones
+    """
+    print(f"\n=== Aircraft Update at {time.strftime('%H:%M:%S')} ===")
+    if delta:
+        for i, (record, radar_coords) in enumerate(zip(changed, coords)):
+            marker = "🆕" if i < len(delta.added) else "✈️ "
+            alt = record.altitude if record.altitude is not None else 'N/A'
+            speed = record.gs if record.gs is not None else 'N/A'
+            
+            if record.has_position():
+                if radar_coords:
+                    radar_x, radar_y = radar_coords
+                    distance_km = math.sqrt(radar_x**2 + radar_y**2) / 1000
+                    
+                    scaled_x = radar_x * scale_factor
+                    scaled_y = radar_y * scale_factor
+                    
+                    print(f"{marker} {record.label}: Lat {record.lat:.4f}, Lon {record.lon:.4f} | Raw Radar X={radar_x:.1f}m, Y={radar_y:.1f}m | Scaled X={scaled_x:.1f}, Y={scaled_y:.1f} | Distance: {distance_km:.1f}km | Alt {alt}, Speed {speed}")
+                else:
+                    print(f"{marker} {record.label}: Lat {record.lat:.4f}, Lon {record.lon:.4f} | Radar: Out of range | Alt {alt}, Speed {speed}")
+            else:
+                print(f"{marker} {record.label}: Position unavailable")
+        for record in delta.removed:
+            print(f"➖ {record.label}: Lost contact")
+    else:
+        print("No changes")
+    print(f"Total aircraft: {total}")
+    print("=" * 50)
@@ -0,0 +1,281 @@
+import sys
+from bisect import bisect_right
+from threading import Lock
+import numpy as np
+from config import HISTORY_MEMORY_MB, HISTORY_MINUTES, HISTORY_CHUNK_FRAMES
+
+
+def _delta_dtype(values):
+    """int16 when every delta fits, which it does for aircraft moving between polls"""
+    if not len(values) or (values.min() >= -32768 and values.max() <= 32767):
+        return np.int16
+    return np.int32
+
+
+class HistoryChunk:
+    """
+    One stretch of history: a keyframe holding the full state before the
+    first frame, then one delta per frame. A frame lists the aircraft that
+    moved (string id plus x/y change in meters from their previous
+    position, or from 0 when new), the ones whose label changed, and the
+    ones removed.
+
+    String ids index the chunk's own string table, which starts with the
+    hex codes and labels in the keyframe, so dropping a chunk drops the
+    strings only it used.
+
+    Frames are appended while the chunk is open; seal() packs them into
+    one array per column plus offsets. Appends only ever add past the
+    frames a reader has seen, so readers never need a lock.
+    """
+
+    COLUMNS = ('ids', 'dx', 'dy', 'relabel_ids', 'relabel_labels', 'removed')
+
+    def __init__(self, state=None):
+        self.strings = []
+        self.string_ids = {}
+        self.string_bytes = sys.getsizeof(self.strings) + sys.getsizeof(self.string_ids)
+        self.times = []
+        self.frames = []
+        self.columns = None
+        self.offsets = None
+        self.keyframe = None
+        if state is not None:
+            icaos = sorted(state)
+            values = [state[icao] for icao in icaos]
+            self.keyframe = (np.array([self.intern(icao) for icao in icaos], dtype=np.uint32),
+                             np.array([v[0] for v in values], dtype=np.int32),
+                             np.array([v[1] for v in values], dtype=np.int32),
+                             np.array([self.intern(v[2]) for v in values], dtype=np.uint32))
+
+    def intern(self, text):
+        sid = self.string_ids.get(text)
+        if sid is None:
+            sid = len(self.strings)
+            self.strings.append(text)
+            self.string_ids[text] = sid
+            # the string, its list slot and a dict entry; a rough figure, but one that grows with the table
+            self.string_bytes += sys.getsizeof(text) + 8 + 48
+        return sid
+
+    def __len__(self):
+        return len(self.times)
+
+    @property
+    def start(self):
+        return self.times[0]
+
+    @property
+    def end(self):
+        return self.times[-1]
+
+    def append(self, timestamp, frame):
+        # frame first: readers only look at frames whose time is already listed
+        self.frames.append(frame)
+        self.times.append(timestamp)
+
+    def seal(self):
+        """Packed copy of this chunk; the open one stays valid for readers still holding it"""
+        sealed = HistoryChunk()
+        sealed.keyframe = self.keyframe
+        # nothing is interned into a sealed chunk, so it keeps the list and drops the lookup dict
+        sealed.strings = self.strings
+        sealed.string_ids = None
+        sealed.string_bytes = self.string_bytes - sys.getsizeof(self.string_ids)
+        sealed.times = list(self.times)
+        columns = list(zip(*self.frames))
+        sealed.columns = {}
+        sealed.offsets = {}
+        for name, parts in zip(self.COLUMNS, columns):
+            sealed.offsets[name] = np.concatenate(([0], np.cumsum([len(part) for part in parts]))).astype(np.int32)
+            values = np.concatenate(parts)
+            if name in ('dx', 'dy'):
+                values = values.astype(_delta_dtype(values))
+            sealed.columns[name] = values
+        return sealed
+
+    def frame(self, index):
+        if self.columns is None:
+            return self.frames[index]
+        return tuple(self.columns[name][self.offsets[name][index]:self.offsets[name][index + 1]]
+                     for name in self.COLUMNS)
+
+    @property
+    def nbytes(self):
+        size = sum(arr.nbytes for arr in self.keyframe) + 8 * len(self.times) + self.string_bytes
+        if self.columns is None:
+            return size + sum(arr.nbytes for frame in self.frames for arr in frame)
+        return size + sum(arr.nbytes for arr in self.columns.values()) + sum(arr.nbytes for arr in self.offsets.values())
+
+
+class HistoryStore:
+    """
+    Bounded, time-indexed history of the projected traffic: everything the
+    display showed over the last max_minutes, within memory_mb. record()
+    is called from ingest with the same (hex, label, xy, ...) changes
+    RadarDisplay.apply_changes stores; positions are kept in whole meters.
+    A new chunk with its own keyframe and string table starts every
+    chunk_frames frames, and whole chunks are dropped from the front when
+    over either limit; nbytes counts the string tables too.
+
+    Seeks bisect the chunk start times and then the frame times in one
+    chunk, so finding a frame is O(log n); HistoryCursor rebuilds the state
+    from the chunk's keyframe.
+    """
+
+    def __init__(self, memory_mb=HISTORY_MEMORY_MB, max_minutes=HISTORY_MINUTES, chunk_frames=HISTORY_CHUNK_FRAMES):
+        self.max_bytes = int(memory_mb * 1024 * 1024)
+        self.max_seconds = max_minutes * 60
+        self.chunk_frames = chunk_frames
+        self.lock = Lock()
+        self.chunks = []
+        self.starts = []
+        self.sealed_bytes = 0
+        self.state = {}   # hex: (x, y, label) as of the last record()
+        self.dropped_chunks = 0
+
+    def record(self, timestamp, changes, removed):
+        """Append one ingest's changes; frames that change nothing aren't stored"""
+        chunk = self.chunks[-1] if self.chunks else None
+        if chunk is not None and timestamp < chunk.end:
+            # time went backwards (a replay looping): what we have no longer lines up
+            with self.lock:
+                self.chunks, self.starts, self.sealed_bytes = [], [], 0
+            chunk = None
+        new_chunk = None
+        if chunk is None or len(chunk) >= self.chunk_frames:
+            new_chunk = HistoryChunk(self.state)
+        intern = (chunk if new_chunk is None else new_chunk).intern
+
+        state = self.state
+        ids, dx, dy, relabel_ids, relabel_labels, gone = [], [], [], [], [], []
+        for icao in removed:
+            if state.pop(icao, None) is not None:
+                gone.append(intern(icao))
+        for icao, label, xy, *_ in changes:
+            if xy is None:
+                if state.pop(icao, None) is not None:
+                    gone.append(intern(icao))
+                continue
+            x, y = int(round(xy[0])), int(round(xy[1]))
+            old = state.get(icao)
+            if old is None or old[2] != label:
+                relabel_ids.append(intern(icao))
+                relabel_labels.append(intern(label))
+            if old is None or old[0] != x or old[1] != y:
+                ids.append(intern(icao))
+                dx.append(x - (old[0] if old else 0))
+                dy.append(y - (old[1] if old else 0))
+            state[icao] = (x, y, label)
+        if not (ids or relabel_ids or gone):
+            return
+
+        dx = np.array(dx, dtype=np.int32)
+        dy = np.array(dy, dtype=np.int32)
+        frame = (np.array(ids, dtype=np.uint32), dx.astype(_delta_dtype(dx)), dy.astype(_delta_dtype(dy)),
+                 np.array(relabel_ids, dtype=np.uint32), np.array(relabel_labels, dtype=np.uint32),
+                 np.array(gone, dtype=np.uint32))
+
+        with self.lock:
+            if new_chunk is not None:
+                if chunk is not None:
+                    self.chunks[-1] = chunk.seal()
+                    self.sealed_bytes += self.chunks[-1].nbytes
+                chunk = new_chunk
+                self.chunks.append(chunk)
+                self.starts.append(timestamp)
+            chunk.append(timestamp, frame)
+            self._evict(timestamp)
+
+    def _evict(self, now):
+        while len(self.chunks) > 1 and (self.sealed_bytes + self.chunks[-1].nbytes > self.max_bytes
+                                         or self.chunks[0].end < now - self.max_seconds):
+            self.sealed_bytes -= self.chunks.pop(0).nbytes
+            self.starts.pop(0)
+            self.dropped_chunks += 1
+
+    def locate(self, timestamp):
+        """(chunk, frame index) of the newest frame at or before timestamp, clamped to what is kept"""
+        with self.lock:
+            if not self.chunks:
+                return None, -1
+            i = max(0, bisect_right(self.starts, timestamp) - 1)
+            chunk = self.chunks[i]
+            n = len(chunk)
+        return chunk, max(0, bisect_right(chunk.times, timestamp, 0, n) - 1)
+
+    def span(self):
+        """(oldest, newest) recorded timestamps, or None while empty"""
+        with self.lock:
+            if not self.chunks:
+                return None
+            return self.chunks[0].start, self.chunks[-1].end
+
+    @property
+    def nbytes(self):
+        with self.lock:
+            open_bytes = self.chunks[-1].nbytes if self.chunks and self.chunks[-1].columns is None else 0
+            return self.sealed_bytes + open_bytes
+
+    def stats(self):
+        span = self.span()
+        with self.lock:
+            frames = sum(len(chunk) for chunk in self.chunks)
+            chunks = len(self.chunks)
+            strings = sum(len(chunk.strings) for chunk in self.chunks)
+        return {
+            'bytes': self.nbytes,
+            'frames': frames,
+            'chunks': chunks,
+            'seconds': span[1] - span[0] if span else 0.0,
+            'strings': strings,
+            'dropped_chunks': self.dropped_chunks,
+        }
+
+
+class HistoryCursor:
+    """
+    Reads frames back from a HistoryStore. Moving forward within a chunk
+    only applies the frames in between, so playback and small scrubs stay
+    cheap; anything else restarts from the chunk's keyframe.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.chunk = None
+        self.index = -1
+        self.state = {}
+        self.result = None
+
+    def seek(self, timestamp):
+        """(frame time, {hex: (label, x, y)}) for the newest frame at or before timestamp, or None"""
+        chunk, index = self.store.locate(timestamp)
+        if chunk is None:
+            return None
+        if chunk is self.chunk and index == self.index and self.result is not None:
+            return self.result
+        if chunk is not self.chunk or index < self.index:
+            ids, xs, ys, labels = chunk.keyframe
+            self.state = {sid: [x, y, lid] for sid, x, y, lid in zip(ids.tolist(), xs.tolist(), ys.tolist(), labels.tolist())}
+            self.chunk = chunk
+            self.index = -1
+        state = self.state
+        for i in range(self.index + 1, index + 1):
+            ids, dx, dy, relabel_ids, relabel_labels, removed = chunk.frame(i)
+            for sid in removed.tolist():
+                state.pop(sid, None)
+            for sid, lid in zip(relabel_ids.tolist(), relabel_labels.tolist()):
+                entry = state.get(sid)
+                if entry is None:
+                    state[sid] = [0, 0, lid]
+                else:
+                    entry[2] = lid
+            for sid, ddx, ddy in zip(ids.tolist(), dx.tolist(), dy.tolist()):
+                entry = state[sid]
+                entry[0] += ddx
+                entry[1] += ddy
+        self.index = index
+        strings = chunk.strings
+        aircraft = {strings[sid]: (strings[lid], float(x), float(y)) for sid, (x, y, lid) in state.items()}
+        self.result = (chunk.times[index], aircraft)
+        return self.result
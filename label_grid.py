@@ -0,0 +1,132 @@
+import numpy as np
+from config import LABEL_GRID_CELL, LABEL_BUCKET_SIZE
+
+
+def visible_mask(xs, ys, width, height, margin=0):
+    """Boolean mask of screen points inside the viewport grown by margin pixels"""
+    return (xs >= -margin) & (xs < width + margin) & (ys >= -margin) & (ys < height + margin)
+
+
+class LabelGrid:
+    """
+    Occupancy grid over the screen for placing labels without overlap.
+    The screen is split into cell_size pixel cells held in one flat
+    bytearray; a rectangle collides if any cell it touches is set, which is
+    a find() per row of cells, and clearing it each frame is one memset.
+    Parts of a rectangle that fall off screen never collide.
+    """
+
+    # label offsets from the target, tried in order: right-up, right-down, left-up, left-down
+    PLACEMENTS = ((10, -10), (10, 4), (-10, -10), (-10, 4))
+
+    def __init__(self, width, height, cell_size=LABEL_GRID_CELL, bucket_size=LABEL_BUCKET_SIZE):
+        self.cell_size = cell_size
+        self.bucket_size = bucket_size
+        self.cols = -(-width // cell_size)
+        self.rows = -(-height // cell_size)
+        self.cells = bytearray(self.cols * self.rows)
+        self.empty = bytes(len(self.cells))
+        self.full = b'\x01' * self.cols
+        self.placed = 0
+        self.hidden = 0
+
+    def clear(self):
+        self.cells[:] = self.empty
+        self.placed = 0
+        self.hidden = 0
+
+    def _span(self, x, y, w, h):
+        """(col0, col1, row0, row1) of the cells under a rectangle, clipped to the screen; None if off screen"""
+        size = self.cell_size
+        col0 = x // size
+        col1 = (x + w - 1) // size + 1
+        row0 = y // size
+        row1 = (y + h - 1) // size + 1
+        if col0 < 0:
+            col0 = 0
+        if row0 < 0:
+            row0 = 0
+        if col1 > self.cols:
+            col1 = self.cols
+        if row1 > self.rows:
+            row1 = self.rows
+        if col0 >= col1 or row0 >= row1:
+            return None
+        return col0, col1, row0, row1
+
+    def _collides(self, span):
+        col0, col1, row0, row1 = span
+        cols = self.cols
+        find = self.cells.find
+        for start in range(row0 * cols, row1 * cols, cols):
+            if find(1, start + col0, start + col1) != -1:
+                return True
+        return False
+
+    def _occupy(self, span):
+        col0, col1, row0, row1 = span
+        cols = self.cols
+        run = self.full[:col1 - col0]
+        for start in range(row0 * cols, row1 * cols, cols):
+            self.cells[start + col0:start + col1] = run
+
+    def collides(self, rect):
+        span = self._span(*rect)
+        return span is not None and self._collides(span)
+
+    def occupy(self, rect):
+        span = self._span(*rect)
+        if span is not None:
+            self._occupy(span)
+
+    def place(self, anchor, size):
+        """
+        Top-left position for a label of size (w, h) next to anchor, or None
+        if every placement would overlap something already on screen
+        """
+        w, h = size
+        ax, ay = anchor
+        cell_size = self.cell_size
+        cols = self.cols
+        rows = self.rows
+        find = self.cells.find
+        for dx, dy in self.PLACEMENTS:
+            x = ax + dx if dx > 0 else ax + dx - w
+            y = ay + dy
+            # inlined _span/_collides: this runs up to four times per visible target
+            col0 = max(x // cell_size, 0)
+            col1 = min((x + w - 1) // cell_size + 1, cols)
+            row0 = max(y // cell_size, 0)
+            row1 = min((y + h - 1) // cell_size + 1, rows)
+            if col0 < col1 and row0 < row1:
+                for start in range(row0 * cols, row1 * cols, cols):
+                    if find(1, start + col0, start + col1) != -1:
+                        break
+                else:
+                    self._occupy((col0, col1, row0, row1))
+                    self.placed += 1
+                    return x, y
+                continue
+            self.placed += 1
+            return x, y
+        self.hidden += 1
+        return None
+
+    def candidates(self, xs, ys):
+        """
+        Mask of targets worth trying to label: the first target in each
+        label-sized bucket. In dense areas at most one label fits per bucket
+        anyway, so this keeps place() calls bounded by screen area rather
+        than by the number of targets.
+        """
+        bucket_w, bucket_h = self.bucket_size
+        keys = (ys // bucket_h) * (self.cols * self.cell_size // bucket_w + 2) + xs // bucket_w
+        mask = np.zeros(len(keys), dtype=bool)
+        mask[np.unique(keys, return_index=True)[1]] = True
+        return mask
+
+    def occupy_points(self, xs, ys, radius):
+        """Reserve the cells under each target marker so labels don't cover other targets"""
+        side = 2 * radius + 1
+        for x, y in zip(xs.tolist(), ys.tolist()):
+            self.occupy((x - radius, y - radius, side, side))
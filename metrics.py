@@ -0,0 +1,196 @@
+import csv
+import os
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread, Event
+from config import PROFILER_ENABLED, PROFILER_WINDOW
+
+
+class _Timer:
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_TIMER = _NullTimer()
+
+
+class _TimedLock:
+    __slots__ = ('profiler', 'lock', 'name')
+
+    def __init__(self, profiler, lock, name):
+        self.profiler = profiler
+        self.lock = lock
+        self.name = name
+
+    def __enter__(self):
+        start = time.perf_counter()
+        self.lock.acquire()
+        self.profiler.record(self.name, time.perf_counter() - start)
+        return self
+
+    def __exit__(self, *exc):
+        self.lock.release()
+        return False
+
+
+class Profiler:
+    """
+    Named stage timers with a rolling window of samples per stage.
+    While disabled, timer() hands back a shared no-op context manager and
+    locked() the bare lock, so instrumented code costs one attribute check.
+    """
+
+    def __init__(self, enabled=PROFILER_ENABLED, window=PROFILER_WINDOW):
+        self.enabled = enabled
+        self.window = window
+        self.samples = {}
+        self.counters = {}
+
+    def timer(self, name):
+        if not self.enabled:
+            return NULL_TIMER
+        return _Timer(self, name)
+
+    def locked(self, lock, name):
+        """Acquire lock as a context manager, timing how long the acquire waited"""
+        if not self.enabled:
+            return lock
+        return _TimedLock(self, lock, name)
+
+    def record(self, name, seconds):
+        samples = self.samples.get(name)
+        if samples is None:
+            samples = self.samples.setdefault(name, deque(maxlen=self.window))
+        samples.append(seconds)
+
+    def count(self, name, n=1):
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def reset(self):
+        self.samples.clear()
+        self.counters.clear()
+
+    def summary(self):
+        """{name: {'count', 'p50', 'p95', 'p99', 'max'}} in seconds over the current window"""
+        result = {}
+        for name, samples in list(self.samples.items()):
+            values = sorted(samples)
+            if not values:
+                continue
+            n = len(values)
+            result[name] = {
+                'count': n,
+                'p50': values[min(n - 1, int(n * 0.50))],
+                'p95': values[min(n - 1, int(n * 0.95))],
+                'p99': values[min(n - 1, int(n * 0.99))],
+                'max': values[-1],
+            }
+        return result
+
+    def format_text(self, extra=None):
+        """Plain-text exposition of timers, counters and any extra gauges"""
+        lines = []
+        for name, stats in sorted(self.summary().items()):
+            for quantile in ('p50', 'p95', 'p99'):
+                lines.append(f'radar_stage_seconds{{stage="{name}",quantile="0.{quantile[1:]}"}} {stats[quantile]:.6f}')
+            lines.append(f'radar_stage_samples{{stage="{name}"}} {stats["count"]}')
+        for name, value in sorted(self.counters.items()):
+            lines.append(f'radar_events_total{{event="{name}"}} {value}')
+        for name, value in sorted((extra or {}).items()):
+            if isinstance(value, (int, float)):
+                lines.append(f'radar_{name} {value}')
+        return "\n".join(lines) + "\n"
+
+
+PROFILER = Profiler()
+
+
+class MetricsServer:
+    """Serves PROFILER.format_text() on http://host:port/metrics from a daemon thread"""
+
+    def __init__(self, profiler=PROFILER, port=9100, host='127.0.0.1', extra=None):
+        self.profiler = profiler
+        self.extra = extra
+
+        outer = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+                body = outer.profiler.format_text(outer.extra() if outer.extra else None).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        self.thread = Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class CsvDumper:
+    """Appends one row per stage (timestamp, stage, count, p50, p95, p99, max) every interval seconds"""
+
+    def __init__(self, path, profiler=PROFILER, interval=10.0):
+        self.path = path
+        self.profiler = profiler
+        self.interval = interval
+        self.stop_event = Event()
+        self.thread = Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while not self.stop_event.wait(self.interval):
+            self.dump()
+
+    def dump(self):
+        new_file = not os.path.exists(self.path)
+        now = time.time()
+        with open(self.path, 'a', newline='') as f:
+            writer = csv.writer(f)
+            if new_file:
+                writer.writerow(['timestamp', 'stage', 'count', 'p50', 'p95', 'p99', 'max'])
+            for name, stats in sorted(self.profiler.summary().items()):
+                writer.writerow([f"{now:.3f}", name, stats['count'],
+                                 f"{stats['p50']:.6f}", f"{stats['p95']:.6f}",
+                                 f"{stats['p99']:.6f}", f"{stats['max']:.6f}"])
+
+    def stop(self):
+        self.stop_event.set()
+        self.thread.join()
+        self.dump()
@@ -0,0 +1,144 @@
+import math
+import numpy as np
+from config import MOTION_MAX_EXTRAPOLATION, MOTION_RECONCILE_TIME, MOTION_SNAP_DISTANCE
+
+KNOTS_TO_MPS = 0.514444
+
+
+class MotionModel:
+    """
+    Dead reckoning between position updates. Each aircraft keeps its last
+    projected fix, the time of that fix and a velocity from track/ground
+    speed; predict() extrapolates every aircraft at once for the current
+    frame time. When a new fix arrives, the gap between where we had drawn
+    the aircraft and where the new fix puts it is blended out over
+    reconcile_time seconds instead of jumping.
+    """
+
+    def __init__(self, capacity=256, max_extrapolation=MOTION_MAX_EXTRAPOLATION,
+                 reconcile_time=MOTION_RECONCILE_TIME, snap_distance=MOTION_SNAP_DISTANCE):
+        self.max_extrapolation = max_extrapolation
+        self.reconcile_time = reconcile_time
+        self.snap_distance = snap_distance
+        self.slots = {}
+        self.free = []
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        old = getattr(self, 'capacity', 0)
+        self.capacity = capacity
+        for name in ('x0', 'y0', 'vx', 'vy', 't0', 'ox', 'oy', 'tr'):
+            arr = np.zeros(capacity)
+            if old:
+                arr[:old] = getattr(self, name)
+            setattr(self, name, arr)
+        active = np.zeros(capacity, dtype=bool)
+        labels = np.empty(capacity, dtype=object)
+        if old:
+            active[:old] = self.active
+            labels[:old] = self.labels
+        self.active = active
+        self.labels = labels
+        self.free.extend(range(capacity - 1, old - 1, -1))
+
+    def __len__(self):
+        return len(self.slots)
+
+    def update(self, icao, label, x, y, fix_time, track, gs, now):
+        """Record a new projected fix (meters) taken at fix_time"""
+        slot = self.slots.get(icao)
+        if slot is None:
+            if not self.free:
+                self._allocate(self.capacity * 2)
+            slot = self.free.pop()
+            self.slots[icao] = slot
+            self.active[slot] = True
+            old_pos = None
+        else:
+            old_pos = self._predict_slot(slot, now)
+
+        if track is not None and gs is not None:
+            speed = gs * KNOTS_TO_MPS
+            heading = math.radians(track)
+            self.vx[slot] = speed * math.sin(heading)
+            self.vy[slot] = -speed * math.cos(heading)
+        else:
+            self.vx[slot] = self.vy[slot] = 0.0
+        self.x0[slot] = x
+        self.y0[slot] = y
+        self.t0[slot] = fix_time if fix_time is not None else now
+        self.labels[slot] = label
+
+        self.ox[slot] = self.oy[slot] = 0.0
+        if old_pos is not None:
+            new_pos = self._predict_slot(slot, now)
+            dx = old_pos[0] - new_pos[0]
+            dy = old_pos[1] - new_pos[1]
+            if dx * dx + dy * dy < self.snap_distance ** 2:
+                self.ox[slot] = dx
+                self.oy[slot] = dy
+        self.tr[slot] = now
+
+    def remove(self, icao):
+        slot = self.slots.pop(icao, None)
+        if slot is not None:
+            self.active[slot] = False
+            self.labels[slot] = None
+            self.free.append(slot)
+
+    def _predict_slot(self, slot, now):
+        dt = min(max(now - self.t0[slot], 0.0), self.max_extrapolation)
+        blend = max(0.0, 1.0 - (now - self.tr[slot]) / self.reconcile_time) if self.reconcile_time else 0.0
+        return (self.x0[slot] + self.vx[slot] * dt + self.ox[slot] * blend,
+                self.y0[slot] + self.vy[slot] * dt + self.oy[slot] * blend)
+
+    def snapshot(self):
+        """Compact copy of every tracked aircraft that later updates don't touch"""
+        idx = np.flatnonzero(self.active)
+        return MotionSnapshot(self.x0[idx], self.y0[idx], self.vx[idx], self.vy[idx], self.t0[idx],
+                              self.ox[idx], self.oy[idx], self.tr[idx], self.labels[idx],
+                              self.max_extrapolation, self.reconcile_time)
+
+    def predict(self, now):
+        """Extrapolated (x, y, labels) arrays for every tracked aircraft at time now"""
+        return self.snapshot().predict(now)
+
+
+class MotionSnapshot:
+    """MotionModel state frozen by MotionModel.snapshot(), one entry per aircraft"""
+
+    __slots__ = ('x0', 'y0', 'vx', 'vy', 't0', 'ox', 'oy', 'tr', 'labels',
+                 'max_extrapolation', 'reconcile_time')
+
+    def __init__(self, x0, y0, vx, vy, t0, ox, oy, tr, labels, max_extrapolation, reconcile_time):
+        self.x0 = x0
+        self.y0 = y0
+        self.vx = vx
+        self.vy = vy
+        self.t0 = t0
+        self.ox = ox
+        self.oy = oy
+        self.tr = tr
+        self.labels = labels
+        self.max_extrapolation = max_extrapolation
+        self.reconcile_time = reconcile_time
+
+    def __len__(self):
+        return len(self.labels)
+
+    @classmethod
+    def stationary(cls, x, y, labels):
+        """Aircraft that stay where they are, for frames played back from history"""
+        zeros = np.zeros(len(x))
+        return cls(x, y, zeros, zeros, zeros, zeros, zeros, zeros, labels, 0.0, 0.0)
+
+    def predict(self, now):
+        """Extrapolated (x, y, labels) arrays at time now"""
+        dt = np.clip(now - self.t0, 0.0, self.max_extrapolation)
+        if self.reconcile_time:
+            blend = np.clip(1.0 - (now - self.tr) / self.reconcile_time, 0.0, 1.0)
+        else:
+            blend = np.zeros(len(self.t0))
+        x = self.x0 + self.vx * dt + self.ox * blend
+        y = self.y0 + self.vy * dt + self.oy * blend
+        return x, y, self.labels
@@ -1,34 +1,101 @@
+import os
 import pygame
 import math
 import time
+import numpy as np
 from threading import Thread, Lock
-from get_data import FlightData, Calculations
+from get_data import FlightData, Calculations, print_aircraft_updates
+from stream import StreamingFlightData
+from aggregator import MultiReceiverFlightData
+from recording import Recorder, ReplayFlightData
+from decoder import DecodeWorker, ProjectedDelta
+from text_cache import FontRegistry, TextCache
+from sweep_index import SweepIndex
+from sweep_sprites import SweepSpriteCache, PhosphorLayer
+from blips import BlipBuffer
+from label_grid import LabelGrid, visible_mask
+from motion import MotionModel, MotionSnapshot
+from trails import TrailStore, TrailSnapshot
+from metrics import PROFILER, MetricsServer, CsvDumper
+from frame_server import FrameServer
+from scheduler import FrameScheduler
+from snapshot import TrafficSnapshot
+from history import HistoryStore, HistoryCursor
+from views import ViewSpec, SharedIngest
 from config import *
 
+def open_flight_data(decoder=None, autostart=True):
+    """The feed config selects: a replay, a stream, several receivers or one PiAware URL"""
+    if REPLAY_PATH:
+        return ReplayFlightData(REPLAY_PATH, speed=REPLAY_SPEED, autostart=autostart)
+    if FLIGHT_DATA_STREAM:
+        host, port = FLIGHT_DATA_STREAM.rsplit(':', 1)
+        return StreamingFlightData(host, int(port), FLIGHT_DATA_STREAM_FORMAT, autostart=autostart)
+    if FLIGHT_DATA_URLS:
+        return MultiReceiverFlightData(FLIGHT_DATA_URLS, update_interval=FLIGHT_DATA_UPDATE_INTERVAL,
+                                       autostart=autostart)
+    return FlightData(update_interval=FLIGHT_DATA_UPDATE_INTERVAL, autostart=autostart, decoder=decoder)
+
 class RadarDisplay:
-    def __init__(self, width=DISPLAY_WIDTH, height=DISPLAY_HEIGHT):
+    """
+    One radar view. By default it opens its own window and feed; as one of
+    several views it draws into surface (part of a shared window) and takes
+    its aircraft from a views.SharedIngest instead. metrics=False leaves the
+    metrics endpoints to another view.
+    """
+    def __init__(self, width=DISPLAY_WIDTH, height=DISPLAY_HEIGHT, flight_data=None, headless=HEADLESS,
+                 radar_center=None, max_range_km=MAX_RANGE_KM, ingest=None, surface=None, name=None, metrics=True):
+        self.headless = headless
+        if headless:
+            os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
         pygame.init()
         self.width = width
         self.height = height
         self.center = (width // 2, height // 2)
         self.radius = min(width, height) // 2 - 50
+        self.name = name
+        self.max_range_km = max_range_km
+        self.ingest = ingest
         
-        self.screen = pygame.display.set_mode([width, height])
-        pygame.display.set_caption("WWII Radar Display - Live Flight Data")
+        self.embedded = surface is not None
+        if self.embedded:
+            self.screen = surface
+        else:
+            self.screen = pygame.display.set_mode([width, height])
+            pygame.display.set_caption("WWII Radar Display - Live Flight Data")
         self.clock = pygame.time.Clock()
+        self.fonts = FontRegistry()
+        self.text_cache = TextCache(self.fonts, TEXT_CACHE_SIZE, TEXT_CACHE_INTENSITY_LEVELS)
         
         self.sweep_angle = 0
         self.last_sweep_angle = 0
-        self.sweep_speed = SWEEP_SPEED
+        self.sweep_rate = SWEEP_DEGREES_PER_SECOND
+        self.scheduler = FrameScheduler()
         self.sweep_cycle = 0 
-        self.last_blip_cycle_by_callsign = {}
-        self.aircraft_data = []
-        self.data_lock = Lock()
+        self.last_blip_cycle_by_hex = {}
+        self.aircraft_data = {}
+        self.motion = MotionModel()
+        self.trails = TrailStore()
+        self.show_trails = TRAILS_ENABLED
+        # aircraft_data, motion and trails belong to ingest; the renderer only
+        # reads the published snapshot, so this lock is never taken while drawing
+        self.ingest_lock = Lock()
+        self.snapshot = TrafficSnapshot(0, time.time(), {}, self.motion.snapshot(), self.trails.snapshot())
+        self.frame_snapshot = self.snapshot
+        self.history = HistoryStore()
+        self.history_cursor = HistoryCursor(self.history)
+        self.history_time = None   # None while live
+        self.history_paused = False
+        self.history_frame = None
         self.debug_mode = False
         
         self.wwii_mode = False
-        self.blips = []
+        self.blips = BlipBuffer()
         self.lead_degrees = 5 
+        self.sweep_index = SweepIndex(SWEEP_INDEX_BUCKET_DEGREES)
+        self.sweep_index_snapshot = None
+        self.label_grid = LabelGrid(width, height)
+        self.visible_count = 0
         
         self.zoom_level = 1.0
         self.min_zoom = 0.5 
@@ -38,6 +105,24 @@ class RadarDisplay:
         self.is_panning = False
         self.last_mouse_pos = None
         
+        self.background = pygame.Surface((width, height)).convert()
+        self.background_key = None
+        self.sweep_sprites = SweepSpriteCache()
+        self.phosphor = PhosphorLayer((width, height))
+        self.sweep_dt = 1 / FPS
+        self.dirty_rects = []
+        self.prev_dirty_rects = []
+        self.changed_rects = None
+        
+        self.frame_server = FrameServer(FRAME_SERVER_PORT, FRAME_SERVER_HOST) if headless and not self.embedded else None
+        
+        self.show_profiler = False
+        self.profiler_lines = []
+        self.profiler_refreshed = 0
+        self.metrics_server = MetricsServer(PROFILER, METRICS_PORT, extra=self.metrics_gauges) if metrics and METRICS_PORT is not None else None
+        self.metrics_csv = CsvDumper(METRICS_CSV, PROFILER, METRICS_CSV_INTERVAL) if metrics and METRICS_CSV else None
+        self.update_profiler_enabled()
+        
         self.BLACK = COLORS['BLACK']
         self.GREEN = COLORS['GREEN']
         self.DARK_GREEN = COLORS['DARK_GREEN']
@@ -45,167 +130,296 @@ class RadarDisplay:
         self.YELLOW = COLORS['YELLOW']
         self.RED = COLORS['RED']
         
-        self.flight_data = FlightData(update_interval=FLIGHT_DATA_UPDATE_INTERVAL)
-        self.flight_data.subscribe(self.update_aircraft_data)
-        
-        self.radar_center = RADAR_CENTER
-        
-    def update_aircraft_data(self, snapshot):
-        with self.data_lock:
-            self.aircraft_data = Calculations.process_aircraft(snapshot, self.radar_center)
+        self.radar_center = radar_center or RADAR_CENTER
+        self.verbose = PRINT_AIRCRAFT_UPDATES
+        self.decoder = None
+        self.recorder = None
+        if ingest is not None:
+            # the owner of the shared ingest records and starts the feed
+            self.flight_data = ingest.flight_data
+            ingest.add_view(self)
+            return
+        if flight_data is not None:
+            self.flight_data = flight_data
+        elif DECODE_IN_PROCESS and not (REPLAY_PATH or FLIGHT_DATA_STREAM or FLIGHT_DATA_URLS):
+            # the worker also writes the recording, so no snapshot has to be decoded here
+            self.decoder = DecodeWorker(self.radar_center, self.max_range_km, self.verbose,
+                                        self.radius / (self.max_range_km * 1000), record_path=RECORD_PATH)
+            self.flight_data = open_flight_data(self.decoder, autostart=False)
+        else:
+            self.flight_data = open_flight_data(autostart=False)
+            if REPLAY_PATH and self.radar_center[0] is None and self.flight_data.log.center:
+                self.radar_center = self.flight_data.log.center
+        self.flight_data.subscribe_deltas(self.update_aircraft_data)
+        if RECORD_PATH and not self.decoder:
+            self.recorder = Recorder(RECORD_PATH, self.radar_center).attach(self.flight_data)
+        if flight_data is None:
+            # started only now so the first frames aren't published before anyone subscribed
+            self.flight_data.start()
+        
+    def update_aircraft_data(self, delta):
+        """
+        Apply a state.Delta: only added and updated aircraft are projected,
+        removed ones are dropped. aircraft_data maps hex -> (label, x, y).
+        A decoder.ProjectedDelta arrives already projected.
+        """
+        if isinstance(delta, ProjectedDelta):
+            if delta.n_added or delta.removed:
+                self.scheduler.note_activity()
+            with PROFILER.timer('process_aircraft'):
+                changes = delta.changes()
+            self.apply_changes(changes, delta.removed, delta.timestamp)
+            return
+
+        changed = delta.added + delta.updated
+        with PROFILER.timer('process_aircraft'):
+            coords = Calculations.project_records(changed, self.radar_center, self.max_range_km)
+        self.update_projected(delta, changed, coords)
+    
+    def update_projected(self, delta, changed, coords):
+        """
+        Apply a state.Delta whose changed records are already projected;
+        coords as returned by Calculations.project_records. A SharedIngest
+        calls this directly.
+        """
+        if delta.added or delta.removed:
+            self.scheduler.note_activity()
+        changes = [(record.hex, record.label, xy, record.position_time, record.track, record.gs)
+                   for record, xy in zip(changed, coords)]
+        self.apply_changes(changes, [record.hex for record in delta.removed], delta.timestamp)
             
-        self.print_aircraft_list(snapshot)
-    
-    def print_aircraft_list(self, snapshot):
-        print(f"\n=== Aircraft Update at {time.strftime('%H:%M:%S')} ===")
-        if snapshot:
-            for aircraft in snapshot:
-                flight = aircraft.get('flight', 'UNKNOWN').strip()
-                lat = aircraft.get('lat')
-                lon = aircraft.get('lon')
-                alt = aircraft.get('alt', 'N/A')
-                speed = aircraft.get('speed', 'N/A')
-                
-                if lat is not None and lon is not None:
-                    radar_coords = Calculations.to_radar_coords(aircraft, self.radar_center)
-                    if radar_coords:
-                        radar_x, radar_y = radar_coords
-                        distance_km = math.sqrt(radar_x**2 + radar_y**2) / 1000
-                        
-                        scale_factor = self.radius / (MAX_RANGE_KM * 1000)
-                        scaled_x = radar_x * scale_factor
-                        scaled_y = radar_y * scale_factor
-                        
-                        print(f"✈️  {flight}: Lat {lat:.4f}, Lon {lon:.4f} | Raw Radar X={radar_x:.1f}m, Y={radar_y:.1f}m | Scaled X={scaled_x:.1f}, Y={scaled_y:.1f} | Distance: {distance_km:.1f}km | Alt {alt}, Speed {speed}")
-                    else:
-                        print(f"✈️  {flight}: Lat {lat:.4f}, Lon {lon:.4f} | Radar: Out of range | Alt {alt}, Speed {speed}")
+        if self.verbose:
+            self.print_aircraft_list(delta, changed, coords)
+
+    def apply_changes(self, changes, removed, timestamp):
+        """
+        Store projected (hex, label, xy, position_time, track, gs) changes; xy
+        None drops the target. Ends by publishing a new snapshot.
+        """
+        with PROFILER.locked(self.ingest_lock, 'lock_wait.ingest'):
+            for icao in removed:
+                self.aircraft_data.pop(icao, None)
+                self.motion.remove(icao)
+                self.trails.remove(icao)
+            for icao, label, xy, position_time, track, gs in changes:
+                if xy is None:
+                    self.aircraft_data.pop(icao, None)
+                    self.motion.remove(icao)
+                    self.trails.remove(icao)
                 else:
-                    print(f"✈️  {flight}: Position unavailable")
-            print(f"Total aircraft: {len(snapshot)}")
-        else:
-            print("No aircraft detected")
-        print("=" * 50)
+                    self.aircraft_data[icao] = (label, *xy)
+                    self.motion.update(icao, label, *xy, position_time, track, gs, timestamp)
+                    self.trails.add(icao, *xy, position_time or timestamp)
+            self.trails.evict(timestamp)
+            with PROFILER.timer('publish_snapshot'):
+                self.snapshot = TrafficSnapshot(self.snapshot.generation + 1, timestamp, dict(self.aircraft_data),
+                                                self.motion.snapshot(), self.trails.snapshot())
+            with PROFILER.timer('history_record'):
+                self.history.record(timestamp, changes, removed)
     
-    def draw_range_rings(self):
+    def print_aircraft_list(self, delta, changed, coords):
+        print_aircraft_updates(delta, changed, coords, self.radius / (self.max_range_km * 1000),
+                               len(self.flight_data.store))
+    
+    def draw_range_rings(self, surface):
         for i in range(1, RANGE_RINGS + 1):
             radius = (self.radius * i) // RANGE_RINGS
             
             transformed_center = self.apply_transform(self.center)
             transformed_radius = int(radius * self.zoom_level)
             
-            pygame.draw.circle(self.screen, self.DARK_GREEN, transformed_center, transformed_radius, 1)
+            pygame.draw.circle(surface, self.DARK_GREEN, transformed_center, transformed_radius, 1)
             
-            range_km = (i * MAX_RANGE_KM) // RANGE_RINGS
-            font = pygame.font.Font(None, 24)
-            text = font.render(f"{range_km}km", True, self.DARK_GREEN)
+            range_km = (i * self.max_range_km) // RANGE_RINGS
+            text = self.text_cache.render(f"{range_km:g}km", 24, self.DARK_GREEN)
             text_pos = (transformed_center[0] + transformed_radius - 20, transformed_center[1] - 10)
-            self.screen.blit(text, text_pos)
+            surface.blit(text, text_pos)
     
     def draw_sweep_line(self):
-        end_x = self.center[0] + self.radius * math.cos(math.radians(self.sweep_angle))
-        end_y = self.center[1] - self.radius * math.sin(math.radians(self.sweep_angle))
+        """
+        Modern mode blits a cached wedge sprite. WWII mode paints the sector
+        swept since the last frame into the phosphor layer, fades it, and
+        adds the glow over the radar circle.
+        """
+        cx, cy = self.apply_transform(self.center)
+        radius = int(self.radius * self.zoom_level)
+        if not self.wwii_mode:
+            # past the farthest screen corner the wedge is never seen; round up so panning reuses sprites
+            corner = max(math.hypot(x - cx, y - cy) for x in (0, self.width) for y in (0, self.height))
+            sprite, (dx, dy) = self.sweep_sprites.get(radius, self.sweep_angle, int(corner // 64 + 1) * 64)
+            self.dirty_rects.append(self.screen.blit(sprite, (cx + dx, cy + dy), special_flags=pygame.BLEND_ADD))
+            return
         
-        transformed_center = self.apply_transform(self.center)
-        transformed_end = self.apply_transform((end_x, end_y))
-        
-        pygame.draw.line(self.screen, self.GREEN, transformed_center, transformed_end, 2)
-        
-        for i in range(1, 10):
-            fade_alpha = 255 - (i * 25)
-            if fade_alpha > 0:
-                fade_radius = self.radius - (i * 20)
-                if fade_radius > 0:
-                    fade_x = self.center[0] + fade_radius * math.cos(math.radians(self.sweep_angle))
-                    fade_y = self.center[1] - fade_radius * math.sin(math.radians(self.sweep_angle))
-                    fade_color = (0, fade_alpha, 0)
-                    fade_start = self.apply_transform(self.center)
-                    fade_end = self.apply_transform((fade_x, fade_y))
-                    pygame.draw.line(self.screen, fade_color, fade_start, fade_end, 1)
+        area = pygame.Rect(cx - radius, cy - radius, 2 * radius + 1, 2 * radius + 1).clip(self.screen.get_rect())
+        self.phosphor.fade(self.sweep_dt, area)
+        self.phosphor.paint_sweep((cx, cy), radius, self.last_sweep_angle, self.sweep_angle)
+        self.dirty_rects.append(self.phosphor.composite(self.screen, area))
+        end = (cx + radius * math.cos(math.radians(self.sweep_angle)),
+               cy - radius * math.sin(math.radians(self.sweep_angle)))
+        pygame.draw.line(self.screen, self.GREEN, (cx, cy), end, 2)
     
     def draw_aircraft(self):
-        with self.data_lock:
-            if self.wwii_mode:
-                self.draw_wwii_blips()
-            else:
-                self.draw_modern_aircraft()
+        if self.show_trails:
+            with PROFILER.timer('draw_trails'):
+                self.draw_trails()
+        if self.wwii_mode:
+            self.draw_wwii_blips()
+        else:
+            self.draw_modern_aircraft()
     
-    def draw_modern_aircraft(self):
-        for callsign, x, y in self.aircraft_data:
-            scale_factor = self.radius / (MAX_RANGE_KM * 1000) 
-            scaled_x = x * scale_factor
-            scaled_y = y * scale_factor
-            
-            screen_x = self.center[0] + int(scaled_x)
-            screen_y = self.center[1] + int(scaled_y)
+    def draw_trails(self):
+        """
+        Every trail point is transformed in one batch; trails with no point on
+        screen are skipped. Modern mode draws each trail as polylines dimming
+        with age, WWII mode as phosphor dots written straight into the screen's
+        pixels.
+        """
+        trails = self.frame_snapshot.trails
+        xs, ys, ages, lengths = trails.points(time.time())
+        if not len(xs):
+            return
+        screen_xs, screen_ys = self.transform_radar_points(xs, ys)
+        on_screen = visible_mask(screen_xs, screen_ys, self.width, self.height)
+        starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        shown = (lengths >= 2) & (np.add.reduceat(on_screen, starts) > 0)
+        keep = np.repeat(shown, lengths)
+        screen_xs, screen_ys, ages, on_screen = screen_xs[keep], screen_ys[keep], ages[keep], on_screen[keep]
+        lengths = lengths[shown]
+        if not len(lengths):
+            return
+        bands = np.minimum((ages / trails.max_age * TRAIL_FADE_LEVELS).astype(int), TRAIL_FADE_LEVELS - 1)
+        
+        if self.wwii_mode:
+            levels = [int(120 * (1 - band / TRAIL_FADE_LEVELS)) for band in range(TRAIL_FADE_LEVELS)]
+            lut = np.array([self.screen.map_rgb((0, level, 0)) for level in levels])
+            pixels = pygame.surfarray.pixels2d(self.screen)
+            pixels[screen_xs[on_screen], screen_ys[on_screen]] = lut[bands[on_screen]]
+            del pixels
             
-            distance = math.sqrt(x**2 + y**2)
-            if distance <= MAX_RANGE_KM * 1000: 
-                transformed_pos = self.apply_transform((screen_x, screen_y))
-                
-                pygame.draw.circle(self.screen, self.RED, transformed_pos, 4)
-                pygame.draw.circle(self.screen, self.WHITE, transformed_pos, 4, 1)
-                
-                font = pygame.font.Font(None, 20)
-                text = font.render(callsign, True, self.WHITE)
-                text_pos = (transformed_pos[0] + 10, transformed_pos[1] - 10)
-                self.screen.blit(text, text_pos)
-                if self.debug_mode:
-                    transformed_center = self.apply_transform(self.center)
-                    pygame.draw.line(self.screen, self.YELLOW, transformed_center, transformed_pos, 1)
+            starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+            left, right = np.minimum.reduceat(screen_xs, starts), np.maximum.reduceat(screen_xs, starts)
+            top, bottom = np.minimum.reduceat(screen_ys, starts), np.maximum.reduceat(screen_ys, starts)
+            screen_rect = self.screen.get_rect()
+            for x0, y0, x1, y1 in zip(left.tolist(), top.tolist(), right.tolist(), bottom.tolist()):
+                self.dirty_rects.append(pygame.Rect(x0, y0, x1 - x0 + 1, y1 - y0 + 1).clip(screen_rect))
+        else:
+            colors = [tuple(int(c * 0.6 * (1 - band / TRAIL_FADE_LEVELS)) for c in self.WHITE)
+                      for band in range(TRAIL_FADE_LEVELS)]
+            points = list(zip(screen_xs.tolist(), screen_ys.tolist()))
+            bands = bands.tolist()
+            # a run ends where the fade band changes or the next trail starts;
+            # runs take one point of the next run so the trail stays joined
+            ends = np.cumsum(lengths)
+            breaks = np.union1d(np.flatnonzero(np.diff(bands)) + 1, ends)
+            trail_ends = ends[np.searchsorted(ends, breaks)]
+            start = 0
+            for end, trail_end in zip(breaks.tolist(), trail_ends.tolist()):
+                run = points[start:min(end + 1, trail_end)]
+                if len(run) >= 2:
+                    self.dirty_rects.append(pygame.draw.lines(self.screen, colors[bands[start]], False, run))
+                start = end
     
-    def update_wwii_blips(self):
-        new_blips = []
+    def draw_modern_aircraft(self):
+        xs, ys, labels = self.frame_snapshot.motion.predict(time.time())
+        in_range = xs**2 + ys**2 <= (self.max_range_km * 1000) ** 2
+        screen_xs, screen_ys = self.transform_radar_points(xs[in_range], ys[in_range])
+        visible = visible_mask(screen_xs, screen_ys, self.width, self.height, LABEL_CULL_MARGIN)
+        screen_xs, screen_ys, labels = screen_xs[visible], screen_ys[visible], labels[in_range][visible]
+        self.visible_count = len(labels)
+        transformed_center = self.apply_transform(self.center)
         
-        for callsign, x, y in self.aircraft_data:
-            scale_factor = self.radius / (MAX_RANGE_KM * 1000)
-            scaled_x = x * scale_factor
-            scaled_y = y * scale_factor
+        self.label_grid.clear()
+        self.label_grid.occupy_points(screen_xs, screen_ys, 4)
+        may_label = self.label_grid.candidates(screen_xs, screen_ys).tolist()
+        for transformed_pos, callsign, labelled in zip(zip(screen_xs.tolist(), screen_ys.tolist()), labels.tolist(), may_label):
+            pygame.draw.circle(self.screen, self.RED, transformed_pos, 4)
+            self.dirty_rects.append(pygame.draw.circle(self.screen, self.WHITE, transformed_pos, 4, 1))
             
-            screen_x = self.center[0] + int(scaled_x)
-            screen_y = self.center[1] + int(scaled_y)
+            text_pos = self.label_grid.place(transformed_pos, self.text_cache.size(callsign, 20)) if labelled else None
+            if text_pos is not None:
+                text = self.text_cache.render(callsign, 20, self.WHITE)
+                self.dirty_rects.append(self.screen.blit(text, text_pos))
+            if self.debug_mode:
+                self.dirty_rects.append(pygame.draw.line(self.screen, self.YELLOW, transformed_center, transformed_pos, 1))
+    
+    def transform_radar_points(self, xs, ys):
+        """
+        Vectorized equivalent of scaling radar meters to the screen and then
+        calling apply_transform on each point
+        """
+        scale_factor = self.radius / (self.max_range_km * 1000)
+        screen_xs = (xs * scale_factor).astype(int)
+        screen_ys = (ys * scale_factor).astype(int)
+        zoomed_xs = screen_xs * self.zoom_level + self.center[0] + self.pan_x
+        zoomed_ys = screen_ys * self.zoom_level + self.center[1] + self.pan_y
+        return zoomed_xs.astype(int), zoomed_ys.astype(int)
+    
+    def rebuild_sweep_index(self, snapshot):
+        """Re-bucket the snapshot's aircraft by the sweep angle that should trigger their blip"""
+        scale_factor = self.radius / (self.max_range_km * 1000)
+        entries = []
+        for icao, (callsign, x, y) in snapshot.aircraft.items():
+            screen_x = self.center[0] + int(x * scale_factor)
+            screen_y = self.center[1] + int(y * scale_factor)
             
             dx = screen_x - self.center[0]
             dy = screen_y - self.center[1]
-            position_angle = math.degrees(math.atan2(dx, -dy)) % 360
+            position_angle = math.degrees(math.atan2(-dy, dx)) % 360
             trigger_angle = (position_angle - self.lead_degrees) % 360
-
-            already_blipped = self.last_blip_cycle_by_callsign.get(callsign) == self.sweep_cycle
+            entries.append((trigger_angle, (icao, callsign, screen_x, screen_y)))
+        self.sweep_index.rebuild(entries)
+        self.sweep_index_snapshot = snapshot
+        # forget blip cycles of aircraft that are gone
+        for icao in [icao for icao in self.last_blip_cycle_by_hex if icao not in snapshot.aircraft]:
+            del self.last_blip_cycle_by_hex[icao]
+    
+    def update_wwii_blips(self, frames=1):
+        new_blips = []
+        
+        if self.sweep_index_snapshot is not self.frame_snapshot:
+            self.rebuild_sweep_index(self.frame_snapshot)
+        
+        for icao, callsign, screen_x, screen_y in self.sweep_index.query(self.last_sweep_angle, self.sweep_angle):
+            already_blipped = self.last_blip_cycle_by_hex.get(icao) == self.sweep_cycle
             if not already_blipped:
-                new_blips.append((screen_x, screen_y, 0, 255, callsign))
-                self.last_blip_cycle_by_callsign[callsign] = self.sweep_cycle
+                new_blips.append((screen_x, screen_y, callsign))
+                self.last_blip_cycle_by_hex[icao] = self.sweep_cycle
                 if self.debug_mode:
                     print(f"🎯 Blip created for {callsign} at sweep angle {self.sweep_angle:.1f}°")
         
-        updated_blips = []
-        for x, y, age, intensity, callsign in self.blips:
-            new_age = age + 1
-            new_intensity = max(0, intensity - 12) 
-            
-            if new_intensity > 0:
-                updated_blips.append((x, y, new_age, new_intensity, callsign))
-        
-        self.blips = new_blips + updated_blips
+        self.blips.age_all(frames)
+        self.blips.add(new_blips)
     
     def draw_wwii_blips(self):
-        for x, y, age, intensity, callsign in self.blips:
-            if intensity > 0:
-                transformed_pos = self.apply_transform((x, y))
-                
-                if age == 0:
-                    pygame.draw.circle(self.screen, (0, intensity, 0), transformed_pos, 4)
-                    pygame.draw.circle(self.screen, (0, intensity//2, 0), transformed_pos, 8)
-                    pygame.draw.circle(self.screen, (0, intensity//4, 0), transformed_pos, 12)
-                else: 
-                    pygame.draw.circle(self.screen, (0, intensity, 0), transformed_pos, 2)
-                    pygame.draw.circle(self.screen, (0, intensity//2, 0), transformed_pos, 4)
-                
-                if age <= 2:
-                    font = pygame.font.Font(None, 20)
-                    text = font.render(callsign, True, (0, intensity, 0))
-                    text_pos = (transformed_pos[0] + 10, transformed_pos[1] - 10)
-                    self.screen.blit(text, text_pos)
+        n = self.blips.count
+        screen_xs = ((self.blips.x[:n] - self.center[0]) * self.zoom_level + self.center[0] + self.pan_x).astype(int)
+        screen_ys = ((self.blips.y[:n] - self.center[1]) * self.zoom_level + self.center[1] + self.pan_y).astype(int)
+        visible = np.flatnonzero(visible_mask(screen_xs, screen_ys, self.width, self.height, LABEL_CULL_MARGIN)
+                                 & (self.blips.intensity[:n] > 0))
+        self.visible_count = len(visible)
+        screen_xs, screen_ys = screen_xs[visible], screen_ys[visible]
+        
+        self.label_grid.clear()
+        self.label_grid.occupy_points(screen_xs, screen_ys, 4)
+        for transformed_pos, age, intensity, callsign in zip(zip(screen_xs.tolist(), screen_ys.tolist()),
+                                                             self.blips.age[visible].tolist(),
+                                                             self.blips.intensity[visible].tolist(),
+                                                             self.blips.labels[visible].tolist()):
+            if age == 0:
+                pygame.draw.circle(self.screen, (0, intensity, 0), transformed_pos, 4)
+                pygame.draw.circle(self.screen, (0, intensity//2, 0), transformed_pos, 8)
+                self.dirty_rects.append(pygame.draw.circle(self.screen, (0, intensity//4, 0), transformed_pos, 12))
+            else: 
+                pygame.draw.circle(self.screen, (0, intensity, 0), transformed_pos, 2)
+                self.dirty_rects.append(pygame.draw.circle(self.screen, (0, intensity//2, 0), transformed_pos, 4))
+            
+            if age <= 2:
+                text_pos = self.label_grid.place(transformed_pos, self.text_cache.size(callsign, 20))
+                if text_pos is not None:
+                    text = self.text_cache.render_faded(callsign, 20, self.GREEN, intensity)
+                    self.dirty_rects.append(self.screen.blit(text, text_pos))
     
-    def draw_compass_rose(self):
+    def draw_compass_rose(self, surface):
         directions = ['N', 'E', 'S', 'W']
         for i, direction in enumerate(directions):
             angle = i * 90
@@ -214,25 +428,23 @@ class RadarDisplay:
             
             transformed_pos = self.apply_transform((x, y))
             
-            font = pygame.font.Font(None, 28)
-            text = font.render(direction, True, self.WHITE)
+            text = self.text_cache.render(direction, 28, self.WHITE)
             text_rect = text.get_rect(center=transformed_pos)
-            self.screen.blit(text, text_rect)
+            surface.blit(text, text_rect)
     
-    def draw_debug_grid(self):
+    def draw_debug_grid(self, surface):
         """Draw debug grid to show scaling"""
         if not self.debug_mode:
             return
             
         for i in range(1, 6):
             grid_radius = (self.radius * i) // 5
-            pygame.draw.circle(self.screen, self.YELLOW, self.center, grid_radius, 1)
+            pygame.draw.circle(surface, self.YELLOW, self.center, grid_radius, 1)
             
-            grid_km = (i * MAX_RANGE_KM) // 5
-            font = pygame.font.Font(None, 18)
-            text = font.render(f"{grid_km}km", True, self.YELLOW)
+            grid_km = (i * self.max_range_km) // 5
+            text = self.text_cache.render(f"{grid_km:g}km", 18, self.YELLOW)
             text_pos = (self.center[0] + grid_radius - 15, self.center[1] - 8)
-            self.screen.blit(text, text_pos)
+            surface.blit(text, text_pos)
     
     def zoom_in(self):
         self.zoom_level = min(self.max_zoom, self.zoom_level * 1.2)
@@ -297,122 +509,479 @@ class RadarDisplay:
     
     def draw_status_info(self):
         
-        with self.data_lock:
-            aircraft_count = len(self.aircraft_data)
+        aircraft_count = len(self.frame_snapshot.aircraft)
         
-        font = pygame.font.Font(None, 24)
+        font = self.fonts.get(24)
         status_text = f"Aircraft: {aircraft_count} | Sweep: {self.sweep_angle:.1f}°"
+        if self.name:
+            status_text = f"{self.name} ({self.max_range_km:g} km) | {status_text}"
         text = font.render(status_text, True, self.WHITE)
-        self.screen.blit(text, (10, 10))
+        self.dirty_rects.append(self.screen.blit(text, (10, 10)))
         
         
-        timestamp = time.strftime("%H:%M:%S")
+        timestamp = time.strftime("%H:%M:%S", time.localtime(self.history_time))
         time_text = font.render(timestamp, True, self.WHITE)
-        self.screen.blit(time_text, (10, 35))
+        self.dirty_rects.append(self.screen.blit(time_text, (10, 35)))
         
         
-        controls_text = "ESC: Exit | P: Print Aircraft List | D: Debug Mode | W: WWII Mode"
-        controls_surface = font.render(controls_text, True, self.WHITE)
-        self.screen.blit(controls_surface, (10, 60))
+        controls_text = "ESC: Exit | P: Print Aircraft List | D: Debug Mode | W: WWII Mode | I: Profiler | SPACE: Pause"
+        controls_surface = self.text_cache.render(controls_text, 24, self.WHITE)
+        self.dirty_rects.append(self.screen.blit(controls_surface, (10, 60)))
         
         
         zoom_text = f"Zoom: {self.zoom_level:.1f}x | Pan: ({self.pan_x}, {self.pan_y})"
         zoom_surface = font.render(zoom_text, True, self.WHITE)
-        self.screen.blit(zoom_surface, (10, 85))
+        self.dirty_rects.append(self.screen.blit(zoom_surface, (10, 85)))
         
         
         mode_text = f"Mode: {'WWII Radar' if self.wwii_mode else 'Modern'}"
         mode_color = self.GREEN if self.wwii_mode else self.WHITE
-        mode_surface = font.render(mode_text, True, mode_color)
-        self.screen.blit(mode_surface, (10, 135))
+        mode_surface = self.text_cache.render(mode_text, 24, mode_color)
+        self.dirty_rects.append(self.screen.blit(mode_surface, (10, 135)))
+        if self.history_time is not None:
+            behind = max(0, int(self.snapshot.timestamp - self.history_time))
+            history_text = (f"HISTORY -{behind // 60:02d}:{behind % 60:02d}{' PAUSED' if self.history_paused else ''}"
+                            f" | SPACE: Play/Pause | Left/Right: Scrub | END: Live")
+            history_surface = font.render(history_text, True, self.YELLOW)
+            self.dirty_rects.append(self.screen.blit(history_surface, (10 + mode_surface.get_width() + 20, 135)))
+        
+        
+        zoom_controls = "+/-: Zoom | Mouse: Pan | R: Reset | Wheel: Zoom at Point | T: Trails"
+        zoom_controls_surface = self.text_cache.render(zoom_controls, 24, self.WHITE)
+        self.dirty_rects.append(self.screen.blit(zoom_controls_surface, (10, 110)))
+    
+    def update_profiler_enabled(self):
+        PROFILER.enabled = bool(self.show_profiler or PROFILER_ENABLED or self.metrics_server or self.metrics_csv)
+    
+    def metrics_gauges(self):
+        snapshot = self.snapshot
+        gauges = {'aircraft': len(snapshot.aircraft), 'snapshot_generation': snapshot.generation, 'blips': len(self.blips),
+                  'visible_targets': self.visible_count, 'labels_hidden': self.label_grid.hidden,
+                  'target_fps': self.scheduler.target_fps(), 'poll_interval': self.flight_data.poll_interval(),
+                  'trails': len(self.trails), 'trail_bytes': self.trails.nbytes, 'trails_reused': self.trails.reused}
+        for name, value in self.text_cache.stats().items():
+            gauges[f'text_cache_{name}'] = value
+        for name, value in self.flight_data.fetch_stats().items():
+            gauges[f'fetch_{name}'] = value
+        gauges.update(self.flight_data.gauges())
+        if self.frame_server:
+            gauges.update(self.frame_server.gauges())
+        if self.decoder:
+            gauges.update(self.decoder.gauges())
+        if self.ingest:
+            gauges.update(self.ingest.gauges())
+        for name, value in self.history.stats().items():
+            gauges[f'history_{name}'] = value
+        gauges.update({'sweep_sprites': len(self.sweep_sprites), 'sweep_sprite_bytes': self.sweep_sprites.nbytes,
+                       'sweep_sprite_misses': self.sweep_sprites.misses})
+        return gauges
+    
+    def draw_profiler_hud(self):
+        """Per-stage p50/p95/p99 in ms, refreshed four times a second"""
+        now = time.time()
+        if now - self.profiler_refreshed > 0.25:
+            self.profiler_refreshed = now
+            font = self.fonts.get(18)
+            rows = [("stage", "p50 ms", "p95 ms", "p99 ms")]
+            for name, stats in sorted(PROFILER.summary().items()):
+                rows.append((name, f"{stats['p50']*1000:.2f}", f"{stats['p95']*1000:.2f}", f"{stats['p99']*1000:.2f}"))
+            rows.append((f"dropped frames: {PROFILER.counters.get('dropped_frames', 0)}", "", "", f"{self.clock.get_fps():.1f} fps"))
+            self.profiler_lines = [[font.render(cell, True, self.YELLOW) for cell in row] for row in rows]
+        
+        y = 160
+        for row in self.profiler_lines:
+            for surface, x in zip(row, (10, 150, 205, 260)):
+                self.dirty_rects.append(self.screen.blit(surface, (x, y)))
+            y += 16
+    
+    def update_background(self):
+        """
+        Rebuild the static layer (range rings, labels, compass rose, debug grid)
+        only when the view changes. Returns True if it was rebuilt.
+        """
+        key = (self.zoom_level, self.pan_x, self.pan_y, self.debug_mode, self.width, self.height)
+        if key == self.background_key:
+            return False
+        
+        self.background.fill(self.BLACK)
+        self.phosphor.clear()
+        self.draw_range_rings(self.background)
+        self.draw_compass_rose(self.background)
+        if self.debug_mode:
+            self.draw_debug_grid(self.background)
+        self.background_key = key
+        return True
+    
+    def draw_frame(self):
+        """
+        Composite the dynamic layers over the cached background and push only
+        the regions that changed since the last frame to the display.
+        """
+        with PROFILER.timer('update_background'):
+            rebuilt = self.update_background()
+        if rebuilt:
+            self.screen.blit(self.background, (0, 0))
+            full_redraw = True
+        else:
+            for rect in self.prev_dirty_rects:
+                self.screen.blit(self.background, rect, rect)
+            full_redraw = False
         
+        self.dirty_rects = []
+        with PROFILER.timer('draw_aircraft'):
+            self.draw_aircraft()
+        with PROFILER.timer('draw_sweep_line'):
+            self.draw_sweep_line()
+        with PROFILER.timer('draw_status_info'):
+            self.draw_status_info()
+        if self.show_profiler:
+            self.draw_profiler_hud()
         
-        zoom_controls = "+/-: Zoom | Mouse: Pan | R: Reset | Wheel: Zoom at Point"
-        zoom_controls_surface = font.render(zoom_controls, True, self.WHITE)
-        self.screen.blit(zoom_controls_surface, (10, 110))
+        # what has to reach the display: everything after a rebuild, else old and new dirty regions
+        self.changed_rects = None if full_redraw else self.prev_dirty_rects + self.dirty_rects
+        self.prev_dirty_rects = self.dirty_rects
+        if self.headless or self.embedded:
+            return
+        with PROFILER.timer('flip'):
+            if self.changed_rects is None:
+                pygame.display.flip()
+            else:
+                pygame.display.update(self.changed_rects)
+    
+    def handle_event(self, event):
+        """Process one pygame event. Returns False when the display should close."""
+        if event.type in (pygame.KEYDOWN, pygame.MOUSEBUTTONDOWN, pygame.MOUSEWHEEL) or (
+                event.type == pygame.MOUSEMOTION and self.is_panning):
+            self.scheduler.note_activity()
+            if event.type != pygame.MOUSEMOTION:
+                self.flight_data.poll_now()
+        
+        if event.type == pygame.QUIT:
+            return False
+        elif event.type in (pygame.WINDOWHIDDEN, pygame.WINDOWMINIMIZED):
+            self.scheduler.set_visible(False)
+        elif event.type in (pygame.WINDOWSHOWN, pygame.WINDOWRESTORED, pygame.WINDOWEXPOSED):
+            self.scheduler.set_visible(True)
+            self.background_key = None  # the window contents may be gone, redraw everything
+        elif event.type == pygame.WINDOWFOCUSLOST:
+            self.scheduler.set_focused(False)
+        elif event.type == pygame.WINDOWFOCUSGAINED:
+            self.scheduler.set_focused(True)
+        elif event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_ESCAPE:
+                return False
+            elif event.key == pygame.K_p:  
+                aircraft = self.snapshot.aircraft
+                if aircraft:
+                    print(f"\n=== Current Aircraft on Radar Display at {time.strftime('%H:%M:%S')} ===")
+                    for callsign, x, y in aircraft.values():
+                        distance_km = math.sqrt(x**2 + y**2) / 1000
+                        bearing = math.degrees(math.atan2(x, y)) % 1000
+                        print(f"📍 {callsign}: Radar X={x:.1f}m, Y={y:.1f}m | Distance: {distance_km:.1f}km | Bearing: {bearing:.1f}°")
+                    print(f"Total on radar: {len(aircraft)}")
+                else:
+                    print("No aircraft currently on radar display")
+                print("=" * 50)
+            elif event.key == pygame.K_i:  
+                self.show_profiler = not self.show_profiler
+                self.update_profiler_enabled()
+            elif event.key == pygame.K_d:  
+                self.debug_mode = not self.debug_mode
+                print(f"Debug mode: {'ON' if self.debug_mode else 'OFF'}")
+            elif event.key == pygame.K_w:  
+                self.wwii_mode = not self.wwii_mode
+                if self.wwii_mode:
+                    self.blips.clear()
+                    self.phosphor.clear()
+                print(f"WWII Radar Mode: {'ON' if self.wwii_mode else 'OFF'}")
+            elif event.key == pygame.K_PLUS or event.key == pygame.K_EQUALS:  
+                self.zoom_in()
+            elif event.key == pygame.K_MINUS:  
+                self.zoom_out()
+            elif event.key == pygame.K_r:  
+                self.reset_view()
+                print("View reset to default")
+            elif event.key == pygame.K_t:
+                self.show_trails = not self.show_trails
+                print(f"Trails: {'ON' if self.show_trails else 'OFF'}")
+            elif event.key == pygame.K_SPACE:
+                self.toggle_history_pause()
+            elif event.key in (pygame.K_LEFT, pygame.K_RIGHT):
+                seconds = HISTORY_SCRUB_SECONDS * (6 if event.mod & pygame.KMOD_SHIFT else 1)
+                self.scrub_history(-seconds if event.key == pygame.K_LEFT else seconds)
+            elif event.key == pygame.K_END:
+                self.go_live()
+        elif event.type == pygame.MOUSEBUTTONDOWN:
+            if event.button == 1:  
+                self.is_panning = True
+                self.last_mouse_pos = event.pos
+            elif event.button == 4:  
+                self.zoom_in_at_point(event.pos)
+            elif event.button == 5:  
+                self.zoom_out_at_point(event.pos)
+        elif event.type == pygame.MOUSEBUTTONUP:
+            if event.button == 1:  
+                self.is_panning = False
+        elif event.type == pygame.MOUSEMOTION:
+            if self.is_panning and self.last_mouse_pos:
+                dx = event.pos[0] - self.last_mouse_pos[0]
+                dy = event.pos[1] - self.last_mouse_pos[1]
+                self.pan_x += dx
+                self.pan_y += dy
+                self.last_mouse_pos = event.pos
+        return True
+    
+    def enter_history(self):
+        """Freeze the view on the newest recorded frame. Returns False if nothing is recorded yet."""
+        span = self.history.span()
+        if span is None:
+            print("No history recorded yet")
+            return False
+        self.history_time = span[1]
+        self.history_paused = True
+        return True
+    
+    def toggle_history_pause(self):
+        if self.history_time is None:
+            if self.enter_history():
+                print("Paused; live data keeps recording (Left/Right to scrub, END for live)")
+        else:
+            self.history_paused = not self.history_paused
+    
+    def scrub_history(self, seconds):
+        if self.history_time is None and not self.enter_history():
+            return
+        oldest, newest = self.history.span()
+        self.history_time = max(oldest, self.history_time + seconds)
+        if self.history_time > newest:
+            self.go_live()
+    
+    def go_live(self):
+        if self.history_time is not None:
+            print("Back to live")
+        self.history_time = None
+        self.history_paused = False
+        self.history_frame = None
+    
+    def history_snapshot(self, dt):
+        """
+        Snapshot of the history frame at history_time, advancing it by dt
+        unless paused. Playback that reaches the newest frame goes live.
+        """
+        if not self.history_paused:
+            self.history_time += dt
+            span = self.history.span()
+            if span is None or self.history_time >= span[1]:
+                self.go_live()
+                return self.snapshot
+        found = self.history_cursor.seek(self.history_time)
+        if found is None:
+            self.go_live()
+            return self.snapshot
+        frame_time, aircraft = found
+        if self.history_frame is None or self.history_frame[0] is not aircraft:
+            labels = np.empty(len(aircraft), dtype=object)
+            labels[:] = [label for label, x, y in aircraft.values()]
+            xs = np.fromiter((x for label, x, y in aircraft.values()), dtype=float, count=len(aircraft))
+            ys = np.fromiter((y for label, x, y in aircraft.values()), dtype=float, count=len(aircraft))
+            snapshot = TrafficSnapshot(-1, frame_time, aircraft, MotionSnapshot.stationary(xs, ys, labels),
+                                       TrailSnapshot.empty())
+            self.history_frame = (aircraft, snapshot)
+        return self.history_frame[1]
+    
+    def step(self, dt=1 / FPS):
+        """
+        Advance the sweep by dt seconds of real time and render the frame.
+        The default is one frame at full rate, which keeps benchmarks and
+        other fixed-step callers deterministic.
+        """
+        # after a long stall, resume as if one second had passed
+        dt = min(dt, 1.0)
+        # one reference per frame: everything drawn below comes from the same ingest
+        self.frame_snapshot = self.snapshot if self.history_time is None else self.history_snapshot(dt)
+        self.sweep_dt = dt
+        prev = self.sweep_angle
+        self.last_sweep_angle = prev
+        self.sweep_angle = (prev + self.sweep_rate * dt) % 360
+        if prev > self.sweep_angle:  
+            self.sweep_cycle += 1
+        if self.wwii_mode:
+            with PROFILER.timer('update_wwii_blips'):
+                self.update_wwii_blips(max(1, round(dt * FPS)))
+
+        self.draw_frame()
     
     def run(self):
         
         running = True
         
-        while running:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    running = False
-                elif event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_ESCAPE:
+        last_frame = time.perf_counter()
+        try:
+            while running:
+                for event in pygame.event.get():
+                    if not self.handle_event(event):
                         running = False
-                    elif event.key == pygame.K_p:  
-                        with self.data_lock:
-                            if self.aircraft_data:
-                                print(f"\n=== Current Aircraft on Radar Display at {time.strftime('%H:%M:%S')} ===")
-                                for callsign, x, y in self.aircraft_data:
-                                    distance_km = math.sqrt(x**2 + y**2) / 1000
-                                    bearing = math.degrees(math.atan2(x, y)) % 1000
-                                    print(f"📍 {callsign}: Radar X={x:.1f}m, Y={y:.1f}m | Distance: {distance_km:.1f}km | Bearing: {bearing:.1f}°")
-                                print(f"Total on radar: {len(self.aircraft_data)}")
-                            else:
-                                print("No aircraft currently on radar display")
-                            print("=" * 50)
-                    elif event.key == pygame.K_d:  
-                        self.debug_mode = not self.debug_mode
-                        print(f"Debug mode: {'ON' if self.debug_mode else 'OFF'}")
-                    elif event.key == pygame.K_w:  
-                        self.wwii_mode = not self.wwii_mode
-                        if self.wwii_mode:
-                            self.blips = []  
-                        print(f"WWII Radar Mode: {'ON' if self.wwii_mode else 'OFF'}")
-                    elif event.key == pygame.K_PLUS or event.key == pygame.K_EQUALS:  
-                        self.zoom_in()
-                    elif event.key == pygame.K_MINUS:  
-                        self.zoom_out()
-                    elif event.key == pygame.K_r:  
-                        self.reset_view()
-                        print("View reset to default")
-                elif event.type == pygame.MOUSEBUTTONDOWN:
-                    if event.button == 1:  
-                        self.is_panning = True
-                        self.last_mouse_pos = event.pos
-                    elif event.button == 4:  
-                        self.zoom_in_at_point(event.pos)
-                    elif event.button == 5:  
-                        self.zoom_out_at_point(event.pos)
-                elif event.type == pygame.MOUSEBUTTONUP:
-                    if event.button == 1:  
-                        self.is_panning = False
-                elif event.type == pygame.MOUSEMOTION:
-                    if self.is_panning and self.last_mouse_pos:
-                        dx = event.pos[0] - self.last_mouse_pos[0]
-                        dy = event.pos[1] - self.last_mouse_pos[1]
-                        self.pan_x += dx
-                        self.pan_y += dy
-                        self.last_mouse_pos = event.pos
-            
-            prev = self.sweep_angle
-            self.last_sweep_angle = prev
-            self.sweep_angle = (prev + self.sweep_speed) % 360
-            if prev > self.sweep_angle:  
-                self.sweep_cycle += 1
-            if self.wwii_mode:
-                self.update_wwii_blips()
-
-            self.screen.fill(self.BLACK)
-
-            self.draw_range_rings()
-            self.draw_compass_rose()
-            if self.debug_mode:
-                self.draw_debug_grid()
-            self.draw_aircraft()
-            self.draw_sweep_line()
-            self.draw_status_info()
+                if self.frame_server:
+                    self.scheduler.set_viewers(bool(self.frame_server.clients))
+                
+                fps = self.scheduler.target_fps()
+                if not fps:
+                    # hidden: only keep handling events until the window comes back
+                    self.clock.tick(PAUSED_EVENT_RATE)
+                    last_frame = time.perf_counter()
+                    continue
+                
+                now = time.perf_counter()
+                self.step(now - last_frame)
+                last_frame = now
+                if self.frame_server:
+                    self.frame_server.publish(self.screen)
+                frame_ms = self.clock.tick(fps)
+                if PROFILER.enabled:
+                    PROFILER.record('frame_interval', frame_ms / 1000)
+                    if frame_ms > 1500 / fps:
+                        PROFILER.count('dropped_frames')
+        except KeyboardInterrupt:
+            # headless mode has no window to close
+            pass
+        
+        self.close()
+    
+    def close(self):
+        if self.ingest is None:
+            self.flight_data.stop()
+        if self.decoder:
+            self.decoder.close()
+        if self.recorder:
+            self.recorder.close()
+        if self.frame_server:
+            self.frame_server.stop()
+        if self.metrics_server:
+            self.metrics_server.stop()
+        if self.metrics_csv:
+            self.metrics_csv.stop()
+        if not self.embedded:
+            pygame.quit()
 
-            pygame.display.flip()
-            self.clock.tick(FPS)
-        
+class MultiViewDisplay:
+    """
+    Several RadarDisplay views tiled left to right in one window, all fed
+    by one SharedIngest: one fetch per poll and one projection per distinct
+    radar center, however many views there are. Mouse and keyboard input go
+    to the view under the pointer; the first view serves the metrics.
+    """
+    def __init__(self, specs, flight_data=None, headless=HEADLESS, view_width=VIEW_WIDTH, view_height=VIEW_HEIGHT):
+        self.headless = headless
+        if headless:
+            os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+        pygame.init()
+        self.screen = pygame.display.set_mode([view_width * len(specs), view_height])
+        pygame.display.set_caption("WWII Radar Display - " + " / ".join(spec.name for spec in specs))
+        self.clock = pygame.time.Clock()
+        self.tiles = [pygame.Rect(i * view_width, 0, view_width, view_height) for i in range(len(specs))]
+        
+        self.flight_data = flight_data if flight_data is not None else open_flight_data(autostart=False)
+        default_center = RADAR_CENTER
+        if flight_data is None and REPLAY_PATH and default_center[0] is None and self.flight_data.log.center:
+            default_center = self.flight_data.log.center
+        self.ingest = SharedIngest(self.flight_data)
+        self.views = [RadarDisplay(view_width, view_height, headless=headless, radar_center=spec.center or default_center,
+                                   max_range_km=spec.max_range_km, ingest=self.ingest,
+                                   surface=self.screen.subsurface(tile), name=spec.name, metrics=i == 0)
+                      for i, (spec, tile) in enumerate(zip(specs, self.tiles))]
+        self.focus = 0
+        self.panning_view = None
+        self.frame_server = FrameServer(FRAME_SERVER_PORT, FRAME_SERVER_HOST) if headless else None
+        self.recorder = Recorder(RECORD_PATH, default_center).attach(self.flight_data) if RECORD_PATH else None
+        if flight_data is None:
+            self.flight_data.start()
+    
+    def view_at(self, pos):
+        for i, tile in enumerate(self.tiles):
+            if tile.collidepoint(pos):
+                return i
+        return self.focus
+    
+    def handle_event(self, event):
+        """Route one pygame event. Returns False when the display should close."""
+        if event.type in (pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP, pygame.MOUSEMOTION):
+            # a drag stays with the view it started in
+            i = self.panning_view if self.panning_view is not None else self.view_at(event.pos)
+            if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                self.panning_view = i
+            elif event.type == pygame.MOUSEBUTTONUP and event.button == 1:
+                self.panning_view = None
+            self.focus = i
+            left, top = self.tiles[i].topleft
+            local = pygame.event.Event(event.type, dict(event.dict, pos=(event.pos[0] - left, event.pos[1] - top)))
+            return self.views[i].handle_event(local)
+        if event.type in (pygame.KEYDOWN, pygame.KEYUP, pygame.MOUSEWHEEL):
+            return self.views[self.focus].handle_event(event)
+        # quit and window events concern every view
+        return all([view.handle_event(event) for view in self.views])
+    
+    def step(self, dt=1 / FPS):
+        """Render every view and push the regions they changed"""
+        rects = []
+        for view, tile in zip(self.views, self.tiles):
+            view.step(dt)
+            if view.changed_rects is None:
+                rects.append(tile)
+            else:
+                rects.extend(rect.move(tile.topleft) for rect in view.changed_rects)
+        if self.headless:
+            return
+        with PROFILER.timer('flip'):
+            pygame.display.update(rects)
+    
+    def run(self):
+        running = True
+        last_frame = time.perf_counter()
+        try:
+            while running:
+                for event in pygame.event.get():
+                    if not self.handle_event(event):
+                        running = False
+                if self.frame_server:
+                    viewers = bool(self.frame_server.clients)
+                    for view in self.views:
+                        view.scheduler.set_viewers(viewers)
+                
+                fps = max(view.scheduler.target_fps() for view in self.views)
+                if not fps:
+                    self.clock.tick(PAUSED_EVENT_RATE)
+                    last_frame = time.perf_counter()
+                    continue
+                
+                now = time.perf_counter()
+                self.step(now - last_frame)
+                last_frame = now
+                if self.frame_server:
+                    self.frame_server.publish(self.screen)
+                frame_ms = self.clock.tick(fps)
+                if PROFILER.enabled:
+                    PROFILER.record('frame_interval', frame_ms / 1000)
+                    if frame_ms > 1500 / fps:
+                        PROFILER.count('dropped_frames')
+        except KeyboardInterrupt:
+            pass
+        
+        self.close()
+    
+    def close(self):
         self.flight_data.stop()
+        for view in self.views:
+            view.close()
+        if self.recorder:
+            self.recorder.close()
+        if self.frame_server:
+            self.frame_server.stop()
         pygame.quit()
 
 if __name__ == "__main__":
-    radar = RadarDisplay()
+    if RADAR_VIEWS:
+        radar = MultiViewDisplay([ViewSpec.parse(text) for text in RADAR_VIEWS])
+    else:
+        radar = RadarDisplay()
     radar.run()
 
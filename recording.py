@@ -0,0 +1,413 @@
+"""
+Capture what the receiver served and play it back offline.
+
+A log is a short header followed by one frame per snapshot. Each frame is a
+fixed header, the strings (hex codes, callsigns) first seen in that frame,
+and the aircraft as fixed-width columns, so a reader can map the file and
+view every column of a frame without copying it:
+
+    header   MAGIC, version, center lat/lon (NaN if unknown)
+    frame    'SNAP', timestamp, aircraft count, new string count, body size
+             new strings: u8 length + utf-8 bytes each, padded to 4 bytes
+             u32 hex id, u32 flight id, i32 lat/lon (1e-6 degrees), i32 altitude
+             u16 track (0.01 degrees), u16 gs (0.1 knots), u16 seen, u16 seen_pos (0.1 s)
+
+String ids count up from 0 across the whole file. Missing values are stored
+as the column's sentinel. A frame cut short by a crash is ignored on replay.
+
+    python recording.py record capture.rlog     # from PIAWARE until Ctrl-C
+    python recording.py info capture.rlog
+    python recording.py json capture.rlog 1700000000.5
+"""
+import json
+import math
+import mmap
+import struct
+import sys
+import time
+from bisect import bisect_left
+from threading import Lock, Event
+import numpy as np
+from get_data import FlightData
+from state import Delta
+from metrics import PROFILER
+from config import REPLAY_SPEED
+
+MAGIC = b'RADRLOG\x00'
+VERSION = 1
+FILE_HEADER = struct.Struct('<8sHdd')
+FRAME_HEADER = struct.Struct('<4sdIII')
+FRAME_TAG = b'SNAP'
+
+NO_STRING = 0xFFFFFFFF
+NO_COORD = -2 ** 31
+NO_ALTITUDE = -2 ** 31
+GROUND = -2 ** 31 + 1
+NO_U16 = 0xFFFF
+
+INT32_COLUMNS = (('hex', np.uint32), ('flight', np.uint32), ('lat', np.int32),
+                 ('lon', np.int32), ('alt_baro', np.int32))
+UINT16_COLUMNS = ('track', 'gs', 'seen', 'seen_pos')
+RECORD_SIZE = 4 * len(INT32_COLUMNS) + 2 * len(UINT16_COLUMNS)
+
+
+def _scaled(value, scale, limit, missing):
+    if value is None:
+        return missing
+    try:
+        value = round(float(value) * scale)
+    except (TypeError, ValueError):
+        return missing
+    return min(max(value, 0), limit)
+
+
+class Recorder:
+    """
+    Appends snapshots to a log. Subscribe record() to a FlightData (attach()
+    does this) and every published snapshot is written with its wall-clock
+    timestamp; the file is flushed after each frame so a crash loses at most
+    the frame being written.
+    """
+
+    def __init__(self, path, center=None):
+        self.path = path
+        self.file = open(path, 'wb')
+        self.lock = Lock()
+        self.strings = {}
+        self.frames = 0
+        self.records = 0
+        try:
+            lat, lon = float(center[0]), float(center[1])
+        except (TypeError, ValueError, IndexError):
+            lat = lon = math.nan
+        self.file.write(FILE_HEADER.pack(MAGIC, VERSION, lat, lon))
+        self.bytes_written = FILE_HEADER.size
+
+    def attach(self, flight_data):
+        flight_data.subscribe(self.record)
+        return self
+
+    def _intern(self, text, new_strings):
+        if text is None:
+            return NO_STRING
+        string_id = self.strings.get(text)
+        if string_id is None:
+            string_id = len(self.strings)
+            self.strings[text] = string_id
+            new_strings.append(text)
+        return string_id
+
+    def record(self, snapshot, timestamp=None):
+        timestamp = time.time() if timestamp is None else timestamp
+        with PROFILER.timer('record'), self.lock:
+            if self.file is None:
+                return
+            new_strings = []
+            columns = {name: [] for name, _ in INT32_COLUMNS}
+            columns.update((name, []) for name in UINT16_COLUMNS)
+            for ac in snapshot:
+                columns['hex'].append(self._intern(ac.get('hex'), new_strings))
+                columns['flight'].append(self._intern(ac.get('flight'), new_strings))
+                lat, lon = ac.get('lat'), ac.get('lon')
+                if lat is None or lon is None:
+                    lat = lon = NO_COORD
+                else:
+                    lat, lon = round(lat * 1e6), round(lon * 1e6)
+                columns['lat'].append(lat)
+                columns['lon'].append(lon)
+                altitude = ac.get('alt_baro', ac.get('altitude'))
+                if altitude == 'ground':
+                    altitude = GROUND
+                elif not isinstance(altitude, (int, float)):
+                    altitude = NO_ALTITUDE
+                columns['alt_baro'].append(int(altitude))
+                columns['track'].append(_scaled(ac.get('track'), 100, 35999, NO_U16))
+                columns['gs'].append(_scaled(ac.get('gs'), 10, NO_U16 - 1, NO_U16))
+                columns['seen'].append(_scaled(ac.get('seen'), 10, NO_U16 - 1, NO_U16))
+                columns['seen_pos'].append(_scaled(ac.get('seen_pos'), 10, NO_U16 - 1, NO_U16))
+
+            strings = bytearray()
+            for text in new_strings:
+                encoded = text.encode('utf-8')[:255]
+                strings.append(len(encoded))
+                strings += encoded
+            strings += b'\x00' * (-len(strings) % 4)
+
+            body = [bytes(strings)]
+            body += [np.array(columns[name], dtype=dtype).tobytes() for name, dtype in INT32_COLUMNS]
+            body += [np.array(columns[name], dtype=np.uint16).tobytes() for name in UINT16_COLUMNS]
+            size = sum(len(part) for part in body)
+
+            self.file.write(FRAME_HEADER.pack(FRAME_TAG, timestamp, len(snapshot), len(new_strings), size))
+            for part in body:
+                self.file.write(part)
+            self.file.flush()
+            self.frames += 1
+            self.records += len(snapshot)
+            self.bytes_written += FRAME_HEADER.size + size
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+
+class RecordingReader:
+    """
+    Memory-maps a log and indexes its frames. Opening walks the frame
+    headers once to collect timestamps, offsets and the string table;
+    frame(i) then views the columns straight out of the map.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'rb')
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, lat, lon = FILE_HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a radar recording")
+        if version != VERSION:
+            raise ValueError(f"{path} has unsupported recording version {version}")
+        self.center = None if math.isnan(lat) else (lat, lon)
+
+        self.strings = []
+        self.offsets = []
+        timestamps = []
+        self.counts = []
+        pos = FILE_HEADER.size
+        end = len(self.map)
+        while pos + FRAME_HEADER.size <= end:
+            tag, timestamp, count, string_count, size = FRAME_HEADER.unpack_from(self.map, pos)
+            body = pos + FRAME_HEADER.size
+            if tag != FRAME_TAG or body + size > end:
+                break
+            string_pos = body
+            for _ in range(string_count):
+                length = self.map[string_pos]
+                self.strings.append(self.map[string_pos + 1:string_pos + 1 + length].decode('utf-8'))
+                string_pos += 1 + length
+            self.offsets.append((string_pos + (-(string_pos - body) % 4), count))
+            timestamps.append(timestamp)
+            self.counts.append(count)
+            pos = body + size
+        self.timestamps = timestamps
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    @property
+    def start_time(self):
+        return self.timestamps[0] if self.timestamps else None
+
+    @property
+    def end_time(self):
+        return self.timestamps[-1] if self.timestamps else None
+
+    def index_at(self, timestamp):
+        """Index of the first frame at or after timestamp (clamped to the last frame)"""
+        return min(bisect_left(self.timestamps, timestamp), max(len(self) - 1, 0))
+
+    def columns(self, index):
+        """Read-only numpy views of frame index's columns, keyed by field name"""
+        pos, count = self.offsets[index]
+        columns = {}
+        for name, dtype in INT32_COLUMNS:
+            columns[name] = np.frombuffer(self.map, dtype=dtype, count=count, offset=pos)
+            pos += 4 * count
+        for name in UINT16_COLUMNS:
+            columns[name] = np.frombuffer(self.map, dtype=np.uint16, count=count, offset=pos)
+            pos += 2 * count
+        return columns
+
+    def frame(self, index):
+        """Frame index decoded back into aircraft.json style dicts"""
+        columns = self.columns(index)
+        strings = self.strings
+        hexes = columns['hex'].tolist()
+        flights = columns['flight'].tolist()
+        lats = columns['lat'].tolist()
+        lons = columns['lon'].tolist()
+        altitudes = columns['alt_baro'].tolist()
+        tracks = columns['track'].tolist()
+        speeds = columns['gs'].tolist()
+        seens = columns['seen'].tolist()
+        seen_positions = columns['seen_pos'].tolist()
+
+        aircraft = []
+        for i in range(len(hexes)):
+            ac = {}
+            if hexes[i] != NO_STRING:
+                ac['hex'] = strings[hexes[i]]
+            if flights[i] != NO_STRING:
+                ac['flight'] = strings[flights[i]]
+            if altitudes[i] == GROUND:
+                ac['alt_baro'] = 'ground'
+            elif altitudes[i] != NO_ALTITUDE:
+                ac['alt_baro'] = altitudes[i]
+            if speeds[i] != NO_U16:
+                ac['gs'] = speeds[i] / 10
+            if tracks[i] != NO_U16:
+                ac['track'] = tracks[i] / 100
+            if lats[i] != NO_COORD:
+                ac['lat'] = lats[i] / 1e6
+                ac['lon'] = lons[i] / 1e6
+            if seens[i] != NO_U16:
+                ac['seen'] = seens[i] / 10
+            if seen_positions[i] != NO_U16:
+                ac['seen_pos'] = seen_positions[i] / 10
+            aircraft.append(ac)
+        return aircraft
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+
+class ReplayFlightData(FlightData):
+    """
+    Plays a recording back as a FlightData. speed is a multiple of real time
+    (1.0 for 1x, 10 for 10x); 0 or None publishes frames as fast as
+    subscribers take them. seek() jumps to a recorded timestamp: everything
+    on screen is published as removed and playback resumes from there.
+
+    With autostart=False nothing runs in the background and each
+    update_data() call publishes the next frame, which is what benchmarks want.
+    """
+
+    def __init__(self, path, speed=REPLAY_SPEED, loop=False, autostart=True):
+        super().__init__(update_interval=1.0, url=f'replay://{path}', autostart=False)
+        self.log = RecordingReader(path)
+        self.speed = speed
+        self.loop = loop
+        self.position = 0
+        self.replay_time = None
+        self.pending_seek = None
+        self.wake = Event()
+        self.finished = False
+        if autostart:
+            self.start()
+
+    def _run(self):
+        anchor = None
+        while self.running:
+            if self.pending_seek is not None:
+                anchor = None
+            if self.position >= len(self.log) and self.loop and self.pending_seek is None:
+                self.position = 0
+                anchor = None
+            if self.position >= len(self.log) and self.pending_seek is None:
+                self.finished = True
+                self.wake.wait()
+                self.wake.clear()
+                continue
+
+            if self.speed and anchor is not None:
+                due = anchor[0] + (self.log.timestamps[self.position] - anchor[1]) / self.speed
+                delay = due - time.time()
+                if delay > 0:
+                    self.wake.wait(delay)
+                    self.wake.clear()
+                    continue
+
+            self.update_data()
+            if anchor is None and self.replay_time is not None:
+                anchor = (time.time(), self.replay_time)
+            if not self.speed:
+                time.sleep(0)
+
+    def update_data(self):
+        """
+        Publish the next recorded frame. Returns False at the end of the log;
+        a raising subscriber is counted and logged, and playback carries on.
+        """
+        if self.pending_seek is not None:
+            self._apply_seek()
+        if self.position >= len(self.log):
+            return False
+        index = self.position
+        self.position += 1
+        with PROFILER.timer('decode'):
+            aircraft = self.log.frame(index)
+        self.stats['fetches'] += 1
+        self.stats['bytes_fetched'] += self.log.counts[index] * RECORD_SIZE
+        self.replay_time = self.log.timestamps[index]
+        with self.lock:
+            self.data = aircraft
+            snapshot = list(self.data)
+        try:
+            self._publish(snapshot)
+        except Exception as e:
+            self.stats['errors'] += 1
+            print(f"[FlightData ERROR] replaying frame {index}: {e!r}")
+        return True
+
+    def seek(self, timestamp):
+        """Continue playback from the first frame at or after timestamp"""
+        self.pending_seek = timestamp
+        self.wake.set()
+
+    def _apply_seek(self):
+        timestamp, self.pending_seek = self.pending_seek, None
+        self.position = self.log.index_at(timestamp)
+        self.finished = False
+        removed = list(self.store.records.values())
+        self.store.records.clear()
+        if removed:
+            delta = Delta([], [], removed, time.time())
+            for callback in self.delta_subscribers:
+                callback(delta)
+
+    def stop(self):
+        self.running = False
+        self.wake.set()
+        super().stop()
+        self.log.close()
+
+
+def print_info(path):
+    log = RecordingReader(path)
+    if not len(log):
+        print(f"{path}: no frames")
+        return
+    size = len(log.map)
+    records = sum(log.counts)
+    json_size = sum(len(json.dumps({'now': log.timestamps[i], 'aircraft': log.frame(i)}))
+                    for i in range(len(log)))
+    print(f"{path}")
+    print(f"  frames:      {len(log)}")
+    print(f"  span:        {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(log.start_time))}"
+          f" + {log.end_time - log.start_time:.1f}s")
+    print(f"  aircraft:    {records} records, {len(log.strings)} strings")
+    print(f"  center:      {log.center}")
+    print(f"  size:        {size} bytes ({size / max(records, 1):.1f} per record)")
+    print(f"  as JSON:     {json_size} bytes ({json_size / size:.1f}x larger)")
+    log.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3 or sys.argv[1] not in ('record', 'info', 'json'):
+        print(__doc__.split('\n\n')[-1])
+        sys.exit(1)
+    command, path = sys.argv[1], sys.argv[2]
+    if command == 'record':
+        from config import RADAR_CENTER, FLIGHT_DATA_UPDATE_INTERVAL
+        recorder = Recorder(path, RADAR_CENTER)
+        flight_data = FlightData(update_interval=FLIGHT_DATA_UPDATE_INTERVAL, autostart=False)
+        recorder.attach(flight_data)
+        flight_data.start()
+        print(f"Recording to {path}, Ctrl-C to stop")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+        flight_data.stop()
+        recorder.close()
+        print(f"{recorder.frames} frames, {recorder.records} aircraft, {recorder.bytes_written} bytes")
+    elif command == 'info':
+        print_info(path)
+    else:
+        log = RecordingReader(path)
+        index = log.index_at(float(sys.argv[3])) if len(sys.argv) > 3 else 0
+        print(json.dumps({'now': log.timestamps[index], 'aircraft': log.frame(index)}, indent=1))
@@ -0,0 +1,62 @@
+import time
+from config import FPS, IDLE_FPS, IDLE_AFTER, PAUSE_WHEN_UNFOCUSED
+
+
+class FrameScheduler:
+    """
+    Picks the render rate for each frame. The display runs at active_fps
+    while someone is interacting or traffic is changing, drops to idle_fps
+    once idle_after seconds pass with neither, and stops rendering (target
+    0) while the window is hidden, or unfocused if pause_unfocused is set.
+    Input, new or lost aircraft, and the window coming back all restore
+    the full rate immediately.
+    """
+
+    def __init__(self, active_fps=FPS, idle_fps=IDLE_FPS, idle_after=IDLE_AFTER,
+                 pause_unfocused=PAUSE_WHEN_UNFOCUSED):
+        self.active_fps = active_fps
+        self.idle_fps = idle_fps
+        self.idle_after = idle_after
+        self.pause_unfocused = pause_unfocused
+        self.last_activity = time.monotonic()
+        self.visible = True
+        self.focused = True
+        self.viewers = True
+
+    def note_activity(self, now=None):
+        """Input or new traffic: back to the full frame rate"""
+        self.last_activity = time.monotonic() if now is None else now
+
+    def set_visible(self, visible):
+        if visible and not self.visible:
+            self.note_activity()
+        self.visible = visible
+
+    def set_focused(self, focused):
+        if focused and not self.focused:
+            self.note_activity()
+        self.focused = focused
+
+    def set_viewers(self, viewers):
+        """Headless mode: whether anyone is watching the stream"""
+        if viewers and not self.viewers:
+            self.note_activity()
+        self.viewers = viewers
+
+    @property
+    def paused(self):
+        return not self.visible or (self.pause_unfocused and not self.focused)
+
+    def idle(self, now=None):
+        now = time.monotonic() if now is None else now
+        return not self.viewers or now - self.last_activity > self.idle_after
+
+    def target_fps(self, now=None):
+        if self.paused:
+            return 0
+        return self.idle_fps if self.idle(now) else self.active_fps
+
+    def mode(self, now=None):
+        if self.paused:
+            return 'paused'
+        return 'idle' if self.idle(now) else 'active'
@@ -0,0 +1,32 @@
+from types import MappingProxyType
+
+
+class TrafficSnapshot:
+    """
+    Everything the renderer draws from, as of one ingest. Snapshots are
+    never modified after they are built: ingest publishes a new one by
+    replacing a single attribute, which is atomic, so the renderer takes
+    a reference once per frame and draws without holding any lock.
+    generation counts publications, so readers can tell cheaply whether
+    anything changed since the snapshot they last looked at; frames played
+    back from history have generation -1.
+
+        aircraft   read-only mapping of hex -> (label, x, y), radar meters
+        motion     motion.MotionSnapshot for dead-reckoned positions
+        trails     trails.TrailSnapshot
+    """
+
+    __slots__ = ('generation', 'timestamp', 'aircraft', 'motion', 'trails')
+
+    def __init__(self, generation, timestamp, aircraft, motion, trails):
+        self.generation = generation
+        self.timestamp = timestamp
+        self.aircraft = MappingProxyType(aircraft)
+        self.motion = motion
+        self.trails = trails
+
+    def __len__(self):
+        return len(self.aircraft)
+
+    def __repr__(self):
+        return f"TrafficSnapshot(generation={self.generation}, aircraft={len(self.aircraft)})"
@@ -0,0 +1,122 @@
+import time
+from collections import OrderedDict
+from config import STATE_MAX_AGE
+
+
+class AircraftRecord:
+    """Compact per-aircraft state, keyed by ICAO hex in AircraftStore"""
+
+    __slots__ = ('hex', 'flight', 'lat', 'lon', 'altitude', 'track', 'gs',
+                 'last_seen', 'position_time')
+
+    def __init__(self, icao):
+        self.hex = icao
+        self.flight = ''
+        self.lat = None
+        self.lon = None
+        self.altitude = None
+        self.track = None
+        self.gs = None
+        self.last_seen = 0.0
+        self.position_time = None
+
+    @property
+    def label(self):
+        """Callsign if the aircraft has sent one, otherwise its hex code"""
+        return self.flight or self.hex.upper()
+
+    def has_position(self):
+        return self.lat is not None and self.lon is not None
+
+
+class Delta:
+    """Records added, updated and removed by one AircraftStore.update call"""
+
+    __slots__ = ('added', 'updated', 'removed', 'timestamp')
+
+    def __init__(self, added, updated, removed, timestamp):
+        self.added = added
+        self.updated = updated
+        self.removed = removed
+        self.timestamp = timestamp
+
+    def __bool__(self):
+        return bool(self.added or self.updated or self.removed)
+
+    def __repr__(self):
+        return f"Delta(+{len(self.added)} ~{len(self.updated)} -{len(self.removed)})"
+
+
+class AircraftStore:
+    """
+    Keeps one AircraftRecord per aircraft across snapshots and turns each new
+    snapshot into a Delta. Records only count as updated when something the
+    display uses (position, callsign, altitude, track, speed) changed.
+    Aircraft that stop being reported are evicted once their last message is
+    older than max_age; records are kept in last-seen order so eviction only
+    touches the stale ones.
+    """
+
+    def __init__(self, max_age=STATE_MAX_AGE):
+        self.max_age = max_age
+        self.records = OrderedDict()
+
+    def __len__(self):
+        return len(self.records)
+
+    def update(self, snapshot, now=None):
+        now = time.time() if now is None else now
+        added = []
+        updated = []
+
+        for ac in snapshot:
+            # feeds without ICAO addresses fall back to the callsign as the key
+            icao = ac.get('hex') or ('~' + (ac.get('flight') or '').strip())
+            if icao == '~':
+                continue
+            if ac.get('seen', 0) > self.max_age:
+                continue
+            icao = icao.lower()
+            record = self.records.get(icao)
+            is_new = record is None
+            if is_new:
+                record = AircraftRecord(icao)
+                self.records[icao] = record
+
+            last_seen = now - ac.get('seen', 0)
+            if last_seen > record.last_seen:
+                record.last_seen = last_seen
+                self.records.move_to_end(icao)
+
+            flight = (ac.get('flight') or '').strip()
+            lat = ac.get('lat')
+            lon = ac.get('lon')
+            altitude = ac.get('alt_baro', ac.get('altitude', ac.get('alt')))
+            track = ac.get('track')
+            gs = ac.get('gs', ac.get('speed'))
+            if (is_new or lat != record.lat or lon != record.lon or flight != record.flight
+                    or altitude != record.altitude or track != record.track or gs != record.gs):
+                record.flight = flight
+                record.lat = lat
+                record.lon = lon
+                record.altitude = altitude
+                record.track = track
+                record.gs = gs
+                if lat is not None:
+                    record.position_time = now - ac.get('seen_pos', ac.get('seen', 0))
+                (added if is_new else updated).append(record)
+
+        removed = self.evict(now)
+        return Delta(added, updated, removed, now)
+
+    def evict(self, now=None):
+        """Drop records not heard from in max_age seconds; returns them"""
+        now = time.time() if now is None else now
+        removed = []
+        while self.records:
+            icao, record = next(iter(self.records.items()))
+            if now - record.last_seen <= self.max_age:
+                break
+            del self.records[icao]
+            removed.append(record)
+        return removed
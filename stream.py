@@ -0,0 +1,365 @@
+import math
+import random
+import socket
+import time
+from get_data import FlightData
+from config import (STREAM_PUBLISH_INTERVAL, STREAM_MAX_AGE, STREAM_CPR_MAX_GAP,
+                    FLIGHT_DATA_BACKOFF_MAX)
+
+CALLSIGN_CHARSET = "#ABCDEFGHIJKLMNOPQRSTUVWXYZ##### ###############0123456789######"
+
+BEAST_ESCAPE = 0x1a
+# Beast frame type -> payload length (6 byte timestamp + 1 byte signal + message)
+BEAST_FRAME_LENGTHS = {0x31: 7 + 2, 0x32: 7 + 7, 0x33: 7 + 14}
+
+
+class SBSParser:
+    """
+    Incremental parser for dump1090's SBS-1 BaseStation output (port 30003).
+    feed() takes raw socket bytes and returns (hex, fields) updates for every
+    complete MSG line; partial lines are kept until the rest arrives.
+    """
+
+    def __init__(self):
+        self.buffer = b''
+
+    def feed(self, data):
+        self.buffer += data
+        *lines, self.buffer = self.buffer.split(b'\n')
+        updates = []
+        for line in lines:
+            update = self.parse_line(line.decode('ascii', 'replace').strip())
+            if update:
+                updates.append(update)
+        return updates
+
+    @staticmethod
+    def parse_line(line):
+        parts = line.split(',')
+        if len(parts) < 16 or parts[0] != 'MSG' or not parts[4]:
+            return None
+
+        fields = {}
+        if parts[10].strip():
+            fields['flight'] = parts[10].strip()
+        if parts[11]:
+            fields['alt_baro'] = _to_number(parts[11])
+        if parts[12]:
+            fields['gs'] = _to_number(parts[12])
+        if parts[13]:
+            fields['track'] = _to_number(parts[13])
+        if parts[14] and parts[15]:
+            fields['lat'] = _to_number(parts[14])
+            fields['lon'] = _to_number(parts[15])
+        if len(parts) > 17 and parts[17]:
+            fields['squawk'] = parts[17]
+        return parts[4].lower(), {k: v for k, v in fields.items() if v is not None}
+
+
+class BeastParser:
+    """
+    Incremental parser for the Beast binary format (port 30005).
+    Frames are <0x1a><type><6 byte timestamp><signal><message> with every 0x1a
+    inside the frame doubled. Only DF17/18 extended squitter messages are
+    decoded: identification, airborne position (CPR global decode from an
+    even/odd pair) and airborne velocity.
+    """
+
+    def __init__(self, cpr_max_gap=STREAM_CPR_MAX_GAP):
+        self.buffer = b''
+        self.cpr_max_gap = cpr_max_gap
+        self.cpr_frames = {}
+
+    def feed(self, data):
+        self.buffer += data
+        updates = []
+        for message in self._frames():
+            update = self.decode(message)
+            if update:
+                updates.append(update)
+        return updates
+
+    def _frames(self):
+        buf = self.buffer
+        i = 0
+        while True:
+            start = buf.find(BEAST_ESCAPE, i)
+            if start < 0:
+                self.buffer = b''
+                return
+            if start + 1 >= len(buf):
+                self.buffer = buf[start:]
+                return
+            frame_type = buf[start + 1]
+            length = BEAST_FRAME_LENGTHS.get(frame_type)
+            if length is None:
+                i = start + 1
+                continue
+
+            frame, i = _unescape(buf, start + 2, length)
+            if frame is None:
+                self.buffer = buf[start:]
+                return
+            if frame and frame_type in (0x32, 0x33):
+                yield frame[7:]
+
+    def decode(self, msg, now=None):
+        if len(msg) != 14 or (msg[0] >> 3) not in (17, 18):
+            return None
+        icao = msg[1:4].hex()
+        me = msg[4:11]
+        tc = me[0] >> 3
+        now = time.time() if now is None else now
+
+        if 1 <= tc <= 4:
+            bits = int.from_bytes(me[1:7], 'big')
+            chars = [CALLSIGN_CHARSET[(bits >> (42 - 6 * k)) & 0x3f] for k in range(8)]
+            return icao, {'flight': ''.join(chars).replace('#', '').strip()}
+
+        if 9 <= tc <= 18:
+            fields = {}
+            altitude = _decode_altitude(((me[1] << 4) | (me[2] >> 4)))
+            if altitude is not None:
+                fields['alt_baro'] = altitude
+            odd = (me[2] >> 2) & 1
+            lat_cpr = ((me[2] & 3) << 15) | (me[3] << 7) | (me[4] >> 1)
+            lon_cpr = ((me[4] & 1) << 16) | (me[5] << 8) | me[6]
+            frames = self.cpr_frames.setdefault(icao, [None, None])
+            frames[odd] = (lat_cpr, lon_cpr, now)
+            if frames[0] and frames[1] and abs(frames[0][2] - frames[1][2]) <= self.cpr_max_gap:
+                position = cpr_global_decode(frames[0][:2], frames[1][:2], odd)
+                if position:
+                    fields['lat'], fields['lon'] = position
+            return icao, fields
+
+        if tc == 19 and (me[0] & 7) in (1, 2):
+            v_ew = (((me[1] & 3) << 8) | me[2]) - 1
+            v_ns = (((me[3] & 0x7f) << 3) | (me[4] >> 5)) - 1
+            if v_ew < 0 or v_ns < 0:
+                return icao, {}
+            if (me[0] & 7) == 2:
+                v_ew *= 4
+                v_ns *= 4
+            vx = -v_ew if (me[1] >> 2) & 1 else v_ew
+            vy = -v_ns if (me[3] >> 7) & 1 else v_ns
+            return icao, {
+                'gs': math.hypot(vx, vy),
+                'track': math.degrees(math.atan2(vx, vy)) % 360,
+            }
+
+        return None
+
+    def forget(self, icao):
+        self.cpr_frames.pop(icao, None)
+
+
+def _unescape(buf, pos, length):
+    """
+    Read length unescaped bytes starting at pos.
+    Returns (frame, next_pos); frame is None if more data is needed, or b''
+    if a lone escape shows the frame was cut short (resync at next_pos).
+    """
+    frame = bytearray()
+    while len(frame) < length:
+        if pos >= len(buf):
+            return None, pos
+        byte = buf[pos]
+        if byte == BEAST_ESCAPE:
+            if pos + 1 >= len(buf):
+                return None, pos
+            if buf[pos + 1] != BEAST_ESCAPE:
+                return b'', pos
+            pos += 1
+        frame.append(byte)
+        pos += 1
+    return bytes(frame), pos
+
+
+def beast_frame(message, timestamp=0, signal=0):
+    """Wrap a raw Mode S message (bytes) in an escaped Beast frame"""
+    frame_type = {2: 0x31, 7: 0x32, 14: 0x33}[len(message)]
+    body = timestamp.to_bytes(6, 'big') + bytes([signal]) + message
+    return bytes([BEAST_ESCAPE, frame_type]) + body.replace(b'\x1a', b'\x1a\x1a')
+
+
+def _to_number(text):
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+def _decode_altitude(code):
+    """12-bit airborne altitude field, 25 ft encoding only"""
+    if not code & 0x10:
+        return None
+    n = ((code & 0xfe0) >> 1) | (code & 0xf)
+    return n * 25 - 1000
+
+
+def cpr_nl(lat):
+    """Number of longitude zones at a latitude"""
+    if lat == 0:
+        return 59
+    if abs(lat) == 87:
+        return 2
+    if abs(lat) > 87:
+        return 1
+    a = 1 - math.cos(math.pi / 30)
+    b = math.cos(math.pi / 180 * abs(lat)) ** 2
+    return int(math.floor(2 * math.pi / math.acos(1 - a / b)))
+
+
+def cpr_global_decode(even, odd, latest_odd):
+    """
+    Airborne CPR global decode from an (lat_cpr, lon_cpr) even/odd pair.
+    Returns (lat, lon) or None if the pair straddles a longitude zone boundary.
+    """
+    lat0, lon0 = even[0] / 131072, even[1] / 131072
+    lat1, lon1 = odd[0] / 131072, odd[1] / 131072
+
+    j = math.floor(59 * lat0 - 60 * lat1 + 0.5)
+    rlat0 = 360 / 60 * (j % 60 + lat0)
+    rlat1 = 360 / 59 * (j % 59 + lat1)
+    if rlat0 >= 270:
+        rlat0 -= 360
+    if rlat1 >= 270:
+        rlat1 -= 360
+    if cpr_nl(rlat0) != cpr_nl(rlat1):
+        return None
+
+    if latest_odd:
+        nl = cpr_nl(rlat1)
+        ni = max(nl - 1, 1)
+        m = math.floor(lon0 * (nl - 1) - lon1 * nl + 0.5)
+        lat, lon = rlat1, 360 / ni * (m % ni + lon1)
+    else:
+        nl = cpr_nl(rlat0)
+        ni = max(nl, 1)
+        m = math.floor(lon0 * (nl - 1) - lon1 * nl + 0.5)
+        lat, lon = rlat0, 360 / ni * (m % ni + lon0)
+
+    if lon >= 180:
+        lon -= 360
+    return lat, lon
+
+
+class StreamingFlightData(FlightData):
+    """
+    Push-based alternative to polling aircraft.json: keeps a TCP connection to
+    dump1090's SBS (30003) or Beast (30005) output open, folds each message
+    into per-aircraft state as it arrives, and publishes an aircraft.json-style
+    snapshot to subscribers at most every publish_interval seconds.
+    """
+
+    def __init__(self, host, port, fmt='sbs', publish_interval=STREAM_PUBLISH_INTERVAL,
+                 max_age=STREAM_MAX_AGE, autostart=True):
+        super().__init__(update_interval=publish_interval, autostart=False)
+        self.host = host
+        self.port = port
+        self.fmt = fmt
+        self.publish_interval = publish_interval
+        self.max_age = max_age
+        self.aircraft = {}
+        self.parser = None
+        self.dirty = False
+        self.last_publish = 0.0
+        self.stats.update({'connects': 0, 'messages': 0, 'bytes_received': 0})
+        if autostart:
+            self.start()
+
+    def _new_parser(self):
+        if self.fmt == 'beast':
+            return BeastParser()
+        if self.fmt == 'sbs':
+            return SBSParser()
+        raise ValueError(f"Unknown stream format: {self.fmt}")
+
+    def _run(self):
+        while self.running:
+            try:
+                self._stream()
+                ok = True
+            except OSError as e:
+                self.stats['errors'] += 1
+                if self.failures == 0:
+                    print(f"[FlightData ERROR] {self.host}:{self.port}: {e} (reconnecting)")
+                ok = False
+            self.stop_event.wait(self._next_reconnect_delay(ok))
+
+    def _next_reconnect_delay(self, ok):
+        if ok:
+            self.failures = 0
+            return 0.1
+        self.failures += 1
+        delay = min(FLIGHT_DATA_BACKOFF_MAX, 0.5 * 2 ** self.failures)
+        return delay * random.uniform(0.5, 1.0)
+
+    def _stream(self):
+        """Read one connection until it closes or stop() is called"""
+        self.parser = self._new_parser()
+        with socket.create_connection((self.host, self.port), timeout=5) as sock:
+            sock.settimeout(self.publish_interval)
+            self.stats['connects'] += 1
+            if self.failures:
+                print(f"[FlightData] Reconnected to {self.host}:{self.port}")
+                self.failures = 0
+            while self.running:
+                try:
+                    data = sock.recv(65536)
+                except socket.timeout:
+                    data = None
+                if data == b'':
+                    return
+                if data:
+                    self.stats['bytes_received'] += len(data)
+                    self.apply_updates(self.parser.feed(data))
+                self.maybe_publish()
+
+    def apply_updates(self, updates, now=None):
+        now = time.time() if now is None else now
+        for icao, fields in updates:
+            state = self.aircraft.get(icao)
+            if state is None:
+                state = {'hex': icao, 'last_seen': now, 'last_pos': None}
+                self.aircraft[icao] = state
+            state.update(fields)
+            state['last_seen'] = now
+            if 'lat' in fields:
+                state['last_pos'] = now
+            self.stats['messages'] += 1
+        if updates:
+            self.dirty = True
+
+    def maybe_publish(self, now=None):
+        now = time.time() if now is None else now
+        if now - self.last_publish < self.publish_interval:
+            return False
+        self.last_publish = now
+        expired = [icao for icao, state in self.aircraft.items() if now - state['last_seen'] > self.max_age]
+        for icao in expired:
+            del self.aircraft[icao]
+            if isinstance(self.parser, BeastParser):
+                self.parser.forget(icao)
+        if not self.dirty and not expired:
+            return False
+        self.dirty = False
+        self._publish_state(now)
+        return True
+
+    def _publish_state(self, now):
+        snapshot = []
+        for state in self.aircraft.values():
+            ac = {k: v for k, v in state.items() if k not in ('last_seen', 'last_pos')}
+            ac['seen'] = now - state['last_seen']
+            if state['last_pos'] is not None:
+                ac['seen_pos'] = now - state['last_pos']
+            snapshot.append(ac)
+        with self.lock:
+            self.data = snapshot
+        try:
+            self._publish(list(snapshot))
+        except Exception as e:
+            # a subscriber failing must not take the connection down with it
+            self.stats['errors'] += 1
+            print(f"[FlightData ERROR] publishing stream snapshot failed: {e!r}")
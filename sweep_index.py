@@ -0,0 +1,47 @@
+class SweepIndex:
+    """
+    Buckets targets by screen angle so the sweep only has to look at the
+    wedge it passed over since the last frame. Angles use the same convention
+    as draw_sweep_line: degrees counter-clockwise from east.
+    """
+
+    def __init__(self, bucket_degrees=1.0):
+        self.bucket_degrees = bucket_degrees
+        self.num_buckets = int(round(360 / bucket_degrees))
+        self.buckets = [[] for _ in range(self.num_buckets)]
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def rebuild(self, entries):
+        """entries: iterable of (angle, item)"""
+        buckets = [[] for _ in range(self.num_buckets)]
+        size = 0
+        for angle, item in entries:
+            angle %= 360
+            buckets[int(angle / self.bucket_degrees) % self.num_buckets].append((angle, item))
+            size += 1
+        self.buckets = buckets
+        self.size = size
+
+    def query(self, start, end):
+        """
+        Items whose angle lies in the half-open wedge (start, end], sweeping
+        counter-clockwise from start; wraps through 0 when end < start.
+        """
+        start %= 360
+        end %= 360
+        if start == end:
+            return []
+        span = (end - start) % 360
+
+        hits = []
+        first = int(start / self.bucket_degrees)
+        count = min(self.num_buckets, int(span / self.bucket_degrees) + 2)
+        for b in range(first, first + count):
+            for angle, item in self.buckets[b % self.num_buckets]:
+                offset = (angle - start) % 360
+                if 0 < offset <= span:
+                    hits.append(item)
+        return hits
@@ -0,0 +1,159 @@
+import math
+from collections import OrderedDict
+import numpy as np
+import pygame
+from config import SWEEP_SPRITE_STEP, SWEEP_TRAIL_DEGREES, SWEEP_SPRITE_CACHE_MB, PHOSPHOR_DECAY
+
+
+def _arc(radius, start, end, step=1.0):
+    """Points on a circle of radius around (0, 0) from angle start to end (degrees, counterclockwise from east)"""
+    n = max(1, int(math.ceil((end - start) / step)))
+    return [(radius * math.cos(math.radians(start + (end - start) * i / n)),
+             -radius * math.sin(math.radians(start + (end - start) * i / n))) for i in range(n + 1)]
+
+
+class SweepSpriteCache:
+    """
+    Pre-rendered sweep wedges: the beam plus a glow that fades over
+    trail_degrees behind it and towards the center, to be added onto the
+    screen with BLEND_ADD. Sprites are rendered on first use for every
+    step_degrees of the first quadrant and every radius (one per zoom
+    level); the other three quadrants are exact 90 degree rotations of
+    those, rotated once and cached alongside them.
+
+    The cache stays within memory_mb. Sprites for other radii are dropped
+    first, least recently used first; if one radius alone doesn't fit, new
+    sprites past the budget are rendered but not kept, so a sweep cycling
+    through the angles still hits on the ones that are.
+
+    clip_radius lets callers stop the wedge at the edge of the screen when
+    zoomed in; the glow still fades as if it reached the full radius.
+    """
+
+    def __init__(self, step_degrees=SWEEP_SPRITE_STEP, trail_degrees=SWEEP_TRAIL_DEGREES,
+                 memory_mb=SWEEP_SPRITE_CACHE_MB, peak=110):
+        self.steps_per_quadrant = max(1, round(90 / step_degrees))
+        self.step_degrees = 90 / self.steps_per_quadrant
+        self.trail_degrees = trail_degrees
+        self.max_bytes = int(memory_mb * 1024 * 1024)
+        self.peak = peak
+        self.sprites = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.sprites)
+
+    def get(self, radius, angle, clip_radius=None):
+        """
+        (surface, (dx, dy)) for the wedge whose beam points at angle: blit the
+        surface at the radar center plus (dx, dy)
+        """
+        clip = radius if clip_radius is None else min(radius, clip_radius)
+        step = int(round(angle / self.step_degrees)) % (4 * self.steps_per_quadrant)
+        quadrant, base = divmod(step, self.steps_per_quadrant)
+        return self._sprite(radius, clip, quadrant, base)
+
+    def _sprite(self, radius, clip, quadrant, base):
+        key = (radius, clip, quadrant, base)
+        sprite = self.sprites.get(key)
+        if sprite is not None:
+            self.hits += 1
+            self.sprites.move_to_end(key)
+            return sprite
+        self.misses += 1
+        if quadrant:
+            surface, (x, y) = self._sprite(radius, clip, 0, base)
+            w, h = surface.get_size()
+            for _ in range(quadrant):
+                x, y, w, h = y, 1 - (x + w), h, w
+            sprite = pygame.transform.rotate(surface, 90 * quadrant), (x, y)
+        else:
+            sprite = self._render(radius, clip, base * self.step_degrees)
+        size = self._nbytes(sprite[0])
+        if self.nbytes + size > self.max_bytes:
+            for old in [k for k in self.sprites if k[:2] != key[:2]]:
+                self.nbytes -= self._nbytes(self.sprites.pop(old)[0])
+                self.evictions += 1
+                if self.nbytes + size <= self.max_bytes:
+                    break
+        if self.nbytes + size <= self.max_bytes:
+            self.sprites[key] = sprite
+            self.nbytes += size
+        return sprite
+
+    @staticmethod
+    def _nbytes(surface):
+        return surface.get_bytesize() * surface.get_width() * surface.get_height()
+
+    def _render(self, radius, clip, angle):
+        start = angle - self.trail_degrees
+        outline = [(0.0, 0.0)] + _arc(clip, start, angle)
+        x0 = int(math.floor(min(x for x, _ in outline))) - 2
+        y0 = int(math.floor(min(y for _, y in outline))) - 2
+        x1 = int(math.ceil(max(x for x, _ in outline))) + 3
+        y1 = int(math.ceil(max(y for _, y in outline))) + 3
+        surface = pygame.Surface((x1 - x0, y1 - y0)).convert()
+        surface.fill((0, 0, 0))
+        origin = (-x0, -y0)
+
+        # one band per degree, brightest at the beam, then dim towards the center
+        bands = max(1, int(self.trail_degrees))
+        width = self.trail_degrees / bands
+        for i in range(bands):
+            green = int(self.peak * (1 - i / bands) ** 2)
+            if green <= 0:
+                break
+            points = [origin] + [(px - x0, py - y0) for px, py in _arc(clip, angle - (i + 1) * width, angle - i * width)]
+            pygame.draw.polygon(surface, (0, green, 0), points)
+        pixels = pygame.surfarray.pixels3d(surface)
+        dx = np.arange(x0, x1, dtype=np.float32)[:, None]
+        dy = np.arange(y0, y1, dtype=np.float32)[None, :]
+        falloff = np.clip(0.25 + 0.75 * np.sqrt(dx * dx + dy * dy) / max(radius, 1), 0.0, 1.0)
+        pixels[:, :, 1] = (pixels[:, :, 1] * falloff).astype(np.uint8)
+        del pixels
+
+        end = _arc(clip, angle, angle)[0]
+        pygame.draw.line(surface, (0, 255, 0), origin, (end[0] - x0, end[1] - y0), 2)
+        return surface, (x0, y0)
+
+
+class PhosphorLayer:
+    """
+    WWII afterglow: a persistent screen-sized surface the beam is painted
+    into, added onto each frame. fade() darkens it by one alpha blit of a
+    black surface, so anything painted decays to 1/e after decay seconds.
+    """
+
+    def __init__(self, size, decay=PHOSPHOR_DECAY, color=(0, 140, 0)):
+        self.decay = decay
+        self.color = color
+        self.surface = pygame.Surface(size).convert()
+        self.fader = pygame.Surface(size).convert()
+        self.fader.fill((0, 0, 0))
+        self.clear()
+
+    def clear(self):
+        self.surface.fill((0, 0, 0))
+
+    def fade(self, dt, rect=None):
+        alpha = max(1, round(255 * (1 - math.exp(-dt / self.decay)))) if self.decay else 255
+        self.fader.set_alpha(alpha)
+        if rect is None:
+            self.surface.blit(self.fader, (0, 0))
+        else:
+            self.surface.blit(self.fader, rect, rect)
+
+    def paint_sweep(self, center, radius, start, end):
+        """Fill the sector the beam crossed, from angle start to end (degrees, counterclockwise)"""
+        if end < start:
+            end += 360
+        cx, cy = center
+        points = [center] + [(cx + x, cy + y) for x, y in _arc(radius, start, end, 2.0)]
+        pygame.draw.polygon(self.surface, self.color, points)
+
+    def composite(self, screen, rect):
+        """Add the glow under rect onto screen; returns the rect touched"""
+        return screen.blit(self.surface, rect, rect, special_flags=pygame.BLEND_ADD)
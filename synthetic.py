@@ -0,0 +1,100 @@
+import itertools
+import json
+import math
+import time
+import numpy as np
+from get_data import FlightData
+
+AIRLINES = ['UAL', 'SWA', 'DAL', 'AAL', 'ASA', 'JBU', 'SKW', 'FDX', 'UPS', 'N']
+
+
+class SyntheticFeed:
+    """
+    Generates aircraft.json payloads for count aircraft moving along their
+    tracks around a center point. A share of aircraft have blank callsigns or
+    no position, like real receiver output.
+    """
+
+    def __init__(self, count, center=(37.4866, -122.16382), radius_km=300, seed=0,
+                 blank_callsign_ratio=0.15, missing_position_ratio=0.05):
+        rng = np.random.default_rng(seed)
+        self.rng = rng
+        self.count = count
+        self.now = time.time()
+        self.messages = 0
+
+        center_lat, center_lon = float(center[0]), float(center[1])
+        distance = radius_km * 1000 * np.sqrt(rng.random(count))
+        bearing = rng.random(count) * 2 * math.pi
+        self.lat = center_lat + distance * np.cos(bearing) / 111320
+        self.lon = center_lon + distance * np.sin(bearing) / (111320 * math.cos(math.radians(center_lat)))
+        self.track = rng.random(count) * 360
+        self.gs = rng.uniform(120, 520, count)
+        self.altitude = (rng.integers(10, 410, count) * 100).tolist()
+
+        self.hex = [f"{0xa00000 + i:06x}" for i in range(count)]
+        flights = []
+        for i in range(count):
+            if rng.random() < blank_callsign_ratio:
+                flights.append('        ')
+            else:
+                airline = AIRLINES[i % len(AIRLINES)]
+                flights.append(f"{airline}{rng.integers(1, 9999)}".ljust(8))
+        self.flight = flights
+        self.has_position = rng.random(count) >= missing_position_ratio
+
+    def advance(self, dt):
+        """Move every aircraft dt seconds along its track, with gentle random turns"""
+        self.now += dt
+        meters = self.gs * 0.514444 * dt
+        heading = np.radians(self.track)
+        self.lat += meters * np.cos(heading) / 111320
+        self.lon += meters * np.sin(heading) / (111320 * np.cos(np.radians(self.lat)))
+        self.track = (self.track + self.rng.normal(0, 1.5 * dt, self.count)) % 360
+
+    def snapshot(self):
+        seen = self.rng.uniform(0, 2, self.count).tolist()
+        lat = self.lat.tolist()
+        lon = self.lon.tolist()
+        track = self.track.tolist()
+        gs = self.gs.tolist()
+        aircraft = []
+        for i in range(self.count):
+            ac = {'hex': self.hex[i], 'flight': self.flight[i], 'alt_baro': self.altitude[i],
+                  'gs': round(gs[i], 1), 'track': round(track[i], 1), 'seen': round(seen[i], 1)}
+            if self.has_position[i]:
+                ac['lat'] = round(lat[i], 6)
+                ac['lon'] = round(lon[i], 6)
+                ac['seen_pos'] = ac['seen']
+            aircraft.append(ac)
+        return aircraft
+
+    def payload(self):
+        self.messages += self.count * 4
+        return json.dumps({'now': round(self.now, 1), 'messages': self.messages,
+                           'aircraft': self.snapshot()}).encode()
+
+
+class SyntheticFlightData(FlightData):
+    """
+    FlightData whose fetches come from a SyntheticFeed instead of HTTP.
+    With payloads given, those are served in a loop instead, so benchmarks
+    can keep generation out of the timed region.
+    """
+
+    def __init__(self, feed, update_interval=1.0, payloads=None, autostart=False, decoder=None):
+        super().__init__(update_interval=update_interval, url='synthetic://', autostart=False, decoder=decoder)
+        self.feed = feed
+        self.payloads = itertools.cycle(payloads) if payloads else None
+        if autostart:
+            self.start()
+
+    def _fetch(self):
+        if self.payloads is not None:
+            payload = next(self.payloads)
+        else:
+            self.feed.advance(self.update_interval)
+            payload = self.feed.payload()
+        self.stats['fetches'] += 1
+        self.stats['bytes_fetched'] += len(payload)
+        return payload
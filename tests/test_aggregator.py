@@ -0,0 +1,163 @@
+import json
+import socket
+import socketserver
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+import pytest
+from aggregator import MultiReceiverFlightData
+
+
+def serve(server):
+    Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def http_source(body, delay=0.0, headers=()):
+    """Stand-in receiver answering every GET with body after delay seconds"""
+    requests = []
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            requests.append(dict(self.headers))
+            time.sleep(delay)
+            if 'If-None-Match' in self.headers:
+                self.send_response(304)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            for name, value in headers:
+                self.send_header(name, value)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = serve(ThreadingHTTPServer(('127.0.0.1', 0), Handler))
+    return server, requests
+
+
+def bad_status_source():
+    class Handler(socketserver.BaseRequestHandler):
+        def handle(self):
+            self.request.recv(4096)
+            self.request.sendall(b"HTTP/1.1\r\n\r\n")
+
+    socketserver.ThreadingTCPServer.allow_reuse_address = True
+    return serve(socketserver.ThreadingTCPServer(('127.0.0.1', 0), Handler))
+
+
+def dead_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def url(server):
+    return f"http://127.0.0.1:{server.server_address[1]}/data/aircraft.json"
+
+
+@pytest.fixture
+def sources():
+    good_body = json.dumps({'now': 1, 'aircraft': [
+        {'hex': 'abc123', 'flight': 'UAL1', 'lat': 37.5, 'lon': -122.2, 'seen': 0, 'seen_pos': 0}]}).encode()
+    good, good_requests = http_source(good_body)
+    slow, _ = http_source(good_body.replace(b'abc123', b'def456'), delay=2.0)
+    malformed, malformed_requests = http_source(b'{"now": 1, "aircraft": [{"hex": "ab')
+    bad_status = bad_status_source()
+    servers = (good, slow, malformed, bad_status)
+    yield {
+        'urls': [url(good), url(slow), url(malformed), url(bad_status),
+                 f"http://127.0.0.1:{dead_port()}/data/aircraft.json"],
+        'good_requests': good_requests,
+        'malformed_requests': malformed_requests,
+    }
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def test_bad_sources_never_stop_the_good_one(sources):
+    flight_data = MultiReceiverFlightData(sources['urls'], update_interval=0.1, timeout=0.3, autostart=False)
+    published = []
+
+    def flaky(snapshot):
+        published.append(sorted(ac['hex'] for ac in snapshot))
+        if len(published) == 1:
+            raise RuntimeError("subscriber bug")
+
+    flight_data.subscribe(flaky)
+    flight_data.start()
+    try:
+        deadline = time.time() + 5
+        while (len(published) < 3 or len(sources['malformed_requests']) < 2) and time.time() < deadline:
+            time.sleep(0.05)
+        stats = {source['url']: source for source in flight_data.source_stats()}
+    finally:
+        flight_data.stop()
+
+    assert len(published) >= 3
+    assert published[-1] == ['abc123']
+    good, slow, malformed, bad_status, dead = (stats[u] for u in sources['urls'])
+    assert good['errors'] == 0
+    for source in (slow, malformed, bad_status, dead):
+        assert source['errors'] >= 1
+    assert 'BadStatusLine' in bad_status['last_error']
+    # a malformed body only backs that source off; it is polled again
+    assert len(sources['malformed_requests']) >= 2
+    assert flight_data.stats['errors'] >= 5
+
+
+def test_freshest_position_wins_and_ages_are_rebased():
+    def body(seen_pos, lat):
+        return json.dumps({'now': 1, 'aircraft': [
+            {'hex': 'abc123', 'flight': 'UAL1', 'lat': lat, 'lon': -122.2, 'seen': 0.5, 'seen_pos': seen_pos},
+            {'hex': 'def456', 'flight': 'SWA2', 'seen': 0.0}]}).encode()
+
+    stale, _ = http_source(body(20.0, 37.0))
+    fresh, fresh_requests = http_source(body(1.0, 37.5), headers=[('ETag', '"v1"')])
+    flight_data = MultiReceiverFlightData([url(stale), url(fresh)], update_interval=0.1, timeout=1.0,
+                                          autostart=False)
+    published = []
+    flight_data.subscribe(published.append)
+    flight_data.start()
+    try:
+        deadline = time.time() + 5
+        while (len(published) < 2 or len(fresh_requests) < 2) and time.time() < deadline:
+            time.sleep(0.05)
+        gauges = flight_data.gauges()
+    finally:
+        flight_data.stop()
+        for server in (stale, fresh):
+            server.shutdown()
+            server.server_close()
+
+    merged = {ac['hex']: ac for ac in published[-1]}
+    assert sorted(merged) == ['abc123', 'def456']
+    assert merged['abc123']['lat'] == 37.5
+    # ages are rebased to the merge time, so they can only have grown since the fetch
+    assert 1.0 <= merged['abc123']['seen_pos'] < 3.0
+    assert 0.5 <= merged['abc123']['seen'] < 2.5
+    # the ETag is sent back, and a 304 keeps the last snapshot
+    assert fresh_requests[-1].get('If-None-Match') == '"v1"'
+    assert flight_data.stats['not_modified'] >= 1
+    assert f'source_latency{{source="{url(fresh)}"}}' in gauges
+    assert f'source_staleness{{source="{url(stale)}"}}' in gauges
+
+
+def test_merge_prefers_a_position_over_a_newer_message():
+    class Source:
+        def __init__(self, fetched_at, aircraft):
+            self.fetched_at = fetched_at
+            self.aircraft = aircraft
+
+    merged = MultiReceiverFlightData.merge([
+        Source(100.0, [{'hex': 'abc123', 'seen': 0.0}]),
+        Source(90.0, [{'hex': 'abc123', 'lat': 37.5, 'lon': -122.2, 'seen': 5.0, 'seen_pos': 5.0}]),
+    ], now=100.0)
+    assert merged == [{'hex': 'abc123', 'lat': 37.5, 'lon': -122.2, 'seen': 15.0, 'seen_pos': 15.0}]
@@ -0,0 +1,58 @@
+import time
+from threading import Thread, Event
+import pytest
+from radar import RadarDisplay
+from synthetic import SyntheticFeed, SyntheticFlightData
+
+CENTER = (37.4866, -122.16382)
+
+
+@pytest.mark.parametrize('wwii', [False, True])
+def test_ingest_while_rendering(wwii):
+    feed = SyntheticFeed(1000, CENTER)
+    payloads = []
+    for _ in range(20):
+        feed.advance(1.0)
+        payloads.append(feed.payload())
+    flight_data = SyntheticFlightData(feed, payloads=payloads)
+    display = RadarDisplay(flight_data=flight_data, headless=False, metrics=False)
+    display.verbose = False
+    display.radar_center = CENTER
+    display.show_trails = True
+    display.wwii_mode = wwii
+    assert flight_data.update_data()
+
+    done = Event()
+    errors, ingests = [], [0]
+
+    def ingest():
+        while not done.is_set():
+            try:
+                assert flight_data.update_data()
+            except BaseException as e:
+                errors.append(e)
+                return
+            ingests[0] += 1
+
+    thread = Thread(target=ingest, daemon=True)
+    generations = []
+    torn = 0
+    thread.start()
+    try:
+        deadline = time.time() + 10
+        while (len(generations) < 120 or len(set(generations)) < 3) and time.time() < deadline:
+            display.step()
+            snapshot = display.frame_snapshot
+            generations.append(snapshot.generation)
+            if len(snapshot.motion) != len(snapshot.aircraft):
+                torn += 1
+    finally:
+        done.set()
+        thread.join()
+        display.close()
+
+    assert not errors
+    assert ingests[0] > 0
+    assert torn == 0
+    assert generations == sorted(generations)
+    assert len(set(generations)) >= 3
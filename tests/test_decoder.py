@@ -0,0 +1,66 @@
+import get_data
+from decoder import DecodeWorker
+from recording import RecordingReader
+from synthetic import SyntheticFeed, SyntheticFlightData
+
+CENTER = (37.4866, -122.16382)
+
+
+def test_worker_records_without_decoding_in_this_process(tmp_path, monkeypatch):
+    decodes = []
+    loads = get_data.json_loads
+    monkeypatch.setattr(get_data, 'json_loads', lambda payload: decodes.append(1) or loads(payload))
+
+    path = str(tmp_path / 'capture.rlog')
+    worker = DecodeWorker(CENTER, 250, record_path=path)
+    try:
+        flight_data = SyntheticFlightData(SyntheticFeed(100, CENTER), decoder=worker)
+        deltas = []
+        flight_data.subscribe_deltas(deltas.append)
+        for _ in range(3):
+            assert flight_data.update_data()
+    finally:
+        worker.close()
+
+    assert len(deltas) == 3 and len(deltas[0].rows) > 0
+    assert not decodes
+    log = RecordingReader(path)
+    try:
+        assert len(log) == 3
+        assert log.counts[0] == 100
+    finally:
+        log.close()
+
+
+def test_dead_worker_is_restarted_and_bad_payloads_back_off(tmp_path):
+    from test_get_data import AIRCRAFT, ScriptedFlightData, payload
+
+    path = str(tmp_path / 'capture.rlog')
+    worker = DecodeWorker(CENTER, 250, record_path=path)
+    try:
+        flight_data = ScriptedFlightData([payload(1, AIRCRAFT), b'{"now": 2, "aircraft": [', payload(3, AIRCRAFT)],
+                                         decoder=worker)
+        deltas = []
+        flight_data.subscribe_deltas(deltas.append)
+        assert flight_data.update_data()
+
+        # malformed JSON is a failed poll: counted, validators forgotten, backed off
+        flight_data.etag = '"abc"'
+        assert not flight_data.update_data()
+        assert flight_data.stats['errors'] == 1 and flight_data.etag is None
+
+        worker.process.terminate()
+        worker.process.join()
+        assert flight_data.update_data()
+        assert worker.process.is_alive() and worker.stats['restarts'] == 1
+        assert [r[0] for r in deltas[-1].changes()] == ['abc123']
+    finally:
+        worker.close()
+
+    # the restarted worker records beside the first log instead of overwriting it
+    for name in ('capture.rlog', 'capture.1.rlog'):
+        log = RecordingReader(str(tmp_path / name))
+        try:
+            assert len(log) == 1
+        finally:
+            log.close()
@@ -0,0 +1,62 @@
+import time
+import urllib.error
+import urllib.request
+import pygame
+import pytest
+from frame_server import FrameServer
+
+
+@pytest.fixture
+def server():
+    server = FrameServer(0, client_fps=10)
+    yield server
+    server.stop()
+
+
+@pytest.mark.parametrize('fps', ['abc', '0', '-5', 'nan', 'inf'])
+def test_bad_fps_is_rejected(server, fps):
+    with pytest.raises(urllib.error.HTTPError) as error:
+        urllib.request.urlopen(f"http://127.0.0.1:{server.port}/stream.mjpg?fps={fps}", timeout=5)
+    assert error.value.code == 400
+    assert not server.clients
+
+
+def test_fps_is_capped_at_client_fps(server):
+    assert server.client_rate(None) == 10
+    assert server.client_rate('2.5') == 2.5
+    assert server.client_rate('1000') == 10
+
+
+def get(server, path):
+    with urllib.request.urlopen(f"http://127.0.0.1:{server.port}{path}", timeout=5) as response:
+        return response.read()
+
+
+def test_no_jpeg_encodes_without_viewers(server):
+    surface = pygame.Surface((64, 48))
+    for i in range(10):
+        surface.fill((0, 20 * i, 0))
+        assert server.publish(surface, now=float(i + 1))
+    assert server.stats['frames_encoded'] == 0
+
+    jpeg = get(server, '/frame.jpg')
+    assert jpeg.startswith(b'\xff\xd8')
+    assert get(server, '/frame.jpg') == jpeg
+    assert get(server, '/frame.png').startswith(b'\x89PNG')
+    assert server.stats['jpeg_on_demand'] == 1 and server.stats['png_encoded'] == 1
+    assert server.stats['frames_encoded'] == 0
+
+
+def test_frames_are_encoded_while_streaming(server):
+    response = urllib.request.urlopen(f"http://127.0.0.1:{server.port}/stream.mjpg", timeout=5)
+    try:
+        deadline = time.time() + 5
+        while not server.clients and time.time() < deadline:
+            time.sleep(0.01)
+        assert server.publish(pygame.Surface((64, 48)), now=100.0)
+        while not server.stats['frames_encoded'] and time.time() < deadline:
+            time.sleep(0.01)
+        assert server.stats['frames_encoded'] == 1
+        assert response.readline().strip() == b'--radarframe'
+    finally:
+        response.close()
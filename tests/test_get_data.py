@@ -0,0 +1,86 @@
+import json
+import time
+from get_data import FlightData
+
+
+def payload(now, aircraft):
+    return json.dumps({'now': now, 'aircraft': aircraft}).encode()
+
+
+class ScriptedFlightData(FlightData):
+    """Serves the given payloads in order, then the last one forever"""
+
+    def __init__(self, payloads, **kwargs):
+        super().__init__(url='scripted://', autostart=False, **kwargs)
+        self.payloads = list(payloads)
+
+    def _fetch(self):
+        self.stats['fetches'] += 1
+        return self.payloads.pop(0) if len(self.payloads) > 1 else self.payloads[0]
+
+
+AIRCRAFT = [{'hex': 'abc123', 'flight': 'UAL1', 'lat': 37.5, 'lon': -122.2, 'seen': 0}]
+
+
+def test_malformed_payload_is_counted_and_polling_continues():
+    flight_data = ScriptedFlightData([payload(1, AIRCRAFT), b'{"now": 2, "aircraft": [{"hex": "ab',
+                                      payload(3, AIRCRAFT + [dict(AIRCRAFT[0], hex='def456')])])
+    deltas = []
+    flight_data.subscribe_deltas(deltas.append)
+    assert flight_data.update_data()
+    assert not flight_data.update_data()
+    assert flight_data.stats['errors'] == 1
+    assert flight_data.update_data()
+    assert [r.hex for r in deltas[-1].added] == ['def456']
+
+
+def test_raising_subscriber_does_not_stop_the_poll_thread():
+    calls = []
+
+    def flaky(snapshot):
+        calls.append(len(snapshot))
+        if len(calls) == 1:
+            raise RuntimeError("subscriber bug")
+
+    flight_data = ScriptedFlightData([payload(1, AIRCRAFT), b'not json', payload(2, AIRCRAFT)],
+                                     update_interval=0.01)
+    flight_data.subscribe(flaky)
+    flight_data.start()
+    try:
+        deadline = time.time() + 5
+        while len(calls) < 3 and time.time() < deadline:
+            time.sleep(0.01)
+        assert flight_data.thread.is_alive()
+        assert len(calls) >= 3
+        assert flight_data.stats['errors'] == 2
+    finally:
+        flight_data.stop()
+
+
+def test_poll_now_never_polls_faster_than_update_interval():
+    flight_data = ScriptedFlightData([payload(1, AIRCRAFT)], update_interval=0.2)
+    flight_data.start()
+    try:
+        deadline = time.time() + 1.0
+        while time.time() < deadline:
+            flight_data.poll_now()
+            time.sleep(0.002)
+    finally:
+        flight_data.stop()
+    assert flight_data.stats['fetches'] <= 7
+
+
+def test_poll_now_cuts_an_idle_wait_short():
+    flight_data = ScriptedFlightData([payload(1, AIRCRAFT)], update_interval=0.05)
+    # the same payload every poll: nothing changes, so polling stretches to the idle interval
+    flight_data.subscribe_deltas(lambda delta: None)
+    flight_data.unchanged_polls = 1000
+    flight_data.start()
+    try:
+        time.sleep(0.2)
+        fetches = flight_data.stats['fetches']
+        flight_data.poll_now()
+        time.sleep(0.2)
+        assert flight_data.stats['fetches'] > fetches
+    finally:
+        flight_data.stop()
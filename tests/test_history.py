@@ -0,0 +1,112 @@
+import random
+import pytest
+from history import HistoryStore, HistoryCursor
+
+
+def simulate(store, frames, seed=0, fleet=40, start=1000.0, after=None):
+    """
+    Record frames of random traffic: moves, label changes, aircraft losing
+    their position, removals and newcomers. Returns [(timestamp, truth)],
+    truth being what a seek to that timestamp should give; after(truths)
+    is called once each frame is recorded.
+    """
+    rng = random.Random(seed)
+    positions, labels, truths = {}, {}, []
+    serial = 0
+    for i in range(frames):
+        t = start + i
+        changes, removed = [], []
+        for icao in list(positions):
+            roll = rng.random()
+            if roll < 0.05:
+                removed.append(icao)
+                del positions[icao]
+            elif roll < 0.08:
+                changes.append((icao, labels[icao], None, t, None, None))
+                del positions[icao]
+            elif roll < 0.7:
+                if rng.random() < 0.1:
+                    labels[icao] = rng.choice(['', 'UNKNOWN', f'L{rng.randrange(1000)}'])
+                x, y = positions[icao]
+                positions[icao] = (x + rng.uniform(-300, 300), y + rng.uniform(-300, 300))
+                changes.append((icao, labels[icao], positions[icao], t, 90.0, 300.0))
+        while len(positions) < fleet and rng.random() < 0.5:
+            serial += 1
+            icao = f'{serial:06x}'
+            labels[icao] = f'AC{serial}'
+            positions[icao] = (rng.uniform(-2e5, 2e5), rng.uniform(-2e5, 2e5))
+            changes.append((icao, labels[icao], positions[icao], t, 90.0, 300.0))
+        store.record(t, changes, removed)
+        truths.append((t, {icao: (labels[icao], float(round(x)), float(round(y)))
+                           for icao, (x, y) in positions.items()}))
+        if after is not None:
+            after(truths)
+    return truths
+
+
+def check(cursor, truth):
+    t, expected = truth
+    span = cursor.store.span()
+    if span is None or t < span[0]:
+        return  # before the first stored frame, or already evicted
+    result = cursor.seek(t + 0.5)
+    assert result is not None and result[0] <= t
+    assert result[1] == expected
+
+
+def test_random_seeks_match_ground_truth():
+    store = HistoryStore(memory_mb=64, max_minutes=600, chunk_frames=8)
+    truths = simulate(store, 200)
+    assert store.stats()['chunks'] > 10
+    cursor = HistoryCursor(store)
+    rng = random.Random(1)
+    for _ in range(300):
+        check(cursor, rng.choice(truths))
+    # playback forward, then backwards across sealed chunks
+    for truth in truths[50:90]:
+        check(cursor, truth)
+    for truth in reversed(truths[10:60]):
+        check(cursor, truth)
+
+
+def test_cursor_follows_the_open_chunk():
+    store = HistoryStore(memory_mb=64, max_minutes=600, chunk_frames=16)
+    cursor = HistoryCursor(store)
+    # live playback: each seek lands in the chunk still being appended to
+    truths = simulate(store, 40, after=lambda truths: check(cursor, truths[-1]))
+    check(cursor, truths[0])
+
+
+def test_eviction_by_age_keeps_the_newest_minutes():
+    store = HistoryStore(memory_mb=64, max_minutes=1, chunk_frames=10)
+    truths = simulate(store, 400)
+    oldest, newest = store.span()
+    assert newest == truths[-1][0]
+    assert 60 <= newest - oldest <= 60 + 10
+    assert store.stats()['dropped_chunks'] > 0
+    cursor = HistoryCursor(store)
+    for truth in truths:
+        check(cursor, truth)
+
+
+def test_eviction_by_size_bounds_memory_and_strings():
+    store = HistoryStore(memory_mb=0.05, max_minutes=600, chunk_frames=10)
+    # every aircraft soon leaves and is replaced by a new one: an ever growing set of hex codes
+    truths = simulate(store, 2000, fleet=60)
+    stats = store.stats()
+    assert stats['dropped_chunks'] > 0
+    assert stats['bytes'] <= store.max_bytes
+    # only strings still used by kept chunks are held on to
+    assert stats['strings'] < 60 * 2 * stats['chunks'] + 1000
+    cursor = HistoryCursor(store)
+    for truth in truths[-100:]:
+        check(cursor, truth)
+
+
+def test_string_tables_count_towards_memory():
+    small, large = HistoryStore(chunk_frames=4), HistoryStore(chunk_frames=4)
+    for store, label in ((small, 'A'), (large, 'A' * 200)):
+        for i in range(4):
+            store.record(1000.0 + i, [(f'{n:06x}', f'{label}{n}', (n * 1000.0 + i, 0.0), 0, None, None)
+                                      for n in range(100)], [])
+    assert large.nbytes - small.nbytes >= 100 * 199
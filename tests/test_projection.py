@@ -0,0 +1,39 @@
+import pytest
+from get_data import Calculations
+from synthetic import SyntheticFeed
+
+CENTER = (37.4866, -122.16382)
+
+
+def snapshot():
+    # radius_km=300 puts part of the traffic beyond the 250 km range
+    aircraft = SyntheticFeed(500, CENTER, radius_km=300, blank_callsign_ratio=0.2,
+                             missing_position_ratio=0.1).snapshot()
+    aircraft += [
+        {'hex': 'a00001', 'flight': 'NOPOS1  ', 'seen': 1},
+        {'hex': 'a00002', 'flight': 'LATONLY ', 'lat': 37.5, 'seen': 1},
+        {'hex': 'a00003', 'lat': 37.6, 'lon': -122.3, 'seen': 1},
+        {'hex': 'a00004', 'flight': '        ', 'lat': 37.4, 'lon': -122.0, 'seen': 1},
+        {'hex': 'a00005', 'flight': 'FAR1', 'lat': 40.5, 'lon': -122.16382, 'seen': 1},
+        {'hex': 'a00006', 'flight': 'CENTER', 'lat': CENTER[0], 'lon': CENTER[1], 'seen': 1},
+    ]
+    return aircraft
+
+
+@pytest.mark.parametrize('max_range_km', [None, 250, 40])
+def test_process_aircraft_matches_scalar(max_range_km):
+    aircraft = snapshot()
+    batch = Calculations.process_aircraft(aircraft, CENTER, max_range_km)
+    scalar = Calculations.process_aircraft_scalar(aircraft, CENTER, max_range_km)
+    assert [callsign for callsign, x, y in batch] == [callsign for callsign, x, y in scalar]
+    for (_, x, y), (_, sx, sy) in zip(batch, scalar):
+        assert x == pytest.approx(sx, abs=1e-6)
+        assert y == pytest.approx(sy, abs=1e-6)
+
+
+def test_cases_are_covered():
+    aircraft = snapshot()
+    shown = {callsign for callsign, x, y in Calculations.process_aircraft(aircraft, CENTER, 250)}
+    assert 'NOPOS1' not in shown and 'LATONLY' not in shown and 'FAR1' not in shown
+    assert {'UNKNOWN', '', 'CENTER'} <= shown
+    assert len(shown) < len(aircraft)
@@ -0,0 +1,120 @@
+import os
+import time
+import pytest
+from recording import Recorder, RecordingReader, ReplayFlightData
+
+CENTER = (37.4866, -122.16382)
+
+FRAMES = [
+    [{'hex': 'abc123', 'flight': 'UAL1    ', 'lat': 37.512345678, 'lon': -122.298765432, 'alt_baro': 35000,
+      'track': 271.237, 'gs': 451.26, 'seen': 0.44, 'seen_pos': 1.26},
+     {'hex': 'def456', 'flight': 'SWA2    ', 'lat': 37.1, 'lon': -121.9, 'alt_baro': 'ground', 'gs': 12.0}],
+    [{'hex': 'abc123', 'flight': 'UAL1    ', 'lat': 37.52, 'lon': -122.31, 'alt_baro': 35025, 'track': 0.0},
+     {'hex': 'a00001', 'seen': 3.0}],
+    [{'hex': 'abc123', 'lat': 37.53, 'lon': -122.32}],
+]
+
+
+def write_log(path, frames=FRAMES, start=1000.0):
+    recorder = Recorder(path, CENTER)
+    for i, frame in enumerate(frames):
+        recorder.record(frame, timestamp=start + i)
+    recorder.close()
+    return path
+
+
+@pytest.fixture
+def log_path(tmp_path):
+    return write_log(str(tmp_path / 'capture.rlog'))
+
+
+def test_round_trip_within_column_precision(log_path):
+    log = RecordingReader(log_path)
+    try:
+        assert len(log) == 3 and log.counts == [2, 2, 1]
+        assert log.timestamps == [1000.0, 1001.0, 1002.0]
+        assert log.center == CENTER
+        ac = log.frame(0)[0]
+        assert ac['hex'] == 'abc123' and ac['flight'] == 'UAL1    '
+        assert ac['lat'] == pytest.approx(37.512345678, abs=1e-6)
+        assert ac['lon'] == pytest.approx(-122.298765432, abs=1e-6)
+        assert ac['alt_baro'] == 35000
+        assert ac['track'] == pytest.approx(271.237, abs=0.005)
+        assert ac['gs'] == pytest.approx(451.26, abs=0.05)
+        assert ac['seen'] == pytest.approx(0.44, abs=0.05)
+        assert ac['seen_pos'] == pytest.approx(1.26, abs=0.05)
+        assert log.frame(1)[0]['track'] == 0.0
+    finally:
+        log.close()
+
+
+def test_ground_and_missing_value_sentinels(log_path):
+    log = RecordingReader(log_path)
+    try:
+        ground = log.frame(0)[1]
+        assert ground['alt_baro'] == 'ground'
+        assert 'track' not in ground and 'seen' not in ground and 'seen_pos' not in ground
+        assert log.frame(1)[1] == {'hex': 'a00001', 'seen': 3.0}
+        assert log.frame(2)[0] == {'hex': 'abc123', 'lat': 37.53, 'lon': -122.32}
+    finally:
+        log.close()
+
+
+def test_truncated_last_frame_is_ignored(log_path):
+    with open(log_path, 'r+b') as f:
+        f.truncate(os.path.getsize(log_path) - 3)
+    log = RecordingReader(log_path)
+    try:
+        assert len(log) == 2
+        assert log.frame(1)[1]['hex'] == 'a00001'
+    finally:
+        log.close()
+
+
+def test_index_at_and_seek(log_path):
+    log = RecordingReader(log_path)
+    try:
+        assert log.index_at(0) == 0
+        assert log.index_at(1000.5) == 1
+        assert log.index_at(1001.0) == 1
+        assert log.index_at(5000) == 2
+    finally:
+        log.close()
+
+    replay = ReplayFlightData(log_path, speed=0, autostart=False)
+    snapshots, deltas = [], []
+    replay.subscribe(snapshots.append)
+    replay.subscribe_deltas(deltas.append)
+    try:
+        assert replay.update_data() and replay.update_data()
+        replay.seek(1000.0)
+        assert replay.update_data()
+        # seeking publishes everything on screen as removed before the frame
+        assert sorted(r.hex for r in deltas[-2].removed) == ['a00001', 'abc123', 'def456']
+        assert [ac['hex'] for ac in snapshots[-1]] == ['abc123', 'def456']
+        assert replay.update_data() and replay.update_data()
+        assert not replay.update_data()
+    finally:
+        replay.stop()
+
+
+def test_raising_subscriber_does_not_end_replay(log_path):
+    calls = []
+
+    def flaky(snapshot):
+        calls.append(len(snapshot))
+        if len(calls) == 1:
+            raise RuntimeError("subscriber bug")
+
+    replay = ReplayFlightData(log_path, speed=0, autostart=False)
+    replay.subscribe(flaky)
+    replay.start()
+    try:
+        deadline = time.time() + 5
+        while not replay.finished and time.time() < deadline:
+            time.sleep(0.01)
+        assert replay.finished and replay.thread.is_alive()
+        assert calls == [2, 2, 1]
+        assert replay.stats['errors'] == 1
+    finally:
+        replay.stop()
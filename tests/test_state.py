@@ -0,0 +1,71 @@
+from state import AircraftStore
+
+
+def ac(icao, **fields):
+    record = {'hex': icao, 'flight': 'UAL1    ', 'lat': 37.5, 'lon': -122.2, 'alt_baro': 35000,
+              'track': 90.0, 'gs': 450.0, 'seen': 0}
+    record.update(fields)
+    return record
+
+
+def hexes(records):
+    return sorted(r.hex for r in records)
+
+
+def test_added_updated_and_removed():
+    store = AircraftStore(max_age=60)
+    delta = store.update([ac('ABC123'), ac('def456')], now=1000.0)
+    assert hexes(delta.added) == ['abc123', 'def456'] and not delta.updated and not delta.removed
+
+    delta = store.update([ac('abc123', lat=37.6), ac('def456'), ac('a00001')], now=1001.0)
+    assert hexes(delta.added) == ['a00001']
+    assert hexes(delta.updated) == ['abc123']
+    assert delta.updated[0].lat == 37.6 and delta.updated[0].position_time == 1001.0
+
+    for change in ({'flight': 'UAL2'}, {'alt_baro': 'ground'}, {'track': 91.0}, {'gs': 451.0}):
+        delta = store.update([ac('def456', **change)], now=1002.0)
+        assert hexes(delta.updated) == ['def456'], change
+
+    delta = store.update([], now=1062.5)
+    assert hexes(delta.removed) == ['a00001', 'abc123', 'def456']
+    assert len(store) == 0
+
+
+def test_unchanged_records_give_an_empty_delta():
+    store = AircraftStore(max_age=60)
+    snapshot = [ac('abc123'), ac('def456', lat=None, lon=None)]
+    store.update(snapshot, now=1000.0)
+    delta = store.update(snapshot, now=1001.0)
+    assert not delta
+    assert not (delta.added or delta.updated or delta.removed)
+    # seen alone changing isn't an update either
+    assert not store.update([ac('abc123', seen=3), ac('def456', lat=None, lon=None)], now=1002.0)
+
+
+def test_callsign_is_the_key_without_a_hex():
+    store = AircraftStore(max_age=60)
+    delta = store.update([ac(None, flight='SWA456  '), ac('', flight='   '), ac(None, flight=None)], now=1000.0)
+    assert hexes(delta.added) == ['~swa456']
+    assert delta.added[0].label == 'SWA456'
+    delta = store.update([ac(None, flight='swa456', lat=37.6)], now=1001.0)
+    assert hexes(delta.updated) == ['~swa456'] and not delta.added
+
+
+def test_records_older_than_max_age_are_skipped():
+    store = AircraftStore(max_age=60)
+    assert not store.update([ac('abc123', seen=61)], now=1000.0)
+    assert len(store) == 0
+
+
+def test_eviction_by_age_in_last_seen_order():
+    store = AircraftStore(max_age=60)
+    store.update([ac('a00001'), ac('a00002'), ac('a00003')], now=1000.0)
+    # heard again later, so they move behind a00003
+    store.update([ac('a00002', seen=5)], now=1010.0)
+    store.update([ac('a00001', seen=0)], now=1030.0)
+    assert list(store.records) == ['a00003', 'a00002', 'a00001']
+
+    assert [r.hex for r in store.evict(1060.5)] == ['a00003']
+    assert [r.hex for r in store.evict(1065.5)] == ['a00002']
+    assert store.evict(1089.0) == []
+    assert [r.hex for r in store.update([], now=1090.5).removed] == ['a00001']
@@ -0,0 +1,98 @@
+import time
+import pytest
+from fake_feed import FakeFeedServer, SAMPLE_BEAST, SAMPLE_SBS
+from stream import StreamingFlightData
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.02)
+    return condition()
+
+
+@pytest.fixture
+def feed():
+    servers = []
+
+    def start(messages, **kwargs):
+        server = FakeFeedServer(messages, **kwargs).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.stop()
+
+
+def stream(server, fmt, subscriber):
+    flight_data = StreamingFlightData(server.host, server.port, fmt, publish_interval=0.05, autostart=False)
+    flight_data.subscribe(subscriber)
+    flight_data.start()
+    return flight_data
+
+
+def test_sbs(feed):
+    server = feed(SAMPLE_SBS)
+    snapshots = []
+    flight_data = stream(server, 'sbs', snapshots.append)
+    try:
+        def complete():
+            by_hex = {ac['hex']: ac for ac in (snapshots[-1] if snapshots else [])}
+            return 'lon' in by_hex.get('c0ffee', {}) and 'gs' in by_hex.get('c0ffee', {})
+        assert wait_for(complete)
+    finally:
+        flight_data.stop()
+    by_hex = {ac['hex']: ac for ac in snapshots[-1]}
+    ual = by_hex['a1b2c3']
+    assert ual['flight'].strip() == 'UAL123'
+    assert ual['lat'] == pytest.approx(37.6213) and ual['lon'] == pytest.approx(-122.3790)
+    assert ual['alt_baro'] == 35000 and ual['gs'] == 450 and ual['track'] == 275.0
+    assert 'seen_pos' in ual and ual['seen'] >= 0
+
+
+def test_beast_identification_and_cpr_pair(feed):
+    server = feed(SAMPLE_BEAST)
+    snapshots = []
+    flight_data = stream(server, 'beast', snapshots.append)
+    try:
+        def decoded():
+            by_hex = {ac['hex']: ac for ac in (snapshots[-1] if snapshots else [])}
+            return 'lat' in by_hex.get('40621d', {}) and '4840d6' in by_hex
+        assert wait_for(decoded)
+    finally:
+        flight_data.stop()
+    by_hex = {ac['hex']: ac for ac in snapshots[-1]}
+    assert by_hex['4840d6']['flight'].strip() == 'KLM1023'
+    assert by_hex['40621d']['lat'] == pytest.approx(52.2658, abs=1e-3)
+    assert by_hex['40621d']['lon'] == pytest.approx(3.9389, abs=1e-3)
+
+
+def test_reconnects_after_the_receiver_drops_the_connection(feed):
+    server = feed(SAMPLE_SBS, close_after=3)
+    flight_data = stream(server, 'sbs', lambda snapshot: None)
+    try:
+        assert wait_for(lambda: flight_data.stats['connects'] >= 2)
+        assert flight_data.thread.is_alive()
+    finally:
+        flight_data.stop()
+    assert server.connections >= 2
+
+
+def test_raising_subscriber_does_not_stop_the_stream(feed):
+    server = feed(SAMPLE_SBS, loop=True, message_interval=0.01)
+    calls = []
+
+    def flaky(snapshot):
+        calls.append(len(snapshot))
+        if len(calls) == 1:
+            raise RuntimeError("subscriber bug")
+
+    flight_data = stream(server, 'sbs', flaky)
+    try:
+        assert wait_for(lambda: len(calls) >= 3)
+        assert flight_data.thread.is_alive()
+        assert flight_data.stats['errors'] >= 1
+        assert flight_data.stats['connects'] == 1
+    finally:
+        flight_data.stop()
@@ -0,0 +1,32 @@
+import pygame
+import pytest
+from sweep_sprites import SweepSpriteCache
+
+
+@pytest.fixture(autouse=True)
+def display():
+    pygame.display.init()
+    pygame.display.set_mode((1, 1))
+    yield
+    pygame.display.quit()
+
+
+def test_every_quadrant_is_cached():
+    cache = SweepSpriteCache(step_degrees=10, memory_mb=64)
+    first = [cache.get(200, angle) for angle in range(0, 360, 10)]
+    misses = cache.misses
+    assert len(cache) == 36
+    second = [cache.get(200, angle) for angle in range(0, 360, 10)]
+    assert cache.misses == misses
+    assert all(a[0] is b[0] and a[1] == b[1] for a, b in zip(first, second))
+    assert cache.nbytes == sum(cache._nbytes(surface) for surface, _ in cache.sprites.values())
+
+
+def test_rotated_sprites_line_up_with_a_direct_render():
+    cache = SweepSpriteCache(step_degrees=10, memory_mb=64)
+    for angle in (120, 210, 300):
+        surface, (dx, dy) = cache.get(200, angle)
+        direct, (x0, y0) = cache._render(200, 200, angle)
+        assert abs(dx - x0) <= 2 and abs(dy - y0) <= 2
+        assert abs(surface.get_width() - direct.get_width()) <= 2
+        assert abs(surface.get_height() - direct.get_height()) <= 2
@@ -0,0 +1,47 @@
+import time
+from trails import TrailStore
+from config import TRAIL_MAX_AGE
+
+
+def test_points_drops_trails_that_aged_out():
+    store = TrailStore(memory_mb=0.1)
+    for i, t in enumerate((0.0, 10.0, 20.0)):
+        store.add('fresh', i * 100.0, 0.0, 1000.0 + t)
+        store.add('stale', i * 100.0, 50.0, t)
+    xs, ys, ages, lengths = store.snapshot().points(1000.0 + 20.0 + 1)
+    assert lengths.tolist() == [3]
+    assert len(xs) == len(ys) == len(ages) == lengths.sum()
+
+
+def test_points_all_trails_aged_out():
+    store = TrailStore(memory_mb=0.1)
+    for t in (0.0, 10.0):
+        store.add('a', t, 0.0, t)
+        store.add('b', t, 1.0, t)
+    xs, ys, ages, lengths = store.snapshot().points(10.0 + TRAIL_MAX_AGE + 1)
+    assert len(xs) == 0 and len(lengths) == 0
+
+
+def test_render_survives_feed_stall(monkeypatch):
+    """No ingest for longer than TRAIL_MAX_AGE: trails age out between frames"""
+    import radar
+    from synthetic import SyntheticFeed, SyntheticFlightData
+
+    display = radar.RadarDisplay(flight_data=SyntheticFlightData(SyntheticFeed(1)), headless=False, metrics=False)
+    start = time.time()
+    try:
+        for i in range(3):
+            t = start + 5.0 * i
+            # the last trail stops updating first, so it is the first to age out
+            changes = [(f'a{n}', f'AC{n}', (1000.0 * n + 500.0 * i, 2000.0), t, 90.0, 300.0)
+                       for n in range(10 if i < 2 else 9)]
+            display.apply_changes(changes, [], t)
+        assert len(display.snapshot.trails) == 10
+        for wwii in (False, True):
+            display.wwii_mode = wwii
+            for now in (start + 5.0 + TRAIL_MAX_AGE + 1, start + 10.0 + TRAIL_MAX_AGE + 1):
+                monkeypatch.setattr(radar.time, 'time', lambda: now)
+                display.step()
+    finally:
+        monkeypatch.undo()
+        display.close()
@@ -0,0 +1,49 @@
+from synthetic import SyntheticFeed, SyntheticFlightData
+from views import ViewSpec, SharedIngest
+
+CENTER = (37.4866, -122.16382)
+
+
+def test_shared_ingest_prints_each_update_once(capsys):
+    from radar import MultiViewDisplay
+
+    specs = [ViewSpec('overview', 250, CENTER), ViewSpec('approach', 40, CENTER),
+             ViewSpec('other', 60, (CENTER[0] + 0.2, CENTER[1] - 0.2))]
+    flight_data = SyntheticFlightData(SyntheticFeed(200, CENTER))
+    display = MultiViewDisplay(specs, flight_data=flight_data, headless=False)
+    try:
+        display.views[0].verbose = True
+        for _ in range(3):
+            flight_data.update_data()
+        assert capsys.readouterr().out.count("=== Aircraft Update") == 3
+        assert display.ingest.gauges()['ingest_projections'] == 6
+    finally:
+        display.close()
+
+
+def test_views_match_standalone_projection():
+    from get_data import Calculations
+
+    flight_data = SyntheticFlightData(SyntheticFeed(300, CENTER))
+
+    class View:
+        def __init__(self, center, max_range_km):
+            self.radar_center = center
+            self.max_range_km = max_range_km
+            self.verbose = False
+            self.coords = None
+
+        def update_projected(self, delta, changed, coords):
+            self.coords = (changed, coords)
+
+    views = [View(CENTER, 250), View(CENTER, 40), View((37.6, -122.4), 60)]
+    ingest = SharedIngest(flight_data)
+    for view in views:
+        ingest.add_view(view)
+    flight_data.update_data()
+    for view in views:
+        changed, coords = view.coords
+        expected = Calculations.project_records(changed, view.radar_center, view.max_range_km)
+        assert [xy is None for xy in coords] == [xy is None for xy in expected]
+        assert all(xy is None or abs(xy[0] - e[0]) < 1e-6 and abs(xy[1] - e[1]) < 1e-6
+                   for xy, e in zip(coords, expected))
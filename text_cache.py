@@ -0,0 +1,81 @@
+import pygame
+from collections import OrderedDict
+
+
+class FontRegistry:
+    """Builds each pygame font once per size and hands back the same object"""
+
+    def __init__(self, name=None):
+        self.name = name
+        self.fonts = {}
+
+    def get(self, size):
+        font = self.fonts.get(size)
+        if font is None:
+            font = pygame.font.Font(self.name, size)
+            self.fonts[size] = font
+        return font
+
+
+class TextCache:
+    """
+    Bounded LRU cache of rendered text surfaces keyed by (text, size, color).
+    Fading text (WWII blip labels) goes through render_faded, which snaps the
+    intensity to a small number of levels so the cache doesn't fill up with
+    near-identical surfaces.
+    """
+
+    def __init__(self, fonts=None, max_entries=512, intensity_levels=16):
+        self.fonts = fonts or FontRegistry()
+        self.max_entries = max_entries
+        self.intensity_levels = intensity_levels
+        self.surfaces = OrderedDict()
+        self.sizes = {}
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, text, size, color):
+        key = (text, size, color)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        surface = self.fonts.get(size).render(text, True, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_entries:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    def size(self, text, size):
+        """(width, height) text would render at, without rendering it"""
+        key = (text, size)
+        dims = self.sizes.get(key)
+        if dims is None:
+            if len(self.sizes) >= self.max_entries * 16:
+                self.sizes.clear()
+            dims = self.fonts.get(size).size(text)
+            self.sizes[key] = dims
+        return dims
+
+    def render_faded(self, text, size, color, intensity):
+        """Render color scaled by intensity (0-255), quantized to intensity_levels steps"""
+        step = 255 / self.intensity_levels
+        level = max(1, min(self.intensity_levels, round(intensity / step)))
+        scale = level / self.intensity_levels
+        faded = tuple(int(channel * scale) for channel in color)
+        return self.render(text, size, faded)
+
+    def clear(self):
+        self.surfaces.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'entries': len(self.surfaces),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+        }
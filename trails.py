@@ -0,0 +1,139 @@
+import numpy as np
+from config import TRAIL_LENGTH, TRAIL_MEMORY_MB, TRAIL_MAX_AGE, TRAIL_POINT_INTERVAL
+
+
+class TrailStore:
+    """
+    Recent projected positions per aircraft, keyed by hex. Every trail is a
+    fixed-size ring buffer row in preallocated x/y/t arrays, and the number
+    of rows is fixed by memory_mb, so memory use never grows after startup.
+    When every row is taken the trail updated least recently is reused;
+    evict() frees trails whose newest point is older than max_age.
+    """
+
+    def __init__(self, length=TRAIL_LENGTH, memory_mb=TRAIL_MEMORY_MB, max_age=TRAIL_MAX_AGE,
+                 point_interval=TRAIL_POINT_INTERVAL):
+        self.length = length
+        self.max_age = max_age
+        self.point_interval = point_interval
+        bytes_per_trail = length * (4 + 4 + 8) + 4 + 4 + 1
+        self.capacity = max(1, int(memory_mb * 1024 * 1024 // bytes_per_trail))
+
+        self.x = np.zeros((self.capacity, length), dtype=np.float32)
+        self.y = np.zeros((self.capacity, length), dtype=np.float32)
+        self.t = np.zeros((self.capacity, length))
+        self.head = np.zeros(self.capacity, dtype=np.int32)
+        self.count = np.zeros(self.capacity, dtype=np.int32)
+        self.active = np.zeros(self.capacity, dtype=bool)
+        self.slots = {}
+        self.owners = [None] * self.capacity
+        self.free = list(range(self.capacity - 1, -1, -1))
+        self.reused = 0
+
+    def __len__(self):
+        return len(self.slots)
+
+    @property
+    def nbytes(self):
+        return sum(arr.nbytes for arr in (self.x, self.y, self.t, self.head, self.count, self.active))
+
+    def add(self, icao, x, y, t):
+        """Append a projected fix (meters) unless the last point is under point_interval old"""
+        slot = self.slots.get(icao)
+        if slot is None:
+            slot = self._allocate()
+            self.slots[icao] = slot
+            self.owners[slot] = icao
+        else:
+            count = self.count[slot]
+            if count and t - self.t[slot, self.head[slot] - 1] < self.point_interval:
+                return
+        head = self.head[slot]
+        self.x[slot, head] = x
+        self.y[slot, head] = y
+        self.t[slot, head] = t
+        self.head[slot] = (head + 1) % self.length
+        self.count[slot] = min(self.count[slot] + 1, self.length)
+
+    def _allocate(self):
+        if self.free:
+            slot = self.free.pop()
+        else:
+            # full: reuse the trail whose newest point is oldest
+            newest = self.t[np.arange(self.capacity), self.head - 1]
+            slot = int(np.argmin(np.where(self.active, newest, np.inf)))
+            del self.slots[self.owners[slot]]
+            self.reused += 1
+        self.active[slot] = True
+        self.head[slot] = 0
+        self.count[slot] = 0
+        return slot
+
+    def remove(self, icao):
+        slot = self.slots.pop(icao, None)
+        if slot is not None:
+            self.owners[slot] = None
+            self.active[slot] = False
+            self.count[slot] = 0
+            self.free.append(slot)
+
+    def evict(self, now):
+        """Free every trail whose newest point is older than max_age"""
+        idx = np.flatnonzero(self.active)
+        stale = idx[now - self.t[idx, self.head[idx] - 1] > self.max_age]
+        for slot in stale.tolist():
+            self.remove(self.owners[slot])
+        return len(stale)
+
+    def snapshot(self):
+        """
+        Copy of every trail with at least two points, flattened oldest first
+        within each trail, that later adds and evictions don't touch
+        """
+        idx = np.flatnonzero(self.active & (self.count >= 2))
+        steps = np.arange(self.length)
+        order = (self.head[idx, None] - self.count[idx, None] + steps[None, :]) % self.length
+        valid = steps[None, :] < self.count[idx, None]
+        rows = np.broadcast_to(idx[:, None], order.shape)
+        return TrailSnapshot(self.x[rows, order][valid], self.y[rows, order][valid],
+                             self.t[rows, order][valid], self.count[idx], self.max_age)
+
+    def points(self, now):
+        """
+        Every trail point at once, oldest first within each trail:
+        (x, y, age) flat arrays plus the length of each trail, for trails
+        with at least two points. Points older than max_age are left out,
+        and so are trails left with none.
+        """
+        return self.snapshot().points(now)
+
+
+class TrailSnapshot:
+    """Trails frozen by TrailStore.snapshot(): flat x/y/t arrays plus the point count of each trail"""
+
+    __slots__ = ('x', 'y', 't', 'lengths', 'max_age')
+
+    def __init__(self, x, y, t, lengths, max_age):
+        self.x = x
+        self.y = y
+        self.t = t
+        self.lengths = lengths
+        self.max_age = max_age
+
+    def __len__(self):
+        return len(self.lengths)
+
+    @classmethod
+    def empty(cls, max_age=TRAIL_MAX_AGE):
+        return cls(np.zeros(0), np.zeros(0), np.zeros(0), np.zeros(0, dtype=int), max_age)
+
+    def points(self, now):
+        """Same as TrailStore.points, as of when the snapshot was taken"""
+        if not len(self.lengths):
+            empty = np.zeros(0)
+            return empty, empty, empty, np.zeros(0, dtype=int)
+        ages = now - self.t
+        valid = ages <= self.max_age
+        lengths = np.add.reduceat(valid, np.concatenate(([0], np.cumsum(self.lengths)[:-1])), dtype=int)
+        # trails that aged out entirely (no ingest for max_age) have no points left
+        return self.x[valid], self.y[valid], ages[valid], lengths[lengths > 0]
@@ -0,0 +1,124 @@
+import numpy as np
+from get_data import Calculations
+from metrics import PROFILER
+
+
+class ViewSpec:
+    """One viewport over the shared feed: a name, its radar center (lat, lon) and the range it shows"""
+
+    __slots__ = ('name', 'center', 'max_range_km')
+
+    def __init__(self, name, max_range_km, center=None):
+        self.name = name
+        self.max_range_km = max_range_km
+        self.center = center
+
+    @classmethod
+    def parse(cls, text):
+        """
+        'approach:40' or 'approach:40@37.6189,-122.375'; without a center
+        the view uses the display's default one
+        """
+        name, _, rest = text.strip().partition(':')
+        range_text, _, center_text = rest.partition('@')
+        if not name or not range_text:
+            raise ValueError(f"bad view {text!r}, expected name:range_km[@lat,lon]")
+        center = None
+        if center_text:
+            lat, lon = center_text.split(',')
+            center = (float(lat), float(lon))
+        return cls(name, float(range_text), center)
+
+    def __repr__(self):
+        return f"ViewSpec({self.name!r}, {self.max_range_km:g} km, center={self.center})"
+
+
+class ProjectedBatch:
+    """
+    One delta's changed records projected around one center, with no range
+    limit: xs/ys in radar meters and ranges in meters, NaN where the
+    aircraft has no position. within() is the per-view range filter.
+    """
+
+    __slots__ = ('xs', 'ys', 'ranges')
+
+    def __init__(self, xs, ys, ranges):
+        self.xs = xs
+        self.ys = ys
+        self.ranges = ranges
+
+    def within(self, max_range_km):
+        """List aligned with the records, like Calculations.project_records: (x, y), or None"""
+        with np.errstate(invalid='ignore'):
+            inside = (self.ranges <= max_range_km * 1000).tolist()
+        return [xy if ok else None for xy, ok in zip(zip(self.xs.tolist(), self.ys.tolist()), inside)]
+
+
+class ProjectionCache:
+    """
+    Projections of the current delta keyed by radar center, so views that
+    share a center share one projection. Entries only live until the next
+    delta arrives.
+    """
+
+    def __init__(self):
+        self.delta = None
+        self.batches = {}
+        self.projections = 0
+        self.reuses = 0
+
+    def get(self, delta, records, center):
+        """ProjectedBatch for the delta's changed records around center"""
+        if delta is not self.delta:
+            self.delta = delta
+            self.batches = {}
+        key = (float(center[0]), float(center[1]))
+        batch = self.batches.get(key)
+        if batch is not None:
+            self.reuses += 1
+            return batch
+        n = len(records)
+        lat = np.fromiter((r.lat for r in records), dtype=float, count=n)
+        lon = np.fromiter((r.lon for r in records), dtype=float, count=n)
+        projected = Calculations.project_arrays(lat, lon, key)
+        batch = ProjectedBatch(projected['x'], projected['y'], projected['range'])
+        self.batches[key] = batch
+        self.projections += 1
+        return batch
+
+
+class SharedIngest:
+    """
+    One flight data feed for several views. It subscribes once, projects
+    each delta once per distinct radar center, and hands every view the
+    changed aircraft with positions outside that view's range dropped.
+    Views are RadarDisplay-like: radar_center, max_range_km and
+    update_projected(delta, changed, coords). Add them before the feed
+    starts, so none misses the first update. Only the first view prints
+    the verbose aircraft list.
+    """
+
+    def __init__(self, flight_data):
+        self.flight_data = flight_data
+        self.views = []
+        self.cache = ProjectionCache()
+        flight_data.subscribe_deltas(self.update)
+
+    def add_view(self, view):
+        # every view would print the same update; only the first one does
+        if self.views:
+            view.verbose = False
+        self.views.append(view)
+
+    def update(self, delta):
+        changed = delta.added + delta.updated
+        with PROFILER.timer('process_aircraft'):
+            coords = [self.cache.get(delta, changed, view.radar_center).within(view.max_range_km)
+                      for view in self.views]
+        for view, view_coords in zip(self.views, coords):
+            view.update_projected(delta, changed, view_coords)
+
+    def gauges(self):
+        """Counters for the metrics endpoint"""
+        return {'ingest_views': len(self.views), 'ingest_projections': self.cache.projections,
+                'ingest_projection_reuses': self.cache.reuses}